@@ -0,0 +1,43 @@
+"""Compare serial and parallel minification of one big stylesheet.
+
+Usage: python benchmarks/cssmin_parallel.py [size in MB] [jobs]
+"""
+
+import multiprocessing
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from paka.webstatic.cssmin import cssmin  # noqa: E402
+
+
+CORPUS_PATH = os.path.join(
+    os.path.dirname(__file__), "..", "tests", "files", "cssmin", "corpus.css")
+
+
+def _time(func):
+    start = time.time()
+    result = func()
+    return time.time() - start, result
+
+
+def main():
+    size = float(sys.argv[1]) if len(sys.argv) > 1 else 2
+    jobs = int(sys.argv[2]) if len(sys.argv) > 2 else (
+        multiprocessing.cpu_count())
+    with open(CORPUS_PATH) as f:
+        corpus = f.read()
+    css = corpus * (int(size * 1024 * 1024) // len(corpus) + 1)
+    serial_time, serial = _time(lambda: cssmin(css))
+    parallel_time, parallel = _time(lambda: cssmin(css, jobs=jobs))
+    assert parallel == serial
+    print("input: {:.1f} MB, jobs: {}".format(len(css) / 1024.0 ** 2, jobs))
+    print("serial: {:.2f} s".format(serial_time))
+    print("parallel: {:.2f} s ({:.2f}x)".format(
+        parallel_time, serial_time / parallel_time))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""Running of pipelines with asyncio (Python 3.5+).
+
+Input files are read concurrently in default executor of the loop.
+Minification (CPU-bound) is done in ``executor``, e.g.
+:class:`concurrent.futures.ProcessPoolExecutor`, separately for every
+item. Other pure stages (ones having ``key`` attribute, like
+``Concat``) are cheap and run in the loop. The rest (e.g. ``Output``,
+``CSSHashURLs``) may do blocking calls and update shared manifest, so
+they run in default executor one at a time.
+"""
+
+import asyncio
+
+from . import pipeline
+
+
+OFFLOADED_STAGES = (pipeline.CSSMin, pipeline.JSMin)
+
+
+def _read(item):
+    return item.data
+
+
+def _apply(path, data, stage):
+    return stage(pipeline.InputItem(path, data=data)).data
+
+
+async def _apply_to_items(loop, executor, input_, stage):
+    items = list(input_.items())
+    results = await asyncio.gather(*[
+        loop.run_in_executor(executor, _apply, item.path, item.data, stage)
+        for item in items])
+    new_items = [
+        pipeline.InputItem(item.path, data=data)
+        for item, data in zip(items, results)]
+    if isinstance(input_, pipeline.InputItem):
+        return new_items[0]
+    return pipeline.Input.from_items(new_items)
+
+
+async def run_async(
+    pl,
+    executor=None,
+    lock=None,
+    offloaded_stages=OFFLOADED_STAGES,
+):
+    """Run pipeline ``pl`` (like :func:`paka.webstatic.pipeline.run`).
+
+    Stages without ``key`` are run while holding ``lock``
+    (:class:`asyncio.Lock`), which is to be shared by pipelines that
+    are run concurrently.
+    """
+    loop = asyncio.get_event_loop()
+    pl = tuple(pl)
+    input_ = pl[0]
+    if lock is None:
+        lock = asyncio.Lock()
+    items = list(input_.items())
+    if not isinstance(input_, pipeline.InputItem):  # lazy one is consumed
+        input_ = pipeline.Input.from_items(items)
+    await asyncio.gather(*[
+        loop.run_in_executor(None, _read, item) for item in items])
+    for stage in pl[1:]:
+        if isinstance(stage, offloaded_stages):
+            input_ = await _apply_to_items(loop, executor, input_, stage)
+        elif getattr(stage, "key", None) is not None:
+            input_ = stage(input_)
+        else:
+            async with lock:
+                input_ = await loop.run_in_executor(None, stage, input_)
+    return input_
+
+
+async def run_many_async(
+    pls,
+    executor=None,
+    offloaded_stages=OFFLOADED_STAGES,
+):
+    """Run pipelines concurrently, return list of their results."""
+    lock = asyncio.Lock()
+    return await asyncio.gather(*[
+        run_async(
+            pl, executor=executor, lock=lock,
+            offloaded_stages=offloaded_stages)
+        for pl in pls])
@@ -0,0 +1,165 @@
+"""Serving files of registry types with asyncio (Python 3.5+)."""
+
+import asyncio
+from urllib.parse import unquote
+
+from . import serving
+
+
+BLOCK_SIZE = 64 * 1024
+MAX_OPEN_FILES = 64
+MAX_LINE_LENGTH = 8 * 1024
+MAX_HEADERS = 100
+
+
+class _BadRequest(Exception):
+    pass
+
+
+async def _read_line(reader):
+    try:
+        line = await reader.readline()
+    except ValueError:  # line is longer than limit of reader
+        raise _BadRequest
+    if len(line) > MAX_LINE_LENGTH or (line and not line.endswith(b"\n")):
+        raise _BadRequest
+    return line.decode("latin-1").rstrip("\r\n")
+
+
+async def _read_request(reader):
+    line = await _read_line(reader)
+    if not line:
+        return None
+    try:
+        method, target, version = line.split(" ")
+    except ValueError:
+        raise _BadRequest
+    headers = {}
+    while True:
+        line = await _read_line(reader)
+        if not line:
+            break
+        if len(headers) >= MAX_HEADERS:
+            raise _BadRequest
+        name, sep, value = line.partition(":")
+        if not sep:
+            raise _BadRequest
+        headers[name.strip().lower()] = value.strip()
+    url_path = unquote(target.split("?", 1)[0])
+    return method, url_path, version, headers
+
+
+class StaticServer(object):
+    """asyncio HTTP/1.1 server of files of registry types.
+
+    Blocking file system calls are done in ``executor`` (default
+    executor of the loop if ``None``), no more than ``max_open_files``
+    files are open at the same time. Use :meth:`handle` as
+    ``client_connected_cb`` of :func:`asyncio.start_server`.
+    """
+
+    def __init__(
+        self,
+        registry,
+        executor=None,
+        max_open_files=MAX_OPEN_FILES,
+        block_size=BLOCK_SIZE,
+        **kwargs
+    ):
+        self._responder = serving.Responder(registry, **kwargs)
+        self._executor = executor
+        self._max_open_files = max_open_files
+        self._open_files = None
+        self._block_size = block_size
+
+    def _get_open_files(self):
+        # Created lazily to be bound to loop that runs server.
+        if self._open_files is None:
+            self._open_files = asyncio.Semaphore(self._max_open_files)
+        return self._open_files
+
+    async def handle(self, reader, writer):
+        loop = asyncio.get_event_loop()
+        try:
+            keep_alive = True
+            while keep_alive:
+                try:
+                    request = await _read_request(reader)
+                except _BadRequest:
+                    request = None
+                    await self._write_response(
+                        writer, self._responder.error("400 Bad Request"),
+                        keep_alive=False)
+                if request is None:
+                    break
+                method, url_path, version, headers = request
+                keep_alive = (
+                    version == "HTTP/1.1" and
+                    headers.get("connection", "").lower() != "close")
+                response = await loop.run_in_executor(
+                    self._executor, self._responder.respond,
+                    url_path, method, lambda name: headers.get(name.lower()))
+                if response is None:
+                    response = self._responder.error("404 Not Found")
+                await self._write_response(writer, response, keep_alive)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    def _write_head(self, writer, response, keep_alive):
+        lines = ["HTTP/1.1 {}".format(response.status)]
+        lines.extend(
+            "{}: {}".format(name, value) for name, value in response.headers)
+        if not keep_alive:
+            lines.append("Connection: close")
+        lines.extend(("", ""))
+        writer.write("\r\n".join(lines).encode("latin-1"))
+
+    async def _write_response(self, writer, response, keep_alive):
+        if response.fs_path is None:
+            self._write_head(writer, response, keep_alive)
+            writer.write(response.body)
+            await writer.drain()
+            return
+        loop = asyncio.get_event_loop()
+        async with self._get_open_files():
+            try:
+                f = await loop.run_in_executor(
+                    self._executor, open, response.fs_path, "rb")
+            except OSError:
+                await self._write_response(
+                    writer, self._responder.error("404 Not Found"),
+                    keep_alive)
+                return
+            try:
+                self._write_head(writer, response, keep_alive)
+                await writer.drain()
+                await self._send_file(
+                    loop, writer, f, response.offset, response.length)
+            finally:
+                f.close()
+
+    async def _send_file(self, loop, writer, f, offset, length):
+        if hasattr(loop, "sendfile"):  # Python 3.7+
+            await loop.sendfile(writer.transport, f, offset, length)
+            return
+        f.seek(offset)
+        remaining = length
+        while remaining > 0:
+            block = await loop.run_in_executor(
+                self._executor, f.read, min(self._block_size, remaining))
+            if not block:
+                raise ConnectionError("file is shorter than expected")
+            remaining -= len(block)
+            writer.write(block)
+            await writer.drain()
+
+
+async def start_server(registry, host=None, port=None, **kwargs):
+    """Start serving files of ``registry``, return :class:`asyncio.Server`.
+
+    Keyword arguments are passed to :class:`StaticServer`.
+    """
+    server = StaticServer(registry, **kwargs)
+    return await asyncio.start_server(server.handle, host, port)
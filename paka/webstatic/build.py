@@ -0,0 +1,330 @@
+"""Declarative builds of bundles.
+
+Bundles are turned into graph of nodes: reading of every input file,
+applying of every stage before ``Concat`` to it, and building of every
+bundle. Nodes of inputs with the same path and the same prefix of pure
+stages (ones having ``key`` attribute) are shared between bundles. Pure
+stages may be run in worker processes, others (e.g. ones updating
+manifest) and outputs are run in the main process.
+
+To split building between several machines, every one of them may
+build its ``shard`` of bundles; manifests they write are then combined
+with ``python -m paka.webstatic.manifest --merge``.
+
+In development, :class:`DevBuilder` builds bundles when they are
+requested (see ``builder`` of :class:`paka.webstatic.serving.Responder`)
+instead.
+"""
+
+import argparse
+import collections
+import hashlib
+import multiprocessing
+import os
+import runpy
+import sys
+import threading
+
+from six.moves import queue
+
+from . import pipeline
+
+
+_HAS_ERROR_CALLBACK = sys.version_info >= (3, )
+
+
+class Bundle(object):
+
+    def __init__(self, inputs, stages, output, deps=()):
+        self.inputs = tuple(inputs)
+        self.stages = tuple(stages)
+        self.output = output
+        # Other files (e.g. imported ones) result depends on.
+        self.deps = tuple(deps)
+        concat_indexes = [
+            i for i, stage in enumerate(self.stages)
+            if isinstance(stage, pipeline.Concat)]
+        if concat_indexes:
+            i = concat_indexes[0]
+            self.item_stages = self.stages[:i]
+            self.bundle_stages = self.stages[i:]
+        else:
+            if len(self.inputs) != 1:
+                raise ValueError("bundle of many inputs needs Concat stage")
+            self.item_stages = self.stages
+            self.bundle_stages = ()
+
+
+def _get_shard(bundle, count):
+    # Stable between runs and machines, unlike built-in hash of str.
+    path = getattr(bundle.output, "out_path", None)
+    if path is None:
+        path = "\0".join(bundle.inputs)
+    digest = hashlib.sha1(path.encode("utf-8")).hexdigest()
+    return int(digest, 16) % count
+
+
+def shard(bundles, index, count):
+    """Return bundles of shard ``index`` (of ``count`` ones).
+
+    Bundles are assigned to shards by hash of output path, so every
+    bundle is in exactly one shard, and in the same one on every run.
+    """
+    if not 0 <= index < count:
+        raise ValueError("shard index must be in [0, {})".format(count))
+    return [
+        bundle for bundle in bundles
+        if _get_shard(bundle, count) == index]
+
+
+def _stage_key(stage):
+    key = getattr(stage, "key", None)
+    if key is None:
+        return stage
+    return (type(stage), key)
+
+
+def _is_pure(stage):
+    return getattr(stage, "key", None) is not None
+
+
+def _read(path, encoding):
+    return pipeline.InputItem(path, encoding=encoding).data
+
+
+def _apply(path, data, stage):
+    return stage(pipeline.InputItem(path, data=data)).data
+
+
+def _build(items, stages):
+    if not stages:  # bundle of one input
+        return items[0][1]
+    input_ = pipeline.Input.from_items(
+        pipeline.InputItem(path, data=data) for path, data in items)
+    return pipeline.run((input_, ) + tuple(stages)).data
+
+
+def _call(func, args):
+    # Pool.apply_async of Python 2 has no error_callback.
+    try:
+        return None, func(*args)
+    except Exception as exc:
+        return exc, None
+
+
+class _Node(object):
+
+    def __init__(self, deps, func, pure):
+        self.deps = deps
+        self.func = func
+        self.pure = pure
+        self.dependents = []
+        self.result = None
+        self.bundle = None
+
+    def get_args(self):
+        return self.func(*[dep.result for dep in self.deps])
+
+
+class Graph(object):
+
+    def __init__(self, bundles=(), encoding=pipeline.DEFAULT_ENCODING):
+        self._encoding = encoding
+        self._nodes = collections.OrderedDict()
+        self._bundle_nodes = []
+        for bundle in bundles:
+            self.add(bundle)
+
+    def __len__(self):
+        return len(self._nodes)
+
+    def _get_node(self, key, deps, func, pure):
+        try:
+            return self._nodes[key]
+        except KeyError:
+            pass
+        node = self._nodes[key] = _Node(deps, func, pure)
+        for dep in deps:
+            dep.dependents.append(node)
+        return node
+
+    def _add_item(self, path, stages):
+        key = (path, )
+        node = self._get_node(
+            key, (),
+            lambda: (_read, (path, self._encoding)), pure=True)
+        for stage in stages:
+            key += (_stage_key(stage), )
+            node = self._get_node(
+                key, (node, ),
+                lambda data, stage=stage: (_apply, (path, data, stage)),
+                pure=_is_pure(stage))
+        return node
+
+    def add(self, bundle):
+        deps = tuple(
+            self._add_item(path, bundle.item_stages)
+            for path in bundle.inputs)
+        node = _Node(
+            deps,
+            lambda *data: (
+                _build,
+                (list(zip(bundle.inputs, data)), bundle.bundle_stages)),
+            pure=all(_is_pure(stage) for stage in bundle.bundle_stages))
+        node.bundle = bundle
+        for dep in deps:
+            dep.dependents.append(node)
+        self._bundle_nodes.append(node)
+        self._nodes[("bundle", len(self._bundle_nodes))] = node
+
+    def run(self, jobs=1):
+        """Build all bundles, return list of outputs in order of adding.
+
+        If ``jobs`` is greater than one, pure nodes are run in pool of
+        that many processes.
+        """
+        pool = multiprocessing.Pool(jobs) if jobs > 1 else None
+        try:
+            self._run(pool)
+        finally:
+            if pool is not None:
+                pool.terminate()
+                pool.join()
+        return [node.result for node in self._bundle_nodes]
+
+    def _run(self, pool):
+        done = queue.Queue()
+        waiting = dict(
+            (node, len(node.deps)) for node in self._nodes.values())
+        ready = [node for node, count in waiting.items() if not count]
+        running = 0
+        while ready or running:
+            for node in ready:
+                func, args = node.get_args()
+                if pool is not None and node.pure:
+                    kwargs = {}
+                    if _HAS_ERROR_CALLBACK:  # e.g. args can't be pickled
+                        kwargs["error_callback"] = (
+                            lambda exc, node=node: done.put(
+                                (node, (exc, None))))
+                    pool.apply_async(
+                        _call, (func, args),
+                        callback=lambda res, node=node: done.put(
+                            (node, res)),
+                        **kwargs)
+                else:
+                    done.put((node, _call(func, args)))
+                running += 1
+            ready = []
+            node, (exc, result) = done.get()
+            running -= 1
+            if exc is not None:
+                raise exc
+            if node.bundle is not None:
+                result = node.bundle.output(
+                    pipeline.InputItem(path=None, data=result))
+            node.result = result
+            for dependent in node.dependents:
+                waiting[dependent] -= 1
+                if not waiting[dependent]:
+                    ready.append(dependent)
+
+
+def run(bundles, jobs=1, encoding=pipeline.DEFAULT_ENCODING):
+    return Graph(bundles, encoding=encoding).run(jobs=jobs)
+
+
+class DevBuilder(object):
+    """Build bundles on demand, without writing of outputs.
+
+    Result is kept in memory until modification time of some input (or
+    dependency) of bundle changes, so getting of unchanged bundle costs
+    one ``stat`` call per file.
+    """
+
+    def __init__(self, bundles, encoding=pipeline.DEFAULT_ENCODING):
+        self._encoding = encoding
+        self._bundles = dict(
+            (os.path.abspath(bundle.output.out_path), bundle)
+            for bundle in bundles)
+        self._cache = {}  # output path -> (mtimes, contents, etag)
+        self._lock = threading.Lock()
+
+    def __contains__(self, fs_path):
+        return os.path.abspath(fs_path) in self._bundles
+
+    def _build(self, bundle):
+        items = [
+            (path, pipeline.run(
+                (pipeline.InputItem(path, encoding=self._encoding), ) +
+                bundle.item_stages).data)
+            for path in bundle.inputs]
+        data = _build(items, bundle.bundle_stages)
+        return data.encode(getattr(
+            bundle.output, "encoding", pipeline.DEFAULT_ENCODING))
+
+    def get(self, fs_path):
+        """Return ``(contents, etag)`` of bundle output at ``fs_path``.
+
+        Returns ``None`` if there is no such bundle, raises ``OSError``
+        if some input file is missing.
+        """
+        fs_path = os.path.abspath(fs_path)
+        bundle = self._bundles.get(fs_path)
+        if bundle is None:
+            return None
+        paths = bundle.inputs + bundle.deps
+        mtimes = tuple(os.path.getmtime(path) for path in paths)
+        cached = self._cache.get(fs_path)
+        if cached is not None and cached[0] == mtimes:
+            return cached[1:]
+        with self._lock:  # build once for concurrent requests
+            cached = self._cache.get(fs_path)
+            if cached is None or cached[0] != mtimes:
+                # Stages are shared between builds (and bundles), so
+                # they may cache contents of changed files.
+                changed = [
+                    os.path.abspath(path)
+                    for i, path in enumerate(paths)
+                    if cached is None or cached[0][i] != mtimes[i]]
+                for stage in bundle.stages:
+                    invalidate = getattr(stage, "invalidate", None)
+                    if invalidate:
+                        invalidate(changed)
+                contents = self._build(bundle)
+                cached = self._cache[fs_path] = (
+                    mtimes, contents, hashlib.sha1(contents).hexdigest()[:12])
+        return cached[1:]
+
+
+def load_bundles(path, name="bundles"):
+    return runpy.run_path(path)[name]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "-j", "--jobs", type=int, default=1,
+        help="number of worker processes")
+    parser.add_argument(
+        "path", help="path to Python file defining list of bundles")
+    parser.add_argument(
+        "--name", default="bundles",
+        help="name of list of bundles in file")
+    parser.add_argument(
+        "--shard", type=int, default=0,
+        help="index of shard of bundles to build (from 0)")
+    parser.add_argument(
+        "--shards", type=int, default=1,
+        help="number of shards bundles are split into")
+    args = parser.parse_args()
+    try:
+        bundles = shard(
+            load_bundles(args.path, args.name), args.shard, args.shards)
+    except ValueError as exc:
+        parser.error(str(exc))
+    run(bundles, jobs=args.jobs)
+
+
+if __name__ == "__main__":
+    main()
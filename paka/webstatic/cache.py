@@ -0,0 +1,68 @@
+import threading
+import collections
+
+
+class LRUCache(object):
+    """Thread-safe LRU cache bounded by total size of values.
+
+    Size of each value is given on :meth:`put`; values larger than
+    ``max_item_size`` are not cached at all.
+    """
+
+    def __init__(self, max_size, max_item_size=None):
+        self.max_size = max_size
+        self.max_item_size = (
+            max_size if max_item_size is None else
+            min(max_item_size, max_size))
+        self._items = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._items)
+
+    def get(self, key, default=None):
+        with self._lock:
+            try:
+                item = self._items.pop(key)
+            except KeyError:
+                self.misses += 1
+                return default
+            self._items[key] = item  # move to the end
+            self.hits += 1
+            return item[0]
+
+    def put(self, key, value, size):
+        if size > self.max_item_size:
+            return False
+        with self._lock:
+            try:
+                self.size -= self._items.pop(key)[1]
+            except KeyError:
+                pass
+            while self._items and self.size + size > self.max_size:
+                _key, (_value, evicted_size) = self._items.popitem(
+                    last=False)
+                self.size -= evicted_size
+                self.evictions += 1
+            self._items[key] = (value, size)
+            self.size += size
+        return True
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self.size = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                "items": len(self._items),
+                "size": self.size,
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions}
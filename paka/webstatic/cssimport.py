@@ -0,0 +1,223 @@
+import os
+import re
+
+
+DEFAULT_ENCODING = "utf-8"
+
+_IMPORT_RE = re.compile(
+    r"""(/\*.*?\*/)|"""
+    r"""@import\s+(?:url\(\s*(['"]?)(.*?)\2\s*\)|(['"])(.*?)\4)"""
+    r"""\s*([^;]*?)\s*;""",
+    re.DOTALL | re.IGNORECASE)
+_URL_RE = re.compile(
+    r"""(/\*.*?\*/)|url\(\s*(['"]?)(.*?)\2\s*\)""",
+    re.DOTALL | re.IGNORECASE)
+_CHARSET_RE = re.compile(r"""^\s*@charset\s+[^;]*;\s*""", re.IGNORECASE)
+_SCHEME_RE = re.compile(r"^[a-zA-Z][a-zA-Z0-9+.-]*:")
+
+
+class ImportCycleError(ValueError):
+    pass
+
+
+def is_local_url(url):
+    return bool(url) and not (
+        url.startswith(("/", "#")) or _SCHEME_RE.match(url))
+
+
+def split_url(url):
+    """Split ``url`` into path and ``?query``/``#fragment`` suffix."""
+    for i, char in enumerate(url):
+        if char in "?#":
+            return url[:i], url[i:]
+    return url, ""
+
+
+def sub_urls(css, func):
+    """Replace local ``url()`` references with ``func(url)``.
+
+    References for which ``func`` returns ``None`` are left as is.
+    """
+    def replace(match):
+        comment, quote, url = match.group(1, 2, 3)
+        if comment or not is_local_url(url):
+            return match.group()
+        new_url = func(url)
+        if new_url is None:
+            return match.group()
+        return "url({0}{1}{0})".format(quote, new_url)
+    return _URL_RE.sub(replace, css)
+
+
+class _Text(object):
+
+    def __init__(self, text):
+        self.text = text
+
+
+class _URL(object):
+
+    def __init__(self, base_dir, url, quote, source):
+        self.base_dir = base_dir
+        self.url = url
+        self.quote = quote
+        self.source = source
+
+    def rebase(self, root_dir):
+        if self.base_dir == root_dir:
+            return self.source
+        path, suffix = split_url(self.url)
+        path = os.path.relpath(
+            os.path.join(self.base_dir, path), root_dir)
+        return "url({0}{1}{2}{0})".format(self.quote, path, suffix)
+
+
+class _Import(object):
+
+    def __init__(self, fs_path, media):
+        self.fs_path = fs_path
+        self.media = media
+
+
+class _NestedMediaError(Exception):
+    pass
+
+
+class _RemoteImport(object):
+
+    def __init__(self, rule, media, source):
+        self.rule = rule  # without media
+        self.media = media
+        self.source = source
+
+    def in_media(self, media_list):
+        """Return rule applied only to media of importing files."""
+        if not media_list:
+            return self.source
+        if self.media or len(media_list) > 1:
+            raise _NestedMediaError  # intersection has no syntax
+        return "{} {};".format(self.rule, media_list[0])
+
+
+def _parse_urls(text, base_dir):
+    pos = 0
+    for match in _URL_RE.finditer(text):
+        comment, quote, url = match.group(1, 2, 3)
+        if comment or not is_local_url(url):
+            continue
+        yield _Text(text[pos:match.start()])
+        yield _URL(base_dir, url, quote, match.group())
+        pos = match.end()
+    yield _Text(text[pos:])
+
+
+def parse(css, base_dir):
+    """Split ``css`` into text, rebasable ``url()`` and local imports."""
+    parts = []
+    pos = 0
+    for match in _IMPORT_RE.finditer(css):
+        if match.group(1):
+            continue
+        url = match.group(3) if match.group(2) is not None else None
+        if url is None:
+            url = match.group(5)
+        parts.extend(_parse_urls(css[pos:match.start()], base_dir))
+        if is_local_url(url):
+            parts.append(_Import(
+                os.path.normpath(os.path.join(base_dir, split_url(url)[0])),
+                match.group(6)))
+        else:
+            parts.append(_RemoteImport(
+                match.group()[:match.start(6) - match.start()].rstrip(),
+                match.group(6), match.group()))
+        pos = match.end()
+    parts.extend(_parse_urls(css[pos:], base_dir))
+    return parts
+
+
+class ImportInliner(object):
+    """Recursively inline local ``@import`` rules.
+
+    Parsed imported files are kept in ``cache`` (mapping of absolute
+    fs path to parsed parts), which may be shared between inliners to
+    read and parse every imported file only once per run.
+    """
+
+    def __init__(self, cache=None, encoding=DEFAULT_ENCODING):
+        self._cache = {} if cache is None else cache
+        self._encoding = encoding
+
+    def _parse_file(self, fs_path):
+        try:
+            return self._cache[fs_path]
+        except KeyError:
+            pass
+        with open(fs_path, "rb") as f:
+            css = f.read().decode(self._encoding)
+        parts = self._cache[fs_path] = parse(
+            _CHARSET_RE.sub("", css), os.path.dirname(fs_path))
+        return parts
+
+    def invalidate(self, fs_paths):
+        for fs_path in fs_paths:
+            self._cache.pop(fs_path, None)
+
+    def _expand(self, parts, root_dir, stack, buf, imports, media_list=()):
+        for part in parts:
+            if isinstance(part, _Text):
+                buf.append(part.text)
+            elif isinstance(part, _URL):
+                buf.append(part.rebase(root_dir))
+            elif isinstance(part, _RemoteImport):
+                imports.append(part.in_media(media_list))
+            else:
+                if part.fs_path in stack:
+                    raise ImportCycleError(
+                        " -> ".join(stack + [part.fs_path]))
+                if not part.media:
+                    self._expand(
+                        self._parse_file(part.fs_path),
+                        root_dir, stack + [part.fs_path], buf, imports,
+                        media_list)
+                    continue
+                inner_buf = []
+                inner_imports = []
+                try:
+                    self._expand(
+                        self._parse_file(part.fs_path),
+                        root_dir, stack + [part.fs_path], inner_buf,
+                        inner_imports, media_list + (part.media, ))
+                except _NestedMediaError:
+                    if media_list:
+                        raise
+                    # Keep the import, media of remote ones inside it are
+                    # then applied by browser.
+                    imports.append("@import \"{}\" {};".format(
+                        os.path.relpath(part.fs_path, root_dir),
+                        part.media))
+                    continue
+                buf.append("@media {}{{".format(part.media))
+                buf.extend(inner_buf)
+                buf.append("}")
+                imports.extend(inner_imports)
+
+    def inline(self, css, path=None):
+        """Return ``css`` with local imports inlined.
+
+        Other ``@import`` rules are moved to the top (after
+        ``@charset``), as browsers ignore ones following other rules.
+        """
+        fs_path = os.path.abspath(path or "")
+        root_dir = os.path.dirname(fs_path) if path else fs_path
+        match = _CHARSET_RE.match(css)
+        charset = match.group() if match else ""
+        buf = []
+        imports = []
+        self._expand(
+            parse(css[len(charset):], root_dir), root_dir, [fs_path], buf,
+            imports)
+        return "".join([charset] + [rule + "\n" for rule in imports] + buf)
+
+
+def inline_imports(css, path=None, cache=None, encoding=DEFAULT_ENCODING):
+    return ImportInliner(cache=cache, encoding=encoding).inline(css, path)
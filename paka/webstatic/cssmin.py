@@ -108,6 +108,14 @@ def remove_comments(css):
     return css
 
 
+_PSEUDOCLASSCOLON_RE = re.compile(r"(^|\})(([^\{\:])+\:)+([^\{]*\{)")
+_SPACE_BEFORE_RE = re.compile(r"\s+([!{};:>+\(\)\],])")
+_CHARSET_RE = re.compile(r"^(.*)(@charset \"[^\"]*\";)")
+_CHARSETS_RE = re.compile(r"^(\s*@charset [^;]+;\s*)+")
+_AND_RE = re.compile(r"\band\(")
+_SPACE_AFTER_RE = re.compile(r"([!{}:;>+\(\[,])\s+")
+
+
 def remove_unnecessary_whitespace(css):
     """Remove unnecessary whitespace characters."""
     
@@ -120,66 +128,74 @@ def remove_unnecessary_whitespace(css):
         translated back again later.
         """
         
-        regex = re.compile(r"(^|\})(([^\{\:])+\:)+([^\{]*\{)")
-        match = regex.search(css)
-        while match:
-            css = ''.join([
-                css[:match.start()],
-                match.group().replace(":", "___PSEUDOCLASSCOLON___"),
-                css[match.end():]])
-            match = regex.search(css)
-        return css
+        # Replaced colons can't make new matches before the end of a
+        # match, so one pass gives the same result as searching from
+        # the start after every replacement.
+        return _PSEUDOCLASSCOLON_RE.sub(
+            lambda match: match.group().replace(":", "___PSEUDOCLASSCOLON___"),
+            css)
     
     css = pseudoclasscolon(css)
     # Remove spaces from before things.
-    css = re.sub(r"\s+([!{};:>+\(\)\],])", r"\1", css)
+    css = _SPACE_BEFORE_RE.sub(r"\1", css)
     
     # If there is a `@charset`, then only allow one, and move to the beginning.
-    css = re.sub(r"^(.*)(@charset \"[^\"]*\";)", r"\2\1", css)
-    css = re.sub(r"^(\s*@charset [^;]+;\s*)+", r"\1", css)
+    css = _CHARSET_RE.sub(r"\2\1", css)
+    css = _CHARSETS_RE.sub(r"\1", css)
     
     # Put the space back in for a few cases, such as `@media screen` and
     # `(-webkit-min-device-pixel-ratio:0)`.
-    css = re.sub(r"\band\(", "and (", css)
+    css = _AND_RE.sub("and (", css)
     
     # Put the colons back.
     css = css.replace('___PSEUDOCLASSCOLON___', ':')
     
     # Remove spaces from after things.
-    css = re.sub(r"([!{}:;>+\(\[,])\s+", r"\1", css)
+    css = _SPACE_AFTER_RE.sub(r"\1", css)
     
     return css
 
 
+_SEMICOLONS_BEFORE_BRACE_RE = re.compile(r";+\}")
+
+
 def remove_unnecessary_semicolons(css):
     """Remove unnecessary semicolons."""
     
-    return re.sub(r";+\}", "}", css)
+    return _SEMICOLONS_BEFORE_BRACE_RE.sub("}", css)
+
+
+_EMPTY_RULE_RE = re.compile(r"[^\}\{]+\{\}")
 
 
 def remove_empty_rules(css):
     """Remove empty rules."""
     
-    return re.sub(r"[^\}\{]+\{\}", "", css)
+    return _EMPTY_RULE_RE.sub("", css)
+
+
+_RGB_RE = re.compile(r"rgb\s*\(\s*([0-9,\s]+)\s*\)")
 
 
 def normalize_rgb_colors_to_hex(css):
     """Convert `rgb(51,102,153)` to `#336699`."""
     
-    regex = re.compile(r"rgb\s*\(\s*([0-9,\s]+)\s*\)")
-    match = regex.search(css)
+    match = _RGB_RE.search(css)
     while match:
         colors = map(lambda s: s.strip(), match.group(1).split(","))
         hexcolor = '#%.2x%.2x%.2x' % tuple(map(int, colors))
         css = css.replace(match.group(), hexcolor)
-        match = regex.search(css)
+        match = _RGB_RE.search(css, match.start())
     return css
 
 
+_ZERO_UNITS_RE = re.compile(r"([\s:])(0)(px|em|%|in|cm|mm|pc|pt|ex)")
+
+
 def condense_zero_units(css):
     """Replace `0(px, em, %, etc)` with `0`."""
     
-    return re.sub(r"([\s:])(0)(px|em|%|in|cm|mm|pc|pt|ex)", r"\1\2", css)
+    return _ZERO_UNITS_RE.sub(r"\1\2", css)
 
 
 def condense_multidimensional_zeros(css):
@@ -195,38 +211,49 @@ def condense_multidimensional_zeros(css):
     return css
 
 
+_FLOATING_POINT_RE = re.compile(r"(:|\s)0+\.(\d+)")
+
+
 def condense_floating_points(css):
     """Replace `0.6` with `.6` where possible."""
     
-    return re.sub(r"(:|\s)0+\.(\d+)", r"\1.\2", css)
+    return _FLOATING_POINT_RE.sub(r"\1.\2", css)
+
+
+_HEX_COLOR_RE = re.compile(r"([^\"'=\s])(\s*)#([0-9a-fA-F])([0-9a-fA-F])([0-9a-fA-F])([0-9a-fA-F])([0-9a-fA-F])([0-9a-fA-F])")
 
 
 def condense_hex_colors(css):
     """Shorten colors from #AABBCC to #ABC where possible."""
     
-    regex = re.compile(r"([^\"'=\s])(\s*)#([0-9a-fA-F])([0-9a-fA-F])([0-9a-fA-F])([0-9a-fA-F])([0-9a-fA-F])([0-9a-fA-F])")
-    match = regex.search(css)
+    match = _HEX_COLOR_RE.search(css)
     while match:
         first = match.group(3) + match.group(5) + match.group(7)
         second = match.group(4) + match.group(6) + match.group(8)
         if first.lower() == second.lower():
             css = css.replace(match.group(), match.group(1) + match.group(2) + '#' + first)
-            match = regex.search(css, match.end() - 3)
+            match = _HEX_COLOR_RE.search(css, match.end() - 3)
         else:
-            match = regex.search(css, match.end())
+            match = _HEX_COLOR_RE.search(css, match.end())
     return css
 
 
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
 def condense_whitespace(css):
     """Condense multiple adjacent whitespace characters into one."""
     
-    return re.sub(r"\s+", " ", css)
+    return _WHITESPACE_RE.sub(" ", css)
+
+
+_SEMICOLONS_RE = re.compile(r";;+")
 
 
 def condense_semicolons(css):
     """Condense multiple adjacent semicolon characters into one."""
     
-    return re.sub(r";;+", ";", css)
+    return _SEMICOLONS_RE.sub(";", css)
 
 
 def wrap_css_lines(css, line_length):
@@ -245,7 +272,300 @@ def wrap_css_lines(css, line_length):
     return '\n'.join(lines)
 
 
-def cssmin(css, wrap=None):
+_NESTING_AT_RULES = frozenset((
+    "@media", "@supports", "@document", "@-moz-document"))
+_SHORTHAND_SIDES = ("top", "right", "bottom", "left")
+# Valid only as whole value, not as part of shorthand.
+_CSS_WIDE_KEYWORDS = frozenset(("inherit", "initial", "unset", "revert"))
+# Selectors every browser understands: type, class, id and CSS2
+# attribute selectors, CSS2 combinators and pseudos.
+_CSS2_SELECTOR_RE = re.compile(
+    r"""^(?:[-\w*.#>+, ]"""
+    r"""|\[[-\w]+(?:[~|]?=(?:[-\w]+|"[^"\\]*"|'[^'\\]*'))?\]"""
+    r"""|:(?:link|visited|hover|active|focus|first-child|first-letter"""
+    r"""|first-line|before|after)(?![-\w]))+$""",
+    re.IGNORECASE)
+_FOUR_VALUE_PROPERTIES = frozenset((
+    "margin", "padding", "border-width", "border-style", "border-color"))
+_COLOR_PROPERTY_RE = re.compile(
+    r"^(color|background(-color)?|border(-(top|right|bottom|left))?(-color)?|"
+    r"outline(-color)?|fill|stroke|(box|text)-shadow|text-decoration-color|"
+    r"column-rule(-color)?|caret-color)$")
+_PROTECTED_VALUE_RE = re.compile(
+    r"""("(?:\\.|[^"\\])*"|'(?:\\.|[^'\\])*'|url\([^)]*\))""",
+    re.IGNORECASE)
+_COLOR_RE = re.compile(r"(?<![\w#.-])(#[0-9a-fA-F]{3,6}|[a-zA-Z]+)(?![\w-])")
+_NUMBER_RE = re.compile(r"(?<![\w#.\\])(\d*\.?\d+)(?![\d.]|e[+-]?\d)")
+_AT_KEYWORD_RE = re.compile(r"@[-\w]*")
+# Only colors which have shorter form.
+_SHORTER_COLORS = {
+    "#f00": "red", "#c0c0c0": "silver", "#808080": "gray",
+    "#800000": "maroon", "#800080": "purple", "#008000": "green",
+    "#808000": "olive", "#000080": "navy", "#008080": "teal",
+    "#ffa500": "orange", "#f0ffff": "azure", "#f5f5dc": "beige",
+    "#ffe4c4": "bisque", "#a52a2a": "brown", "#ff7f50": "coral",
+    "#ffd700": "gold", "#4b0082": "indigo", "#fffff0": "ivory",
+    "#f0e68c": "khaki", "#faf0e6": "linen", "#da70d6": "orchid",
+    "#cd853f": "peru", "#ffc0cb": "pink", "#dda0dd": "plum",
+    "#fa8072": "salmon", "#a0522d": "sienna", "#fffafa": "snow",
+    "#d2b48c": "tan", "#ff6347": "tomato", "#ee82ee": "violet",
+    "#f5deb3": "wheat",
+    "white": "#fff", "black": "#000", "fuchsia": "#f0f", "magenta": "#f0f",
+    "yellow": "#ff0", "lightyellow": "#ffffe0", "aliceblue": "#f0f8ff",
+    "antiquewhite": "#faebd7", "blanchedalmond": "#ffebcd",
+    "cornflowerblue": "#6495ed", "darkslategray": "#2f4f4f",
+    "lightgoldenrodyellow": "#fafad2", "lightslategray": "#789",
+    "mediumspringgreen": "#00fa9a", "mediumvioletred": "#c71585",
+    "palegoldenrod": "#eee8aa", "papayawhip": "#ffefd5",
+}
+
+
+def _skip_string(css, i):
+    """Return index after string starting at `i`."""
+    quote = css[i]
+    i += 1
+    while i < len(css):
+        if css[i] == "\\":
+            i += 2
+        elif css[i] == quote:
+            return i + 1
+        else:
+            i += 1
+    return i
+
+
+def _scan(css, start, end, stops):
+    """Find first of `stops` outside strings, comments and parentheses."""
+    i = start
+    parens = 0
+    while i < end:
+        char = css[i]
+        if char in "\"'":
+            i = _skip_string(css, i)
+            continue
+        if char == "/" and css.startswith("/*", i):
+            comment_end = css.find("*/", i + 2)
+            i = end if comment_end < 0 else comment_end + 2
+            continue
+        if char == "\\":
+            i += 2
+            continue
+        if char == "(":
+            parens += 1
+        elif char == ")":
+            parens = max(parens - 1, 0)
+        elif not parens and char in stops:
+            return i
+        i += 1
+    return end
+
+
+def _match_brace(css, start, end):
+    """Return index of `}` matching `{` at `start`."""
+    depth = 0
+    i = start
+    while i < end:
+        i = _scan(css, i, end, "{}")
+        if i >= end:
+            break
+        depth += 1 if css[i] == "{" else -1
+        if not depth:
+            return i
+        i += 1
+    return end
+
+
+def _parse_rules(css, start, end):
+    """Parse rules into `("rule", selector, declarations)`, `("block",
+    prelude, nodes)` and `("raw", text)` nodes."""
+    nodes = []
+    i = start
+    while i < end:
+        if css.startswith("/*", i):
+            comment_end = css.find("*/", i + 2)
+            comment_end = end if comment_end < 0 else comment_end + 2
+            nodes.append(("raw", css[i:comment_end]))
+            i = comment_end
+            continue
+        j = _scan(css, i, end, "{};")
+        if j >= end or css[j] != "{":
+            nodes.append(("raw", css[i:j + 1]))
+            i = j + 1
+            continue
+        prelude = css[i:j]
+        k = _match_brace(css, j, end)
+        if prelude.startswith("@"):
+            name = _AT_KEYWORD_RE.match(prelude).group().lower()
+            if name in _NESTING_AT_RULES:
+                nodes.append(("block", prelude, _parse_rules(css, j + 1, k)))
+            else:  # e.g. @font-face and @keyframes
+                nodes.append(("raw", css[i:k + 1]))
+        else:
+            body = css[j + 1:k]
+            if _scan(body, 0, len(body), "{") < len(body):  # nested rules
+                nodes.append(("raw", css[i:k + 1]))
+            else:
+                nodes.append(("rule", prelude, _split_declarations(body)))
+        i = k + 1
+    return nodes
+
+
+def _split_declarations(body):
+    declarations = []
+    i = 0
+    while i < len(body):
+        j = _scan(body, i, len(body), ";")
+        declaration = body[i:j].strip()
+        if declaration:
+            declarations.append(declaration)
+        i = j + 1
+    return declarations
+
+
+def _get_property(declaration):
+    return declaration.split(":", 1)[0].strip().lower()
+
+
+def _map_unprotected(value, func):
+    """Apply `func` to parts of `value` outside strings and `url()`."""
+    parts = _PROTECTED_VALUE_RE.split(value)
+    for i in range(0, len(parts), 2):
+        parts[i] = func(parts[i])
+    return "".join(parts)
+
+
+def _shorten_number(match):
+    number = match.group(1)
+    if "." in number:
+        integer, fraction = number.split(".")
+        fraction = fraction.rstrip("0")
+        number = integer.lstrip("0") + ("." + fraction if fraction else "")
+    else:
+        number = number.lstrip("0")
+    return number or "0"
+
+
+def _shorten_color(match):
+    color = match.group(1)
+    return _SHORTER_COLORS.get(color.lower(), color)
+
+
+def _condense_four_values(value):
+    values = value.split(" ")
+    if not 1 < len(values) <= 4 or "(" in value:
+        return value
+    if len(values) == 4 and values[3] == values[1]:
+        values.pop()
+    if len(values) == 3 and values[2] == values[0]:
+        values.pop()
+    if len(values) == 2 and values[1] == values[0]:
+        values.pop()
+    return " ".join(values)
+
+
+def _optimize_declaration(declaration):
+    prop, sep, value = declaration.partition(":")
+    if not sep or prop.startswith("--"):  # custom properties are opaque
+        return declaration
+    prop_lower = prop.strip().lower()
+    value = _map_unprotected(
+        value, lambda part: _NUMBER_RE.sub(_shorten_number, part))
+    if _COLOR_PROPERTY_RE.match(prop_lower):
+        value = _map_unprotected(
+            value, lambda part: _COLOR_RE.sub(_shorten_color, part))
+    if prop_lower in _FOUR_VALUE_PROPERTIES:
+        value = _condense_four_values(value)
+    return "".join((prop, sep, value))
+
+
+def _collapse_longhands(declarations, shorthand):
+    longhands = ["-".join((shorthand, side)) for side in _SHORTHAND_SIDES]
+    related = [
+        (i, _get_property(declaration))
+        for i, declaration in enumerate(declarations)
+        if _get_property(declaration).startswith(shorthand)]
+    if sorted(prop for _i, prop in related) != sorted(longhands):
+        return declarations
+    values = dict(
+        (prop, declarations[i].split(":", 1)[1]) for i, prop in related)
+    if any(
+            " " in value or "(" in value or "!" in value or
+            value.strip().lower() in _CSS_WIDE_KEYWORDS
+            for value in values.values()):
+        return declarations
+    result = list(declarations)
+    first = related[0][0]
+    result[first] = "{}:{}".format(
+        shorthand,
+        _condense_four_values(" ".join(values[prop] for prop in longhands)))
+    for i, _prop in reversed(related[1:]):
+        del result[i]
+    return result
+
+
+def _optimize_declarations(declarations):
+    declarations = [
+        _optimize_declaration(declaration) for declaration in declarations]
+    # Drop exact duplicates; the last one is kept to preserve cascade.
+    result = []
+    for i, declaration in enumerate(declarations):
+        if declaration not in declarations[i + 1:]:
+            result.append(declaration)
+    for shorthand in ("margin", "padding"):
+        result = _collapse_longhands(result, shorthand)
+    return result
+
+
+def _can_merge_selectors(selector):
+    # Unknown (e.g. vendor-specific or too new) selector invalidates
+    # whole rule.
+    return bool(_CSS2_SELECTOR_RE.match(selector))
+
+
+def _optimize_nodes(nodes):
+    merged = []
+    for node in nodes:
+        if node[0] == "block":
+            node = ("block", node[1], _optimize_nodes(node[2]))
+        elif node[0] == "rule":
+            node = ("rule", node[1], _optimize_declarations(node[2]))
+            if merged and merged[-1][0] == "rule":
+                prev = merged[-1]
+                if prev[1] == node[1]:
+                    merged[-1] = (
+                        "rule", node[1],
+                        _optimize_declarations(prev[2] + node[2]))
+                    continue
+                if (
+                        prev[2] == node[2] and
+                        _can_merge_selectors(prev[1]) and
+                        _can_merge_selectors(node[1])):
+                    merged[-1] = (
+                        "rule", ",".join((prev[1], node[1])), node[2])
+                    continue
+        merged.append(node)
+    return merged
+
+
+def _serialize_nodes(nodes):
+    parts = []
+    for node in nodes:
+        if node[0] == "raw":
+            parts.append(node[1])
+        elif node[0] == "block":
+            parts.extend((node[1], "{", _serialize_nodes(node[2]), "}"))
+        elif node[2]:
+            parts.extend((node[1], "{", ";".join(node[2]), "}"))
+    return "".join(parts)
+
+
+def optimize_structure(css):
+    """Merge duplicate and adjacent rules, collapse longhands, shorten
+    colors and numbers in values of already minified CSS."""
+    return _serialize_nodes(_optimize_nodes(_parse_rules(css, 0, len(css))))
+
+
+def _cssmin_lexical(css):
     css = remove_comments(css)
     css = condense_whitespace(css)
     # A pseudo class for the Box Model Hack
@@ -258,9 +578,106 @@ def cssmin(css, wrap=None):
     css = condense_floating_points(css)
     css = normalize_rgb_colors_to_hex(css)
     css = condense_hex_colors(css)
+    return css
+
+
+_CHUNK_TOKEN_RE = re.compile(
+    r"""\\.|"(?:[^"\\]|\\.)*"?|'(?:[^'\\]|\\.)*'?|/\*.*?(?:\*/|$)|[{}()]""",
+    re.DOTALL)
+MIN_CHUNK_SIZE = 64 * 1024
+
+
+def _in_comment(css, i):
+    """Tell if `i` is inside comment (found like `remove_comments` does)."""
+    start = css.rfind("/*", 0, i)
+    if start < 0:
+        return False
+    end = css.find("*/", start + 2)
+    return end < 0 or end + 2 > i
+
+
+def split_rules(css, chunk_size):
+    """Split `css` after top-level rules into chunks of about `chunk_size`.
+
+    Every chunk but the first starts with `}` ending the previous one,
+    so that minification sees the same context as in the whole `css`.
+    Rules inside `@media`, `@supports` etc. are never split, neither are
+    ones containing `}` in strings.
+    """
+    starts = [0]
+    depth = parens = 0
+    for match in _CHUNK_TOKEN_RE.finditer(css):
+        token = match.group()
+        if token == "(":
+            parens += 1
+        elif token == ")":
+            parens = max(parens - 1, 0)
+        elif parens:
+            continue
+        elif token == "{":
+            depth += 1
+        elif token == "}" and depth:
+            depth -= 1
+            i = match.start()
+            if (not depth and i + 1 - starts[-1] >= chunk_size and
+                    i + 1 < len(css) and
+                    # Otherwise pseudo class colons may be protected
+                    # between } before and { after (see
+                    # remove_unnecessary_whitespace).
+                    css.rfind("{", 0, i) > css.rfind("}", 0, i) and
+                    not _in_comment(css, i)):
+                starts.append(i + 1)
+    return [
+        css[max(start - 1, 0):end]
+        for start, end in zip(starts, starts[1:] + [len(css)])]
+
+
+def _join_chunks(results):
+    parts = [results[0]]
+    for result in results[1:]:
+        if not result.startswith("}"):
+            return None
+        parts.append(result[1:])
+    return "".join(parts)
+
+
+def _cssmin_lexical_parallel(css, jobs):
+    if "\\*/" in css or "@charset" in css or '"\\"}\\""' in css:
+        # IE Mac hack, moving of @charset and Box Model Hack depend on
+        # whole stylesheet.
+        return _cssmin_lexical(css)
+    chunks = split_rules(
+        css, max(len(css) // (jobs * 4), MIN_CHUNK_SIZE))
+    if len(chunks) < 2:
+        return _cssmin_lexical(css)
+    import multiprocessing  # not needed (and slow to import) otherwise
+    pool = multiprocessing.Pool(jobs)
+    try:
+        results = pool.map(_cssmin_lexical, chunks)
+    finally:
+        pool.terminate()
+        pool.join()
+    joined = _join_chunks(results)
+    if joined is None:  # should not happen, but result must be exact
+        return _cssmin_lexical(css)
+    return joined
+
+
+def cssmin(css, wrap=None, structural=False, jobs=1):
+    """Minify `css`.
+
+    If `jobs` is greater than one, big `css` is split between top-level
+    rules and the chunks are minified in that many processes; result is
+    the same as of minification in one process.
+    """
+    if jobs > 1 and len(css) >= 2 * MIN_CHUNK_SIZE:
+        css = _cssmin_lexical_parallel(css, jobs)
+    else:
+        css = _cssmin_lexical(css)
+    if structural:
+        css = optimize_structure(css)
     if wrap is not None:
         css = wrap_css_lines(css, wrap)
     css = css.replace("___PSEUDOCLASSBMH___", '"\\"}\\""')
     css = condense_semicolons(css)
     return css.strip()
-
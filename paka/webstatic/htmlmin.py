@@ -1,5 +1,6 @@
 from __future__ import unicode_literals
 
+import argparse
 import io
 import re
 import sys
@@ -10,6 +11,45 @@ _HTMLMIN_RE = re.compile(r">[ \t\n\r\f\v]+<")
 _PRE_RE = re.compile(r"(<pre[^>]*?>.*?</pre>)", re.IGNORECASE | re.DOTALL)
 _PRE_START = "<pre"
 
+_TOKEN_RE = re.compile(
+    r"""(?P<comment><!--.*?-->)"""
+    r"""|(?P<other><!\[CDATA\[.*?\]\]>|<![^>]*>|<\?[^>]*>)"""
+    r"""|(?P<end></(?P<end_name>[a-zA-Z][^\s/>]*)\s*>)"""
+    r"""|(?P<start><(?P<name>[a-zA-Z][^\s/>]*)"""
+    r"""(?P<attrs>(?:\s*(?:[^\s"'>/=]+"""
+    r"""(?:\s*=\s*(?:"[^"]*"|'[^']*'|[^\s>]+))?"""
+    r"""|/(?!>)))*)\s*(?P<self_closing>/?)>)"""
+    r"""|(?P<text>[^<]+|<)""",
+    re.DOTALL)
+_ATTR_RE = re.compile(
+    r"""([^\s"'>/=]+)(?:\s*=\s*("[^"]*"|'[^']*'|[^\s>]+))?""")
+_UNQUOTED_VALUE_RE = re.compile(r"""^[^ \t\n\r\f\v"'=<>`]+$""")
+_WHITESPACE_RE = re.compile(r"[ \t\n\r\f\v]+")
+_CONDITIONAL_COMMENT_RE = re.compile(r"^<!--\[if|<!\[endif\]-->$")
+# Content of these elements is never changed.
+_VERBATIM_ELEMENTS = frozenset(
+    ("pre", "textarea", "script", "style", "title", "xmp", "listing"))
+_VERBATIM_END_RES = dict(
+    (name, re.compile(r"</{}\s*>".format(name), re.IGNORECASE))
+    for name in _VERBATIM_ELEMENTS)
+_BOOLEAN_ATTRIBUTES = frozenset("""
+    allowfullscreen async autofocus autoplay checked controls default defer
+    disabled formnovalidate hidden inert ismap itemscope loop multiple muted
+    nomodule novalidate open playsinline readonly required reversed
+    selected
+""".split())
+_DEFAULT_TYPES = {
+    "script": ("text/javascript", "application/javascript"),
+    "style": ("text/css", ),
+}
+# Whitespace at start and end of text next to these is not rendered.
+_BLOCK_ELEMENTS = frozenset("""
+    address article aside blockquote body br dd details dialog div dl dt
+    fieldset figcaption figure footer form h1 h2 h3 h4 h5 h6 head header hr
+    html li link main meta nav ol option p pre section summary table tbody td
+    tfoot th thead title tr ul
+""".split())
+
 
 def _get_fragments(input_):
     for fragment in _PRE_RE.split(input_):
@@ -17,7 +57,100 @@ def _get_fragments(input_):
         yield fragment, minify
 
 
-def htmlmin(input_):
+def _unquote(value):
+    if value[:1] in ("'", '"'):
+        return value[1:-1]
+    return value
+
+
+def _minify_start_tag(name, attrs, self_closing):
+    parts = [name]
+    unquoted = False  # value of last attribute
+    for match in _ATTR_RE.finditer(attrs):
+        attr, raw_value = match.groups()
+        lower_attr = attr.lower()
+        value = None if raw_value is None else _unquote(raw_value)
+        if lower_attr == "type" and value is not None and (
+                value.strip().lower() in _DEFAULT_TYPES.get(name.lower(), ())):
+            continue
+        unquoted = False
+        if value is None or (
+                lower_attr in _BOOLEAN_ATTRIBUTES and
+                value.lower() in ("", lower_attr)):
+            parts.append(attr)
+        elif _UNQUOTED_VALUE_RE.match(value):
+            parts.append("{}={}".format(attr, value))
+            unquoted = True
+        elif raw_value[:1] in ("'", '"'):
+            parts.append("{}={}".format(attr, raw_value))
+        else:
+            parts.append('{}="{}"'.format(attr, value))
+    if unquoted and self_closing:  # value would take "/" otherwise
+        attr, value = parts[-1].split("=", 1)
+        parts[-1] = '{}="{}"'.format(attr, value)
+    return "<{}{}>".format(" ".join(parts), self_closing)
+
+
+def _tokenize(input_):
+    pos = 0
+    while pos < len(input_):
+        match = _TOKEN_RE.match(input_, pos)
+        pos = match.end()
+        kind = match.lastgroup
+        if kind != "start":
+            name = match.group("end_name")
+            yield kind, name and name.lower(), match.group()
+            continue
+        name = match.group("name")
+        lower_name = name.lower()
+        if lower_name not in _VERBATIM_ELEMENTS:
+            yield kind, lower_name, _minify_start_tag(
+                name, match.group("attrs"), match.group("self_closing"))
+            continue
+        end_match = _VERBATIM_END_RES[lower_name].search(input_, pos)
+        end = end_match.end() if end_match else len(input_)
+        start_tag = match.group()
+        if lower_name in _DEFAULT_TYPES:
+            start_tag = _minify_start_tag(
+                name, match.group("attrs"), match.group("self_closing"))
+        yield "verbatim", lower_name, start_tag + input_[pos:end]
+        pos = end
+
+
+def _minify_aggressively(input_):
+    tokens = []
+    for kind, name, text in _tokenize(input_):
+        if kind == "comment" and not _CONDITIONAL_COMMENT_RE.search(text):
+            continue
+        if kind == "text" and tokens and tokens[-1][0] == "text":
+            tokens[-1] = (kind, name, tokens[-1][2] + text)
+        else:
+            tokens.append((kind, name, text))
+    buf = io.StringIO()
+    for i, (kind, name, text) in enumerate(tokens):
+        if kind == "text":
+            prev = tokens[i - 1] if i else None
+            next_ = tokens[i + 1] if i + 1 < len(tokens) else None
+            text = _WHITESPACE_RE.sub(" ", text)
+            if prev is None or prev[1] in _BLOCK_ELEMENTS:
+                text = text.lstrip(" ")
+            if next_ is None or next_[1] in _BLOCK_ELEMENTS:
+                text = text.rstrip(" ")
+        buf.write(text)
+    return buf.getvalue()
+
+
+def htmlmin(input_, aggressive=False):
+    """Remove whitespace between tags of HTML.
+
+    If ``aggressive`` is true, also collapse whitespace in text, remove
+    comments (but not conditional ones), redundant quotes of attribute
+    values, values of boolean attributes and default ``type`` of
+    ``<script>`` and ``<style>``. Content of ``<pre>``, ``<textarea>``,
+    ``<script>``, ``<style>`` and ``<title>`` is never changed.
+    """
+    if aggressive:
+        return _minify_aggressively(input_)
     buf = io.StringIO()
     for fragment, minify in _get_fragments(input_.strip()):
         if minify:
@@ -27,7 +160,12 @@ def htmlmin(input_):
 
 
 def main():
-    sys.stdout.write(htmlmin(sys.stdin.read()))
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--aggressive", action="store_true",
+        help="also minify text, attributes and remove comments")
+    args = parser.parse_args()
+    sys.stdout.write(htmlmin(sys.stdin.read(), aggressive=args.aggressive))
 
 
 if __name__ == "__main__":
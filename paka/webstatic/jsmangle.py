@@ -0,0 +1,517 @@
+"""Renaming of local variables of JavaScript to short names.
+
+Only bindings of ``function`` scopes (parameters, ``var`` and function
+declarations) are renamed. Globals, properties, labels and all names
+visible from code using ``eval`` or ``with`` are left as is. Names of
+bindings this module can't scope exactly (``let``, ``const``, ``class``,
+``catch`` parameters, destructuring, declarations in bodies of arrow
+functions and methods, shorthand properties) are never renamed in any
+enclosing scope.
+"""
+
+import re
+import string
+
+
+_TOKEN_RE = re.compile(
+    r"""(?P<ws>\s+)"""
+    r"""|(?P<comment>//[^\n]*|/\*.*?(?:\*/|\Z))"""
+    r"""|(?P<string>"(?:[^"\\\n]|\\.)*"|'(?:[^'\\\n]|\\.)*')"""
+    r"""|(?P<number>0[xXoObB][\da-fA-F_]+n?"""
+    r"""|(?:\d[\d_]*\.?[\d_]*|\.\d[\d_]*)(?:[eE][+-]?\d[\d_]*)?n?)"""
+    r"""|(?P<name>(?:[a-zA-Z_$]|[^\x00-\x7f]"""
+    r"""|\\u[\da-fA-F]{4}|\\u\{[\da-fA-F]+\})"""
+    r"""(?:[\w$]|[^\x00-\x7f]|\\u[\da-fA-F]{4}|\\u\{[\da-fA-F]+\})*)"""
+    r"""|(?P<punct>>>>=|\.\.\.|===|!==|\*\*=|<<=|>>>|>>=|&&=|\|\|=|\?\?="""
+    r"""|=>|==|!=|<=|>=|&&|\|\||\?\?|\?\.(?!\d)|\+\+|--|\+=|-=|\*=|/=|%="""
+    r"""|&=|\|=|\^=|\*\*|<<|>>|[{}()\[\];,<>+\-*/%&|^!~?:=.@#])""",
+    re.DOTALL)
+_REGEX_RE = re.compile(
+    r"""/(?:[^/\\\[\n]|\\.|\[(?:[^\]\\\n]|\\.)*\])+/[a-zA-Z]*""")
+_TEMPLATE_RE = re.compile(
+    r"""(?:[^`\\$]|\\.|\$(?!\{))*(?:`|\$\{)""", re.DOTALL)
+_ANY_RE = re.compile(".", re.DOTALL)  # e.g. stray backslash
+
+_KEYWORDS = frozenset("""
+    await break case catch class const continue debugger default delete do
+    else enum export extends false finally for function if implements import
+    in instanceof interface let new null package private protected public
+    return static super switch this throw true try typeof var void while with
+    yield
+""".split())
+# Keywords after which "/" starts regular expression, not division.
+_REGEX_KEYWORDS = frozenset("""
+    case delete do else in instanceof new of return throw typeof void yield
+    await
+""".split())
+_VALUE_KEYWORDS = frozenset("false null super this true".split())
+# Tokens after which "{" starts block, not object literal; also ones
+# after which "function" starts declaration, not expression.
+_BLOCK_PREFIXES = frozenset(
+    (None, ")", ";", "{", "}", "do", "else", "finally", "try"))
+# Tokens after which name in body of class is name of member.
+_MEMBER_PREFIXES = frozenset(("{", ";", "}", "#", "static"))
+_FIRST_CHARS = string.ascii_letters + "_$"
+_CHARS = _FIRST_CHARS + string.digits
+
+
+def tokenize(js):
+    """Split ``js`` into list of ``(type, text)`` pairs.
+
+    Types are ``"ws"``, ``"comment"``, ``"string"``, ``"template"`` (part
+    of template literal up to, between or after ``${...}``), ``"regex"``,
+    ``"number"``, ``"name"`` and ``"punct"``. Joined texts of tokens are
+    equal to ``js``.
+    """
+    tokens = []
+    braces = []  # "{" or "`" (substitution of template literal)
+    prev = None  # last significant token
+    pos = 0
+    while pos < len(js):
+        char = js[pos]
+        if char == "`" or (char == "}" and braces and braces[-1] == "`"):
+            if char == "}":
+                braces.pop()
+            match = _TEMPLATE_RE.match(js, pos + 1)
+            end = match.end() if match else len(js)  # unless unterminated
+            token = ("template", js[pos:end])
+            if token[1].endswith("${"):
+                braces.append("`")
+        else:
+            match = None
+            if (char == "/" and js[pos + 1:pos + 2] not in ("/", "*") and
+                    _regex_allowed(prev)):
+                match = _REGEX_RE.match(js, pos)
+            if match is not None:
+                token = ("regex", match.group())
+            else:
+                match = _TOKEN_RE.match(js, pos) or _ANY_RE.match(js, pos)
+                token = (match.lastgroup or "punct", match.group())
+                if token == ("punct", "{"):
+                    braces.append("{")
+                elif token == ("punct", "}") and braces:
+                    braces.pop()
+            end = match.end()
+        tokens.append(token)
+        if token[0] not in ("ws", "comment"):
+            prev = token
+        pos = end
+    return tokens
+
+
+def _regex_allowed(prev):
+    if prev is None:
+        return True
+    type_, text = prev
+    if type_ == "punct":
+        return text not in (")", "]", "}", "++", "--")
+    if type_ == "name":
+        return text in _REGEX_KEYWORDS
+    return False
+
+
+class _Scope(object):
+
+    def __init__(self, parent):
+        self.parent = parent
+        self.children = []
+        self.declared = set()
+        self.pinned = set()
+        self.unsafe = False  # uses eval or with, possibly in nested scope
+        self.bindings = {}  # name -> [count, first token index]
+        self.renames = {}
+        if parent is not None:
+            parent.children.append(self)
+
+    def chain(self):
+        scope = self
+        while scope is not None:
+            yield scope
+            scope = scope.parent
+
+
+class _Bracket(object):
+
+    def __init__(self, char, kind="other", scope=None):
+        self.char = char
+        # "params", "function" (body), "opaque" (body of arrow function or
+        # method), "class" (body), "block", "object" or "other".
+        self.kind = kind
+        self.scope = scope
+        self.expect_param = True
+        self.is_method = False
+
+
+class _Declaration(object):
+
+    def __init__(self, kind, depth):
+        self.kind = kind
+        self.depth = depth
+        self.expect_binding = True
+
+
+def _ends_expression(token):
+    type_, text = token
+    if type_ == "name":
+        return text not in _KEYWORDS or text in _VALUE_KEYWORDS
+    if type_ == "punct":
+        return text in (")", "]", "}", "++", "--")
+    if type_ == "template":
+        return text.endswith("`")
+    return True
+
+
+def _starts_statement(token):
+    type_, text = token
+    if type_ == "name":
+        return text not in ("in", "of", "instanceof")
+    return type_ in ("number", "string", "regex") or (
+        type_ == "template" and text.startswith("`"))
+
+
+class _Analyzer(object):
+    """Find scopes of bindings and names that must be kept."""
+
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.sig = [
+            i for i, (type_, _) in enumerate(tokens)
+            if type_ not in ("ws", "comment")]
+        self.root = _Scope(None)
+        self.scopes = [self.root]
+        self.brackets = []
+        self.bodies = []  # kinds of brackets of function bodies
+        self.refs = []  # (token index, scope)
+        self.kept = set()
+        self.skip = set()
+        self.declaration = None
+        self.function = None  # (scope, is declaration) until parameters
+        self.function_body = None  # scope, after parameters
+        self.class_depth = None
+        self.catch = False
+        self.pattern = None  # (depth, scope) of destructuring pattern
+        self.last_paren_is_method = False
+
+    def get(self, pos):
+        if 0 <= pos < len(self.sig):
+            return self.tokens[self.sig[pos]]
+        return (None, None)
+
+    def has_newline_before(self, pos):
+        start = self.sig[pos - 1] + 1 if pos else 0
+        return any(
+            "\n" in text for _, text in self.tokens[start:self.sig[pos]])
+
+    def pin(self, scope, name):
+        self.kept.add(name)
+        for s in scope.chain():
+            s.pinned.add(name)
+
+    def mark_unsafe(self, scope):
+        for s in scope.chain():
+            s.unsafe = True
+
+    def in_opaque_body(self):
+        return self.bodies[-1:] == ["opaque"]
+
+    def run(self):
+        for pos in range(len(self.sig)):
+            type_, text = self.get(pos)
+            decl = self.declaration
+            if (decl is not None and not decl.expect_binding and
+                    len(self.brackets) == decl.depth and
+                    self.has_newline_before(pos) and
+                    _ends_expression(self.get(pos - 1)) and
+                    _starts_statement((type_, text))):
+                self.declaration = None  # automatic semicolon insertion
+            if type_ == "punct":
+                self.on_punct(pos, text)
+            elif type_ == "template":
+                if text.startswith("}"):
+                    self.close()
+                if text.endswith("${"):
+                    self.brackets.append(_Bracket("{"))
+            elif type_ == "name" and pos not in self.skip:
+                if text in _KEYWORDS or text in ("eval", "of"):
+                    self.on_keyword(pos, text)
+                else:
+                    self.on_name(pos, text)
+        return self.root
+
+    def on_punct(self, pos, text):
+        prev = self.get(pos - 1)
+        top = self.brackets[-1] if self.brackets else None
+        decl = self.declaration
+        if text == "(":
+            self.open_paren(prev, top)
+        elif text in ("[", "{"):
+            self.open(text, prev, top)
+        elif text in (")", "]", "}"):
+            self.close()
+        elif text == "," and self.pattern is None:
+            if top is not None and top.kind == "params":
+                top.expect_param = True
+            elif decl is not None and len(self.brackets) == decl.depth:
+                decl.expect_binding = True
+        elif text == ";":
+            if decl is not None and len(self.brackets) == decl.depth:
+                self.declaration = None
+
+    def open_paren(self, prev, top):
+        bracket = _Bracket("(")
+        if self.function is not None:
+            bracket.kind = "params"
+            bracket.scope = self.function[0]
+            self.scopes.append(bracket.scope)
+            self.function = None
+        elif self.catch:
+            self.catch = False
+            self.pattern = (len(self.brackets), self.scopes[-1])
+        else:
+            bracket.is_method = (
+                top is not None and top.kind in ("object", "class") and (
+                    prev[0] in ("string", "number", "name") or
+                    prev[1] == "]"))
+        self.brackets.append(bracket)
+
+    def open(self, text, prev, top):
+        depth = len(self.brackets)
+        decl = self.declaration
+        bracket = _Bracket(text)
+        if self.pattern is not None:
+            pass
+        elif top is not None and top.kind == "params" and top.expect_param:
+            self.pattern = (depth, top.scope)
+            top.expect_param = False
+        elif (decl is not None and decl.expect_binding and
+                depth == decl.depth):
+            self.pattern = (depth, self.scopes[-1])
+            decl.expect_binding = False
+        elif text == "{":
+            if self.function_body is not None:
+                bracket.kind = "function"
+                bracket.scope = self.function_body
+                self.scopes.append(bracket.scope)
+                self.function_body = None
+            elif prev[1] == "=>" or (
+                    prev[1] == ")" and self.last_paren_is_method):
+                bracket.kind = "opaque"
+            elif self.class_depth == depth:
+                bracket.kind = "class"
+                self.class_depth = None
+            elif prev[1] in _BLOCK_PREFIXES:
+                bracket.kind = "block"
+            else:
+                bracket.kind = "object"
+            if bracket.kind in ("function", "opaque"):
+                self.bodies.append(bracket.kind)
+        self.brackets.append(bracket)
+
+    def close(self):
+        if not self.brackets:
+            return
+        bracket = self.brackets.pop()
+        depth = len(self.brackets)
+        if bracket.kind in ("params", "function"):
+            self.scopes.pop()
+        if bracket.kind == "params":
+            self.function_body = bracket.scope
+        if bracket.kind in ("function", "opaque"):
+            self.bodies.pop()
+        if bracket.char == "(":
+            self.last_paren_is_method = bracket.is_method
+        if self.pattern is not None and self.pattern[0] == depth:
+            self.pattern = None
+        if (self.declaration is not None and
+                depth < self.declaration.depth):
+            self.declaration = None
+
+    def on_keyword(self, pos, text):
+        prev = self.get(pos - 1)
+        scope = self.scopes[-1]
+        depth = len(self.brackets)
+        decl = self.declaration
+        if prev[1] in (".", "?."):
+            return  # property
+        top = self.brackets[-1] if self.brackets else None
+        if (self.get(pos + 1)[1] == ":" and prev[1] in ("{", ",") and
+                top is not None and
+                (top.kind == "object" or self.pattern is not None)):
+            return  # name of property
+        if text == "function":
+            before = self.get(pos - 2) if prev[1] == "async" else prev
+            self.function = (_Scope(scope), before[1] in _BLOCK_PREFIXES)
+            name_pos = pos + 1
+            if self.get(name_pos)[1] == "*":
+                name_pos += 1
+            type_, name = self.get(name_pos)
+            if type_ == "name" and name not in _KEYWORDS:
+                self.skip.add(name_pos)
+                self.on_function_name(self.sig[name_pos], name)
+        elif text in ("var", "let", "const"):
+            next_ = self.get(pos + 1)
+            if text == "let" and not (
+                    next_[0] == "name" or next_[1] in ("[", "{")):
+                return  # not a declaration, e.g. in "let = 1"
+            self.declaration = _Declaration(text, depth)
+        elif text == "class":
+            next_ = self.get(pos + 1)
+            if next_[0] == "name" and next_[1] != "extends":
+                self.pin(scope, next_[1])
+                self.skip.add(pos + 1)
+            self.class_depth = depth
+        elif text == "catch":
+            self.catch = True
+        elif text in ("with", "eval"):
+            self.kept.add(text)
+            self.mark_unsafe(scope)
+        elif text == "of":
+            if (decl is not None and not decl.expect_binding and
+                    depth == decl.depth):
+                self.declaration = None
+            else:
+                self.on_name(pos, text)
+        elif text == "in":
+            if decl is not None and depth == decl.depth:
+                self.declaration = None
+
+    def on_function_name(self, index, name):
+        scope = self.scopes[-1]
+        top = self.brackets[-1] if self.brackets else None
+        func_scope, is_decl = self.function
+        if is_decl and not self.in_opaque_body() and (
+                top is None or top.kind == "function"):
+            scope.declared.add(name)
+            self.refs.append((index, scope))
+        else:
+            # Name of function expression is bound in its own scope, of
+            # declaration in block has complicated semantics.
+            self.pin(scope, name)
+            func_scope.declared.add(name)
+            func_scope.pinned.add(name)
+
+    def on_name(self, pos, text):
+        prev = self.get(pos - 1)
+        next_ = self.get(pos + 1)
+        scope = self.scopes[-1]
+        depth = len(self.brackets)
+        top = self.brackets[-1] if self.brackets else None
+        decl = self.declaration
+        index = self.sig[pos]
+        if "\\" in text:
+            raise _Unsupported
+        if prev[1] in (".", "?."):
+            return  # property
+        if self.pattern is not None:
+            if not (next_[1] == ":" and prev[1] in ("{", ",")):
+                self.pin(self.pattern[1], text)
+            return
+        if top is not None and top.kind == "params" and top.expect_param:
+            top.expect_param = False
+            top.scope.declared.add(text)
+            self.refs.append((index, top.scope))
+            return
+        if (decl is not None and decl.expect_binding and
+                depth == decl.depth):
+            decl.expect_binding = False
+            if decl.kind == "var" and not self.in_opaque_body():
+                scope.declared.add(text)
+                self.refs.append((index, scope))
+            else:
+                self.pin(scope, text)
+            return
+        is_method = prev[1] in ("*", "async", "get", "set") and (
+            next_[1] == "(")
+        if top is not None and top.kind == "class" and (
+                is_method or prev[1] in _MEMBER_PREFIXES or
+                self.has_newline_before(pos)):
+            return  # name of class member
+        if next_[1] == ":" and prev[1] in (None, ";", "{", "}", ","):
+            return  # name of property or label
+        if prev[1] in ("break", "continue") and not (
+                self.has_newline_before(pos)):
+            return  # label
+        if top is not None and top.kind == "object":
+            if is_method:
+                return
+            if text in ("get", "set", "async") and (
+                    next_[0] in ("name", "string", "number") or
+                    next_[1] in ("[", "*")):
+                return
+            if prev[1] in ("{", ",") and next_[1] in (",", "}", "(", "="):
+                self.pin(scope, text)  # shorthand property or method
+                return
+        self.refs.append((index, scope))
+
+
+class _Unsupported(Exception):
+    pass
+
+
+def _generate_names():
+    for char in _FIRST_CHARS:
+        yield char
+    size = 1
+    while True:
+        for name in _generate_suffixed(size):
+            yield name
+        size += 1
+
+
+def _generate_suffixed(size):
+    if size == 1:
+        for first in _FIRST_CHARS:
+            for char in _CHARS:
+                yield first + char
+        return
+    for prefix in _generate_suffixed(size - 1):
+        for char in _CHARS:
+            yield prefix + char
+
+
+def _assign_names(scope, kept, taken):
+    if scope.parent is not None and not scope.unsafe:
+        bindings = sorted(
+            scope.bindings.items(), key=lambda item: (-item[1][0], item[1][1]))
+        names = _generate_names()
+        taken = set(taken)
+        for name, _ in bindings:
+            new_name = next(names)
+            while (new_name in kept or new_name in taken or
+                    new_name in _KEYWORDS):
+                new_name = next(names)
+            scope.renames[name] = new_name
+            taken.add(new_name)
+    for child in scope.children:
+        _assign_names(child, kept, taken)
+
+
+def mangle(js):
+    """Rename local variables of ``js`` to short names."""
+    tokens = tokenize(js)
+    analyzer = _Analyzer(tokens)
+    try:
+        root = analyzer.run()
+    except _Unsupported:  # e.g. escapes in names
+        return js
+    kept = analyzer.kept
+    resolved = []
+    for index, scope in analyzer.refs:
+        name = tokens[index][1]
+        for binding_scope in scope.chain():
+            if name in binding_scope.declared:
+                break
+        else:
+            binding_scope = None
+        if (binding_scope is None or binding_scope.parent is None or
+                binding_scope.unsafe or name in binding_scope.pinned):
+            kept.add(name)
+            continue
+        binding = binding_scope.bindings.setdefault(name, [0, index])
+        binding[0] += 1
+        resolved.append((index, binding_scope))
+    _assign_names(root, kept, frozenset())
+    texts = [text for _, text in tokens]
+    for index, scope in resolved:
+        texts[index] = scope.renames[texts[index]]
+    return "".join(texts)
@@ -1,4 +1,5 @@
 import os
+import array
 import hashlib
 import argparse
 
@@ -6,6 +7,10 @@ import argparse
 SEP = "  "
 
 
+class ManifestConflictError(ValueError):
+    pass
+
+
 class Manifest(object):
 
     def __init__(self, fs_path, hash_length=6, encoding="utf-8"):
@@ -50,6 +55,77 @@ class Manifest(object):
         with open(self.fs_path, "wb") as f:
             self.dump(f)
 
+    def update(self, other):
+        """Add entries of ``other`` manifest (of any fs root).
+
+        Raises :class:`ManifestConflictError` (and adds nothing) if
+        some path has different hashes in manifests.
+        """
+        entries = [
+            (self._get_path(os.path.join(other._fs_root, path)), full_hash)
+            for path, full_hash in other._data.items()]
+        conflicts = sorted(
+            path for path, full_hash in entries
+            if self._data.get(path, full_hash) != full_hash)
+        if conflicts:
+            raise ManifestConflictError(
+                "different hashes for: {}".format(", ".join(conflicts)))
+        self._data.update(entries)
+
+    def snapshot(self):
+        return ManifestSnapshot(self)
+
+
+class ManifestSnapshot(object):
+    """Immutable compact copy of manifest, for sharing between processes.
+
+    All paths and short hashes are kept in one bytes object, found by
+    binary search over array of offsets. Lookups create no references
+    to per-entry objects, so memory pages of snapshot made before fork
+    stay shared with workers.
+    """
+
+    def __init__(self, manifest):
+        self.fs_path = manifest.fs_path
+        self._fs_root = manifest._fs_root
+        self._encoding = manifest._encoding
+        entries = sorted(
+            (path.encode(manifest._encoding),
+             full_hash[:manifest._hash_length].encode("ascii"))
+            for path, full_hash in manifest._data.items())
+        self._offsets = array.array("L", [0])
+        parts = []
+        for path, short_hash in entries:
+            parts.append(b"".join((path, b"\0", short_hash)))
+            self._offsets.append(self._offsets[-1] + len(parts[-1]))
+        self._blob = b"".join(parts)
+
+    def _get_path(self, name):
+        return os.path.relpath(
+            os.path.join(self._fs_root, name),
+            self._fs_root
+        )
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def __getitem__(self, name):
+        path = self._get_path(name).encode(self._encoding)
+        blob, offsets = self._blob, self._offsets
+        lo, hi = 0, len(offsets) - 1
+        while lo < hi:
+            mid = (lo + hi) // 2
+            start, end = offsets[mid], offsets[mid + 1]
+            sep = blob.index(b"\0", start, end)
+            entry_path = blob[start:sep]
+            if entry_path < path:
+                lo = mid + 1
+            elif entry_path > path:
+                hi = mid
+            else:
+                return blob[sep + 1:end].decode("ascii")
+        raise KeyError(name)
+
 
 def add_hash_to_path(path, short_hash):
     # Here we assume posix (/-separated fs paths, just like url paths).
@@ -60,11 +136,32 @@ def add_hash_to_path(path, short_hash):
     return "{}.{}{}".format(prefix, short_hash, ext)
 
 
+def merge(fs_path, manifest_paths, encoding="utf-8"):
+    """Return manifest at ``fs_path`` with entries of given manifests."""
+    manifest = Manifest(fs_path, encoding=encoding)
+    for path in manifest_paths:
+        other = Manifest(path, encoding=encoding)
+        with open(path, "rb") as f:
+            other.load(f)
+        manifest.update(other)
+    return manifest
+
+
 def main():
     parser = argparse.ArgumentParser()
-    parser.add_argument("--in", required=True, help="path to manifest.in")
+    group = parser.add_mutually_exclusive_group(required=True)
+    group.add_argument("--in", help="path to manifest.in")
+    group.add_argument(
+        "--merge", nargs="+", metavar="MANIFEST",
+        help="paths to manifests (e.g. of build shards) to merge")
     parser.add_argument("--out", required=True, help="path to manifest")
     args = parser.parse_args()
+    if args.merge:
+        try:
+            merge(args.out, args.merge).save()
+        except ManifestConflictError as exc:
+            parser.exit(1, "{}\n".format(exc))
+        return
     manifest_dot_in_path = getattr(args, "in")
     manifest_path = getattr(args, "out")
     with open(manifest_dot_in_path) as f:
@@ -0,0 +1,145 @@
+"""Runtime metrics of registry.
+
+Registry collects them only if created with ``metrics``
+(:class:`Metrics`); otherwise every call site costs one check of
+``None``.
+"""
+
+import threading
+import collections
+
+
+# Names of labels of every metric (values are given on update).
+LABELS = {
+    "lookups": ("rtype", ),
+    "manifest_hits": ("rtype", ),
+    "manifest_misses": ("rtype", ),
+    "cache_hits": ("cache", ),
+    "cache_misses": ("cache", ),
+    "call_seconds": ("rtype", "method"),
+}
+DEFAULT_BUCKETS = (
+    0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.01, 0.1)
+
+
+class _Histogram(object):
+
+    def __init__(self, buckets):
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, buckets, value):
+        for i, bound in enumerate(buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        self.count += 1
+        self.sum += value
+
+
+def _format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    return "{{{}}}".format(",".join(
+        "{}=\"{}\"".format(
+            name,
+            str(value).replace("\\", "\\\\").replace("\"", "\\\""))
+        for name, value in pairs))
+
+
+def _format_value(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metrics(object):
+    """Thread-safe counters and timing histograms.
+
+    Counters are updated with :meth:`inc`, histograms (of seconds) with
+    :meth:`observe`; label values are tuples (see ``LABELS``).
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS, prefix="paka_webstatic"):
+        self.buckets = tuple(sorted(buckets))
+        self.prefix = prefix
+        self._counters = collections.defaultdict(
+            lambda: collections.defaultdict(int))
+        self._histograms = collections.defaultdict(dict)
+        self._lock = threading.Lock()
+
+    def inc(self, name, labels, value=1):
+        with self._lock:
+            self._counters[name][labels] += value
+
+    def observe(self, name, labels, value):
+        with self._lock:
+            try:
+                histogram = self._histograms[name][labels]
+            except KeyError:
+                histogram = self._histograms[name][labels] = _Histogram(
+                    self.buckets)
+            histogram.observe(self.buckets, value)
+
+    def clear(self):
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    def as_dict(self):
+        """Return snapshot of metrics as dict of plain dicts.
+
+        Keys of second level are label values joined with ``.``; bucket
+        counts of histograms are cumulative, keyed by upper bounds.
+        """
+        with self._lock:
+            result = dict(
+                (name, dict(
+                    (".".join(labels), value)
+                    for labels, value in values.items()))
+                for name, values in self._counters.items())
+            for name, histograms in self._histograms.items():
+                result[name] = dict(
+                    (".".join(labels), {
+                        "count": histogram.count,
+                        "sum": histogram.sum,
+                        "buckets": dict(zip(
+                            self.buckets, self._accumulate(histogram)))})
+                    for labels, histogram in histograms.items())
+            return result
+
+    def _accumulate(self, histogram):
+        total = 0
+        for count in histogram.counts:
+            total += count
+            yield total
+
+    def to_prometheus(self):
+        """Return snapshot of metrics in Prometheus text format."""
+        lines = []
+        with self._lock:
+            for name in sorted(self._counters):
+                full_name = "{}_{}_total".format(self.prefix, name)
+                lines.append("# TYPE {} counter".format(full_name))
+                for labels, value in sorted(self._counters[name].items()):
+                    lines.append("{}{} {}".format(
+                        full_name, _format_labels(LABELS[name], labels),
+                        value))
+            for name in sorted(self._histograms):
+                full_name = "{}_{}".format(self.prefix, name)
+                lines.append("# TYPE {} histogram".format(full_name))
+                histograms = self._histograms[name]
+                for labels, histogram in sorted(histograms.items()):
+                    bounds = [_format_value(b) for b in self.buckets]
+                    counts = list(self._accumulate(histogram))
+                    for bound, count in zip(
+                            bounds + ["+Inf"], counts + [histogram.count]):
+                        lines.append("{}_bucket{} {}".format(
+                            full_name,
+                            _format_labels(
+                                LABELS[name], labels, [("le", bound)]),
+                            count))
+                    label_s = _format_labels(LABELS[name], labels)
+                    lines.append("{}_sum{} {}".format(
+                        full_name, label_s, _format_value(histogram.sum)))
+                    lines.append("{}_count{} {}".format(
+                        full_name, label_s, histogram.count))
+        return "".join(line + "\n" for line in lines)
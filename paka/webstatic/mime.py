@@ -0,0 +1,25 @@
+import os
+import mimetypes
+
+
+MIME_TYPES = {
+    ".css": "text/css",
+    ".eot": "application/vnd.ms-fontobject",
+    ".js": "application/javascript",
+    ".json": "application/json",
+    ".mjs": "application/javascript",
+    ".otf": "font/otf",
+    ".svg": "image/svg+xml",
+    ".ttf": "font/ttf",
+    ".webp": "image/webp",
+    ".woff": "font/woff",
+    ".woff2": "font/woff2",
+}
+
+
+def guess_type(path, mime_types=MIME_TYPES):
+    ext = os.path.splitext(path)[1].lower()
+    try:
+        return mime_types[ext]
+    except KeyError:
+        return mimetypes.guess_type(path, strict=False)[0]
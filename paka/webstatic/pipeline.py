@@ -1,42 +1,112 @@
 import os
+import re
+import base64
 import hashlib
 
 from .manifest import add_hash_to_path
-from . import cssmin, jsmin
+from . import cssimport, mime
 
 
 DEFAULT_ENCODING = "utf-8"
 
 
 class Input(object):
+    """Items to be passed through stages.
 
-    def __init__(self, paths, encoding=DEFAULT_ENCODING):
-        self._inputs = [InputItem(path) for path in paths]
+    If ``lazy``, items are created, read and passed through stages one
+    by one only when consumed (e.g. by :class:`Concat`), so at once
+    memory holds data of one item instead of all of them. Lazy input
+    can be consumed only once.
+    """
+
+    def __init__(self, paths, encoding=DEFAULT_ENCODING, lazy=False):
+        items = (InputItem(path, encoding=encoding) for path in paths)
+        self._inputs = items if lazy else list(items)
         self._encoding = encoding
+        self._lazy = lazy
+
+    @classmethod
+    def from_items(cls, items, encoding=DEFAULT_ENCODING, lazy=False):
+        input_ = cls((), encoding=encoding, lazy=lazy)
+        input_._inputs = iter(items) if lazy else list(items)
+        return input_
+
+    def items(self):
+        return iter(self._inputs)
 
     def map_over_data(self, func):
+        if self._lazy:
+            inputs = self._inputs
+            self._inputs = (inp.map_over_data(func) for inp in inputs)
+            return self
         for inp in self._inputs:
             inp.map_over_data(func)
         return self
 
+    def map_over_items(self, func):
+        if self._lazy:
+            inputs = self._inputs
+            self._inputs = (func(inp) for inp in inputs)
+            return self
+        self._inputs = [func(inp) for inp in self._inputs]
+        return self
+
 
 class InputItem(object):
+    __slots__ = ("path", "_encoding", "_data", "_to_read", "_chunks")
 
-    def __init__(self, path, data=None, encoding=DEFAULT_ENCODING):
+    def __init__(
+        self,
+        path,
+        data=None,
+        encoding=DEFAULT_ENCODING,
+        chunks=None,
+    ):
         self.path = path
         self._encoding = encoding
         self._data = data
-        self._to_read = self.path if data is None else None
+        self._to_read = (
+            self.path if data is None and chunks is None else None)
+        # Iterator of parts of data, joined only when data is accessed.
+        self._chunks = chunks
+
+    def items(self):
+        return iter((self, ))
 
     def map_over_data(self, func):
         self._data = func(self.data)
         return self
 
+    def map_over_items(self, func):
+        return func(self)
+
     def append(self, s):
         self._data = "".join((self._data or "", s))
 
+    def release(self):
+        """Drop data (e.g. after it is consumed)."""
+        self._data = None
+        self._to_read = None
+        self._chunks = None
+
+    @property
+    def is_chunked(self):
+        return self._chunks is not None
+
+    def iter_data(self):
+        """Yield data in parts, without joining of chunks."""
+        if self._chunks is None:
+            yield self.data
+            return
+        chunks, self._chunks = self._chunks, None
+        for chunk in chunks:
+            yield chunk
+
     @property
     def data(self):
+        if self._chunks is not None:
+            self._data = "".join(self._chunks)
+            self._chunks = None
         if not self._data and self._to_read:
             with open(self._to_read, "rb") as f:
                 self._data = f.read().decode(self._encoding)
@@ -44,77 +114,313 @@ class InputItem(object):
         return self._data
 
 
+def _sha1(contents):
+    return hashlib.sha1(contents).hexdigest()
+
+
 class Output(object):
+    """Write data to ``out_path`` (with hash added if ``manifest`` given).
+
+    If ``store`` (:class:`paka.webstatic.store.ObjectStore`) is given,
+    data is written to it only if not there yet, and output file is a
+    link to (or copy of) stored object.
+
+    Data of input item is dropped after writing; returned item reads
+    it from output file if needed. Chunked item (made by
+    :class:`Concat` of lazy :class:`Input`) is written chunk by chunk,
+    unless custom ``hasher`` or ``store`` needs whole contents.
+    """
 
     def __init__(
         self,
         out_path,
         encoding=DEFAULT_ENCODING,
         manifest=None,
-        hasher=lambda contents: hashlib.sha1(contents).hexdigest(),
+        hasher=_sha1,
         makedirs=False,
+        store=None,
     ):
         self._out_path = out_path
         self._encoding = encoding
         self._manifest = manifest
         self._hasher = hasher
         self._makedirs = makedirs
+        self._store = store
+
+    @property
+    def out_path(self):
+        return self._out_path
+
+    @property
+    def encoding(self):
+        return self._encoding
+
+    def _write_chunks(self, input_):
+        tmp_path = "{}.{}.tmp".format(self._out_path, os.getpid())
+        hasher = hashlib.sha1()
+        try:
+            with open(tmp_path, "wb") as f:
+                for chunk in input_.iter_data():
+                    chunk = chunk.encode(self._encoding)
+                    hasher.update(chunk)
+                    f.write(chunk)
+        except Exception:
+            os.remove(tmp_path)
+            raise
+        return tmp_path, hasher.hexdigest()
 
     def __call__(self, input_):
-        contents = input_.data.encode(self._encoding)
+        if self._makedirs:
+            try:
+                os.makedirs(os.path.dirname(self._out_path))
+            except OSError:
+                pass
+        tmp_path = None
+        if (input_.is_chunked and self._hasher is _sha1 and
+                self._store is None):
+            tmp_path, full_hash = self._write_chunks(input_)
+        else:
+            contents = input_.data.encode(self._encoding)
+            full_hash = self._hasher(contents) if self._manifest else None
         path = self._out_path
         if self._manifest:
             manifest = self._manifest
-            try:  # try to remove old file (path of which has old hash)
-                os.remove(add_hash_to_path(path, manifest[path]))
-            except (KeyError, OSError):
-                pass
-            manifest[path] = self._hasher(contents)
+            try:
+                old_path = add_hash_to_path(path, manifest[path])
+            except KeyError:
+                old_path = None
+            manifest[path] = full_hash
             manifest.save()
             path = add_hash_to_path(path, manifest[path])
-        if self._makedirs:
-            try:
-                os.makedirs(os.path.dirname(path))
-            except OSError:
-                pass
-        with open(path, "wb") as f:
-            f.write(contents)
-        input_.path = path
-        return input_
+            if old_path is not None and old_path != path:
+                try:  # remove old file (path of which has old hash)
+                    os.remove(old_path)
+                except OSError:
+                    pass
+        if tmp_path is not None:
+            os.rename(tmp_path, path)
+        elif self._store is not None:
+            self._store.save(
+                contents, full_hash or self._hasher(contents), path)
+        else:
+            with open(path, "wb") as f:
+                f.write(contents)
+        input_.release()
+        return InputItem(path, encoding=self._encoding)
+
+
+# Stages having ``key`` attribute are pure: result depends only on input
+# and the key (see ``build`` module).
 
 
 class Concat(object):
+    key = ()
+
+    def __call__(self, input_):
+        if getattr(input_, "_lazy", False):
+            return InputItem(path=None, chunks=self._consume(input_))
+        return InputItem(path=None, data="".join(self._consume(input_)))
+
+    def _consume(self, input_):
+        for item in input_.items():
+            yield item.data
+            item.release()
+
+
+class CSSImport(object):
+
+    def __init__(self, cache=None, encoding=DEFAULT_ENCODING):
+        self._inliner = cssimport.ImportInliner(
+            cache=cache, encoding=encoding)
+
+    def __call__(self, input_):
+        return input_.map_over_items(self._inline)
+
+    def invalidate(self, fs_paths):
+        self._inliner.invalidate(fs_paths)
+
+    def _inline(self, item):
+        return item.map_over_data(
+            lambda data: self._inliner.inline(data, item.path))
+
+
+class CSSHashURLs(object):
+
+    def __init__(
+        self,
+        manifest,
+        hash_missing=False,
+        hasher=_sha1,
+        cache=None,
+    ):
+        self._manifest = manifest
+        self._hash_missing = hash_missing
+        self._hasher = hasher
+        self._cache = {} if cache is None else cache
+        self._changed = set()
+
+    def __call__(self, input_):
+        return input_.map_over_items(self._rewrite)
+
+    def _rewrite(self, item):
+        base_dir = os.path.abspath(os.path.dirname(item.path or ""))
+        return item.map_over_data(
+            lambda data: cssimport.sub_urls(
+                data, lambda url: self.hash_url(base_dir, url)))
+
+    def invalidate(self, fs_paths):
+        for fs_path in fs_paths:
+            self._cache.pop(fs_path, None)
+            if self._hash_missing:  # entry of manifest is outdated too
+                self._changed.add(fs_path)
+
+    def hash_url(self, base_dir, url):
+        """Return local ``url`` relative to ``base_dir`` with hash.
+
+        Returns ``None`` if there is no hash for it.
+        """
+        path, suffix = cssimport.split_url(url)
+        fs_path = os.path.normpath(os.path.join(base_dir, path))
+        try:
+            short_hash = self._cache[fs_path]
+        except KeyError:
+            short_hash = self._cache[fs_path] = self._lookup(fs_path)
+        if short_hash is None:
+            return None
+        return "".join((add_hash_to_path(path, short_hash), suffix))
+
+    def _lookup(self, fs_path):
+        if fs_path in self._changed:
+            self._changed.discard(fs_path)
+        else:
+            try:
+                return self._manifest[fs_path]
+            except KeyError:
+                if not self._hash_missing:
+                    return None
+        # Hash referenced file before stylesheet itself gets hashed, so
+        # that change of the file changes hash of the stylesheet.
+        try:
+            with open(fs_path, "rb") as f:
+                contents = f.read()
+        except (IOError, OSError):
+            return None
+        self._manifest[fs_path] = self._hasher(contents)
+        return self._manifest[fs_path]
+
+
+class CSSDataURIs(object):
+
+    def __init__(
+        self,
+        max_size=4096,
+        hash_urls=None,
+        mime_types=mime.MIME_TYPES,
+        cache=None,
+    ):
+        self._max_size = max_size
+        self._hash_urls = hash_urls
+        self._mime_types = mime_types
+        self._cache = {} if cache is None else cache
 
     def __call__(self, input_):
-        output = InputItem(path=None)
-        input_.map_over_data(output.append)
-        return output
+        return input_.map_over_items(self._rewrite)
+
+    def _rewrite(self, item):
+        base_dir = os.path.abspath(os.path.dirname(item.path or ""))
+        return item.map_over_data(
+            lambda data: cssimport.sub_urls(
+                data, lambda url: self._inline_url(base_dir, url)))
+
+    def invalidate(self, fs_paths):
+        for fs_path in fs_paths:
+            self._cache.pop(fs_path, None)
+        if self._hash_urls:
+            self._hash_urls.invalidate(fs_paths)
+
+    def _inline_url(self, base_dir, url):
+        path, suffix = cssimport.split_url(url)
+        if not suffix:  # fragments and queries mean something for URL
+            fs_path = os.path.normpath(os.path.join(base_dir, path))
+            try:
+                data_uri = self._cache[fs_path]
+            except KeyError:
+                data_uri = self._cache[fs_path] = self._encode(fs_path)
+            if data_uri is not None:
+                return data_uri
+        if self._hash_urls:
+            return self._hash_urls.hash_url(base_dir, url)
+        return None
+
+    def _encode(self, fs_path):
+        mime_type = mime.guess_type(fs_path, self._mime_types)
+        if not mime_type:
+            return None
+        try:
+            if os.path.getsize(fs_path) > self._max_size:
+                return None
+            with open(fs_path, "rb") as f:
+                contents = f.read()
+        except (IOError, OSError):
+            return None
+        return "data:{};base64,{}".format(
+            mime_type, base64.b64encode(contents).decode("ascii"))
 
 
 class CSSMin(object):
 
+    def __init__(self, structural=False):
+        self._structural = structural
+        self.key = (structural, )
+
     def __call__(self, input_):
-        return input_.map_over_data(cssmin.cssmin)
+        return input_.map_over_data(self._cssmin)
+
+    def _cssmin(self, data):
+        from . import cssmin
+        return cssmin.cssmin(data, structural=self._structural)
 
 
 class JSMin(object):
+    """Minify JavaScript, optionally renaming local variables first."""
+
+    def __init__(self, mangle=False):
+        self._mangle = mangle
+        self.key = (mangle, )
 
     def __call__(self, input_):
-        return input_.map_over_data(jsmin.jsmin)
+        return input_.map_over_data(self._jsmin)
+
+    def _jsmin(self, data):
+        from . import jsmangle, jsmin
+        if self._mangle:
+            data = jsmangle.mangle(data)
+        return jsmin.jsmin(data)
 
 
 class Replace(object):
+    """Replace keys of ``consts`` with their values in one pass.
+
+    At every position the longest matching key wins, replaced text is
+    not scanned again.
+    """
 
     def __init__(self, consts):
         self._consts = dict(consts)
+        self.key = tuple(sorted(self._consts.items()))
+        keys = sorted(
+            (k for k in self._consts if k), key=len, reverse=True)
+        self._regex = re.compile("|".join(map(re.escape, keys)))
+        self._has_keys = bool(keys)
 
     def __call__(self, input_):
         return input_.map_over_data(self._replace)
 
     def _replace(self, data):
-        for k, v in self._consts.items():
-            data = data.replace(k, v)
-        return data
+        if not self._has_keys:
+            return data
+        consts = self._consts
+        return self._regex.sub(lambda match: consts[match.group()], data)
 
 
 def run(pl):
@@ -1,15 +1,35 @@
 import os
+import re
+from timeit import default_timer
+
+try:
+    from urllib.parse import urljoin, quote
+except ImportError:  # Python 2
+    from urlparse import urljoin
+    from urllib import quote
 
-from six.moves.urllib.parse import urljoin
 from markupsafe import escape
 
 from .manifest import Manifest, add_hash_to_path
 
 
+_STYLE_END_RE = re.compile(r"</(style)", re.IGNORECASE)
+
+
 def _html_escape(s):
     return str(escape(s))
 
 
+def _quote_link_url(url):
+    # Keep already valid URL characters, but not "<" and ">".
+    return quote(url, safe="/:@!$&'()*+,;=-._~%?#[]")
+
+
+def _escape_style(css):
+    # Prevent premature end of <style> element.
+    return _STYLE_END_RE.sub(r"<\\/\1", css)
+
+
 def _prepare_url_path(path):
     if not path.endswith("/"):
         return "".join((path, "/"))
@@ -17,28 +37,132 @@ def _prepare_url_path(path):
 
 
 class Registry(object):
+    """Registry of resource types.
+
+    If ``metrics`` (:class:`paka.webstatic.metrics.Metrics`) is given,
+    lookups, manifest hits and misses, cache hits and misses, and
+    durations of calls are recorded in it.
+    """
 
-    def __init__(self, url_path, fs_path, types, domain=None):
+    def __init__(self, url_path, fs_path, types, domain=None, metrics=None):
         self.url_path = _prepare_url_path(url_path)
         self.domain = domain
         self.fs_path = os.path.abspath(fs_path)
+        self.metrics = metrics
+        self._types = {}
+        self._type_names = {}
         for name, rtype_obj in types.items():
             self.add_type(name, rtype_obj)
         self.manifest = None
+        self._caches = {}
 
     def add_type(self, name, rtype_obj):
         rtype_obj.bind(registry=self)
         setattr(self, name, rtype_obj)
-
-    def load_manifest(self, path="manifest", data=None, **kwargs):
+        self._types[name] = rtype_obj
+        self._type_names[rtype_obj] = name
+
+    def get_type_name(self, rtype_obj):
+        return self._type_names.get(rtype_obj, type(rtype_obj).__name__)
+
+    def get_types(self):
+        return dict(self._types)
+
+    def load_manifest(
+        self,
+        path="manifest",
+        data=None,
+        snapshot=False,
+        **kwargs
+    ):
+        """Load manifest from file at ``path`` or from ``data`` dict.
+
+        With ``snapshot``, manifest is turned into read-only
+        :class:`ManifestSnapshot`, to be loaded before forking of
+        worker processes, which then share its memory.
+        """
         fs_path = os.path.join(self.fs_path, path)
-        self.manifest = Manifest(fs_path, **kwargs)
+        manifest = Manifest(fs_path, **kwargs)
+        self._caches = {}
         if data:
             for k, v in data.items():
-                self.manifest[k] = v
+                manifest[k] = v
         else:
             with open(fs_path, "rb") as f:
-                self.manifest.load(f)
+                manifest.load(f)
+        self.manifest = manifest.snapshot() if snapshot else manifest
+
+    def get_cache(self, name):
+        """Return dict for caching, that is emptied on manifest load."""
+        return self._caches.setdefault(name, {})
+
+    def preload(self, *items):
+        """Return preload links for ``(type_name, spec[, kwargs])`` items.
+
+        Result is cached per items (until next manifest load), as
+        ``header`` (value of ``Link`` HTTP header) and ``html``.
+        """
+        key = tuple(
+            (item[0], item[1], tuple(sorted(item[2].items())))
+            if len(item) > 2 else tuple(item)
+            for item in items)
+        cache = self.get_cache("preload")
+        try:
+            preload = cache[key]
+        except KeyError:
+            pass
+        else:
+            if self.metrics is not None:
+                self.metrics.inc("cache_hits", ("preload", ))
+            return preload
+        if self.metrics is not None:
+            self.metrics.inc("cache_misses", ("preload", ))
+        preload = cache[key] = Preload(
+            getattr(self, item[0]).preload_link(
+                item[1], **(item[2] if len(item) > 2 else {}))
+            for item in items)
+        return preload
+
+
+class PreloadLink(object):
+
+    def __init__(self, url, rel="preload", as_=None, crossorigin=False):
+        self.url = url
+        self.rel = rel
+        self.as_ = as_
+        self.crossorigin = crossorigin
+
+    @property
+    def header(self):
+        parts = [
+            "<{}>".format(_quote_link_url(self.url)),
+            "rel={}".format(self.rel)]
+        if self.as_:
+            parts.append("as={}".format(self.as_))
+        if self.crossorigin:
+            parts.append("crossorigin")
+        return "; ".join(parts)
+
+    @property
+    def html(self):
+        attrs = [""]  # to get " one" or ""
+        if self.as_:
+            attrs.append("as=\"{}\"".format(_html_escape(self.as_)))
+        if self.crossorigin:
+            attrs.append("crossorigin")
+        return """<link rel="{}" href="{}"{}>""".format(
+            _html_escape(self.rel),
+            _html_escape(self.url),
+            " ".join(attrs),
+        )
+
+
+class Preload(object):
+
+    def __init__(self, links):
+        self.links = tuple(links)
+        self.header = ", ".join(link.header for link in self.links)
+        self.html = "".join(link.html for link in self.links)
 
 
 class RType(object):
@@ -51,7 +175,19 @@ class RType(object):
             self._kwargs = kwargs
 
         def _call(self, name):
-            return getattr(self._rtype_obj, name)(*self._args, **self._kwargs)
+            method = getattr(self._rtype_obj, name)
+            registry = self._rtype_obj._registry
+            metrics = getattr(registry, "metrics", None)
+            if metrics is None:
+                return method(*self._args, **self._kwargs)
+            start = default_timer()
+            try:
+                return method(*self._args, **self._kwargs)
+            finally:
+                metrics.observe(
+                    "call_seconds",
+                    (registry.get_type_name(self._rtype_obj), name),
+                    default_timer() - start)
 
         def __getattr__(self, name):
             return self._call(name)
@@ -86,6 +222,12 @@ class RType(object):
     def html(self):
         raise NotImplementedError
 
+    def preload_link(self):
+        raise NotImplementedError
+
+    def spec_from_url_path(self, url_path):
+        return None
+
 
 class PathHelpers(object):
 
@@ -129,48 +271,93 @@ class PathSpecAcceptingRType(RType, PathHelpers):
         return self._get_url(spec)
 
     def urls(self, *specs):
-        return map(self.url, specs)
+        return [self.url(spec) for spec in specs]
 
     def url_path(self, spec):
         return self._get_url_path(spec)
 
     def url_paths(self, *specs):
-        return map(self.url_path, specs)
+        return [self.url_path(spec) for spec in specs]
 
     def fs_path(self, spec):
         return self._get_fs_path(spec)
 
     def fs_paths(self, *specs):
-        return map(self.fs_path, specs)
+        return [self.fs_path(spec) for spec in specs]
+
+    def spec_from_url_path(self, url_path):
+        prefix = self._get_url_path()
+        if url_path.startswith(prefix):
+            return url_path[len(prefix):]
+        return None
 
 
 class ManifestConsultingPathSpecAcceptingRType(PathSpecAcceptingRType):
     _DEFAULT_ADD_HASH = object()
+    _PRELOAD_AS = None
 
-    def __init__(self, url_path, fs_path, add_hash):
+    def __init__(self, url_path, fs_path, add_hash, preload_as=None):
         super(
             ManifestConsultingPathSpecAcceptingRType, self).__init__(
                 url_path=url_path, fs_path=fs_path)
         self._add_hash = add_hash
+        self._preload_as = preload_as or self._PRELOAD_AS
+
+    def _should_add(self, add_hash):
+        return (
+            self._add_hash and
+            self._registry.manifest and
+            (add_hash is self._DEFAULT_ADD_HASH or add_hash))
+
+    def _count_cache(self, name, cache_name):
+        if self._registry.metrics is not None:
+            self._registry.metrics.inc(name, (cache_name, ))
+
+    def _count(self, name, value=1):
+        metrics = self._registry.metrics
+        if metrics is not None and value:
+            metrics.inc(name, (self._registry.get_type_name(self), ), value)
 
     def _add(self, path, spec, add_hash):
-        manifest = self._registry.manifest
-        if (
-            not self._add_hash or
-            not manifest or
-            (add_hash is not self._DEFAULT_ADD_HASH and not add_hash)
-        ):
+        self._count("lookups")
+        if not self._should_add(add_hash):
             return path
         try:
-            return add_hash_to_path(
+            path = add_hash_to_path(
                 path,
-                manifest[
+                self._registry.manifest[
                     super(
                         ManifestConsultingPathSpecAcceptingRType,
                         self).fs_path(spec)]
             )
         except KeyError:
+            self._count("manifest_misses")
             return path
+        self._count("manifest_hits")
+        return path
+
+    def _add_many(self, paths, specs, kwargs):
+        add_hash = kwargs.pop("add_hash", self._DEFAULT_ADD_HASH)
+        if kwargs:
+            raise TypeError(
+                "unexpected keyword arguments: {}".format(
+                    ", ".join(sorted(kwargs))))
+        self._count("lookups", len(paths))
+        if not self._should_add(add_hash):
+            return paths
+        manifest = self._registry.manifest
+        result = []
+        misses = 0
+        for path, spec in zip(paths, specs):
+            try:
+                result.append(
+                    add_hash_to_path(path, manifest[self._get_fs_path(spec)]))
+            except KeyError:
+                result.append(path)
+                misses += 1
+        self._count("manifest_hits", len(paths) - misses)
+        self._count("manifest_misses", misses)
+        return result
 
     def url(self, spec, add_hash=_DEFAULT_ADD_HASH):
         return self._add(
@@ -192,27 +379,148 @@ class ManifestConsultingPathSpecAcceptingRType(PathSpecAcceptingRType):
                 self).fs_path(spec),
             spec=spec, add_hash=add_hash)
 
+    def urls(self, *specs, **kwargs):
+        return self._add_many(
+            [self._get_url(spec) for spec in specs], specs, kwargs)
+
+    def url_paths(self, *specs, **kwargs):
+        return self._add_many(
+            [self._get_url_path(spec) for spec in specs], specs, kwargs)
+
+    def fs_paths(self, *specs, **kwargs):
+        return self._add_many(
+            [self._get_fs_path(spec) for spec in specs], specs, kwargs)
+
+    def html_many(self, specs, **kwargs):
+        """Return joined ``html`` of ``specs``, cached by arguments.
+
+        With ``inline``, result is not cached, as contents of unhashed
+        files may change (inlined CSS is cached per file anyway).
+        """
+        specs = tuple(specs)
+        if kwargs.get("inline"):
+            return "".join(self.html(spec, **kwargs) for spec in specs)
+        key = (specs, tuple(sorted(kwargs.items())))
+        cache = self._registry.get_cache((self, "html_many"))
+        try:
+            html = cache[key]
+        except KeyError:
+            pass
+        else:
+            self._count_cache("cache_hits", "html_many")
+            return html
+        self._count_cache("cache_misses", "html_many")
+        html = cache[key] = "".join(
+            self.html(spec, **kwargs) for spec in specs)
+        return html
+
+    def preload_link(self, spec, absolute_url=False):
+        if not self._preload_as:
+            raise NotImplementedError
+        return PreloadLink(
+            self._dispatch_absolute_url(absolute_url)(spec),
+            as_=self._preload_as,
+            crossorigin=self._preload_as == "font",
+        )
 
-class CSSRType(ManifestConsultingPathSpecAcceptingRType):
 
-    def html(self, spec, media=None, absolute_url=False):
-        if not media:
-            media_s = ""
+def _get_media_s(media):
+    if not media:
+        return ""
+    return " media=\"{}\"".format(_html_escape(media))
+
+
+class CSSRType(ManifestConsultingPathSpecAcceptingRType):
+    _PRELOAD_AS = "style"
+    _TOO_BIG = object()
+
+    def __init__(
+        self,
+        url_path,
+        fs_path,
+        add_hash,
+        preload_as=None,
+        inline_threshold=None,
+        encoding="utf-8",
+    ):
+        super(CSSRType, self).__init__(
+            url_path=url_path,
+            fs_path=fs_path,
+            add_hash=add_hash,
+            preload_as=preload_as,
+        )
+        self._inline_threshold = inline_threshold
+        self._encoding = encoding
+
+    def _read(self, fs_path):
+        from . import cssmin
+        with open(fs_path, "rb") as f:
+            css = f.read().decode(self._encoding)
+        return _escape_style(cssmin.cssmin(css))
+
+    def _get_inline_css(self, spec, auto):
+        fs_path = self.fs_path(spec)
+        # Contents of path with hash never get stale, of path without it
+        # are checked by modification time.
+        mtime = None
+        if fs_path == self._get_fs_path(spec):
+            mtime = os.path.getmtime(fs_path)
+        cache = self._registry.get_cache((self, "inline_css"))
+        cached_mtime, css = cache.get(fs_path, (None, None))
+        if cached_mtime != mtime:
+            css = None
+        if css is None or (css is self._TOO_BIG and not auto):
+            self._count_cache("cache_misses", "inline_css")
+            if auto and os.path.getsize(fs_path) > self._inline_threshold:
+                css = self._TOO_BIG
+            else:
+                css = self._read(fs_path)
+            cache[fs_path] = (mtime, css)
         else:
-            media_s = " media=\"{}\"".format(_html_escape(media))
+            self._count_cache("cache_hits", "inline_css")
+        return None if css is self._TOO_BIG else css
+
+    def inline(self, spec, media=None):
+        return "<style{}>{}</style>".format(
+            _get_media_s(media), self._get_inline_css(spec, auto=False))
+
+    def html(self, spec, media=None, absolute_url=False, inline=False):
+        if inline == "auto":
+            if self._inline_threshold is None:
+                raise ValueError("inline_threshold is not set")
+            css = self._get_inline_css(spec, auto=True)
+            if css is not None:
+                return "<style{}>{}</style>".format(_get_media_s(media), css)
+        elif inline:
+            return self.inline(spec, media=media)
         return """<link rel="stylesheet" href="{}"{}>""".format(
             _html_escape(self._dispatch_absolute_url(absolute_url)(spec)),
-            media_s,
+            _get_media_s(media),
         )
 
 
 class JSRType(ManifestConsultingPathSpecAcceptingRType):
-
-    def html(self, spec, defer=False, async=False, absolute_url=False):
+    _PRELOAD_AS = "script"
+
+    def html(
+        self,
+        spec,
+        defer=False,
+        async_=False,
+        absolute_url=False,
+        **kwargs
+    ):
+        # "async" is keyword since Python 3.7, but still may be passed
+        # as js(spec, **{"async": True}).
+        async_ = kwargs.pop("async", async_)
+        if kwargs:
+            raise TypeError(
+                "unexpected keyword arguments: {}".format(
+                    ", ".join(sorted(kwargs))))
         attrs = [""]  # to get " one" or ""
         if defer:
             attrs.append("defer")
-        if async:
+        if async_:
             attrs.append("async")
         return """<script src="{url_path}"{attrs}></script>""".format(
             url_path=_html_escape(
@@ -221,6 +529,15 @@ class JSRType(ManifestConsultingPathSpecAcceptingRType):
             attrs=" ".join(attrs),
         )
 
+    def preload_link(self, spec, module=False, absolute_url=False):
+        if module:
+            return PreloadLink(
+                self._dispatch_absolute_url(absolute_url)(spec),
+                rel="modulepreload",
+            )
+        return super(JSRType, self).preload_link(
+            spec, absolute_url=absolute_url)
+
 
 class FileRType(ManifestConsultingPathSpecAcceptingRType):
 
@@ -244,3 +561,10 @@ class FaviconRType(RType, PathHelpers):
     def fs_path(self, ext=None):
         return self._get_fs_path(self._get_name(ext))
 
+    def spec_from_url_path(self, url_path):
+        prefix = "/favicon."
+        ext = url_path[len(prefix):]
+        if url_path.startswith(prefix) and ext and "/" not in ext:
+            return ext
+        return None
+
@@ -0,0 +1,367 @@
+import os
+import re
+import email.utils
+
+from . import mime
+from .registry import ManifestConsultingPathSpecAcceptingRType
+
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+DEFAULT_CACHE_CONTROL = "no-cache"
+# Precompressed sidecar files, in order of preference.
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+_HASHED_SPEC_RE = re.compile(r"^(.*)\.([0-9a-fA-F]+)(\.[^./]+)$")
+_RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+class Asset(object):
+
+    def __init__(self, fs_path, short_hash=None, immutable=False):
+        self.fs_path = fs_path
+        self.short_hash = short_hash
+        self.immutable = immutable
+        self._sidecars = {}
+
+    def get_sidecar(self, encoding, ext):
+        try:
+            return self._sidecars[encoding]
+        except KeyError:
+            pass
+        fs_path = "".join((self.fs_path, ext))
+        sidecar = self._sidecars[encoding] = (
+            fs_path if os.path.isfile(fs_path) else None)
+        return sidecar
+
+
+def _is_safe_spec(spec):
+    return spec and not (
+        spec.startswith("/") or
+        "\\" in spec or
+        "\0" in spec or
+        ".." in spec.split("/"))
+
+
+def _resolve_manifest_consulting(registry, rtype, spec):
+    match = _HASHED_SPEC_RE.match(spec)
+    if match:
+        unhashed_spec = "".join((match.group(1), match.group(3)))
+        fs_path = rtype.fs_path(spec, add_hash=False)
+        if rtype.fs_path(unhashed_spec) == fs_path:
+            if not os.path.isfile(fs_path):
+                # Manifest made by manifest.main: files are not renamed.
+                fs_path = rtype.fs_path(unhashed_spec, add_hash=False)
+            return Asset(fs_path, match.group(2), immutable=True)
+    fs_path = rtype.fs_path(spec, add_hash=False)
+    short_hash = None
+    if registry.manifest:
+        try:
+            short_hash = registry.manifest[fs_path]
+        except KeyError:
+            pass
+    return Asset(fs_path, short_hash)
+
+
+def _resolve_bundle(registry, builder, url_path):
+    for rtype in registry.get_types().values():
+        spec = rtype.spec_from_url_path(url_path)
+        if not _is_safe_spec(spec):
+            continue
+        if isinstance(rtype, ManifestConsultingPathSpecAcceptingRType):
+            fs_path = rtype.fs_path(spec, add_hash=False)
+        else:
+            fs_path = rtype.fs_path(spec)
+        if fs_path in builder:
+            return fs_path
+    return None
+
+
+def resolve(registry, url_path):
+    """Return :class:`Asset` served at ``url_path``, or ``None``."""
+    for rtype in registry.get_types().values():
+        spec = rtype.spec_from_url_path(url_path)
+        if not _is_safe_spec(spec):
+            continue
+        if isinstance(rtype, ManifestConsultingPathSpecAcceptingRType):
+            asset = _resolve_manifest_consulting(registry, rtype, spec)
+        else:
+            asset = Asset(rtype.fs_path(spec))
+        if os.path.isfile(asset.fs_path):
+            return asset
+    return None
+
+
+def _parse_accept_encoding(value):
+    result = {}
+    for item in value.split(","):
+        parts = item.split(";")
+        name = parts[0].strip().lower()
+        q = 1.0
+        for param in parts[1:]:
+            key, _sep, val = param.strip().partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    q = float(val)
+                except ValueError:
+                    q = 0.0
+        if name:
+            result[name] = q
+    return result
+
+
+def _is_accepted(accepted, encoding):
+    q = accepted.get(encoding)
+    if q is None:
+        q = accepted.get("*", 0.0)
+    return q > 0
+
+
+def _etag_matches(header, etag):
+    if header.strip() == "*":
+        return True
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+
+def _parse_http_date(value):
+    try:
+        return email.utils.mktime_tz(email.utils.parsedate_tz(value))
+    except (TypeError, ValueError, OverflowError):
+        return None
+
+
+def _parse_range(value, size):
+    """Return ``(start, end)`` (inclusive), ``False`` or ``None``.
+
+    ``False`` means unsatisfiable range, ``None`` means that header is
+    to be ignored (e.g. multiple ranges).
+    """
+    match = _RANGE_RE.match(value.strip())
+    if not match:
+        return None
+    first, last = match.groups()
+    if not first:
+        if not last:
+            return None
+        length = int(last)
+        if not length:
+            return False
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = int(last) if last else size - 1
+    if start > end and last:
+        return None
+    if start >= size:
+        return False
+    return start, min(end, size - 1)
+
+
+class Response(object):
+    """Response to be sent by server.
+
+    If ``fs_path`` is not ``None``, ``length`` bytes of the file
+    starting at ``offset`` are to be sent as body, ``body`` otherwise.
+    """
+
+    def __init__(
+        self, status, headers, body=b"", fs_path=None, offset=0,
+        length=None, partial=False,
+    ):
+        self.status = status
+        self.headers = headers
+        self.body = body
+        self.fs_path = fs_path
+        self.offset = offset
+        self.length = length
+        self.partial = partial
+
+
+class Responder(object):
+    """Server-agnostic part of serving files of registry types.
+
+    URL paths with hash (as given by manifest) are served with
+    immutable caching headers, others have to be revalidated.
+
+    If ``builder`` (:class:`paka.webstatic.build.DevBuilder`) is given,
+    outputs of its bundles are built when requested (for development),
+    instead of being read from files.
+    """
+
+    def __init__(
+        self, registry, encodings=ENCODINGS, charset="utf-8", cache=None,
+        builder=None,
+    ):
+        self._registry = registry
+        self._encodings = encodings
+        self._charset = charset
+        # Hashed contents never change, so they may be cached (by hash
+        # and content encoding) without revalidation.
+        self._cache = cache
+        self._builder = builder
+
+    def _get_asset(self, url_path):
+        cache = self._registry.get_cache((self, "assets"))
+        try:
+            return cache[url_path]
+        except KeyError:
+            pass
+        asset = resolve(self._registry, url_path)
+        if asset is not None:
+            cache[url_path] = asset
+        return asset
+
+    def _forget_asset(self, url_path):
+        self._registry.get_cache((self, "assets")).pop(url_path, None)
+
+    def _get_content_type(self, fs_path):
+        content_type = (
+            mime.guess_type(fs_path) or "application/octet-stream")
+        if content_type.startswith("text/") or content_type in (
+                "application/javascript", "application/json"):
+            content_type = "{}; charset={}".format(
+                content_type, self._charset)
+        return content_type
+
+    def error(self, status, headers=()):
+        body = status.encode("ascii")
+        return Response(
+            status,
+            [
+                ("Content-Type", "text/plain; charset=ascii"),
+                ("Content-Length", str(len(body)))] + list(headers),
+            body=body)
+
+    def respond(self, url_path, method, get_header):
+        """Return :class:`Response`, or ``None`` for unknown ``url_path``.
+
+        ``get_header`` is called with request header name (like
+        ``"If-None-Match"``) and returns its value or ``None``.
+        """
+        if self._builder is not None:
+            fs_path = _resolve_bundle(self._registry, self._builder, url_path)
+            if fs_path is not None:
+                return self._respond_built(fs_path, method, get_header)
+        asset = self._get_asset(url_path)
+        if asset is None:
+            return None
+        if method not in ("GET", "HEAD"):
+            return self.error(
+                "405 Method Not Allowed", [("Allow", "GET, HEAD")])
+        try:
+            return self._respond(asset, method, get_header)
+        except (IOError, OSError):
+            self._forget_asset(url_path)
+            return self.error("404 Not Found")
+
+    def _respond_built(self, fs_path, method, get_header):
+        if method not in ("GET", "HEAD"):
+            return self.error(
+                "405 Method Not Allowed", [("Allow", "GET, HEAD")])
+        try:
+            contents, etag = self._builder.get(fs_path)
+        except (IOError, OSError):
+            return self.error("404 Not Found")
+        etag = "\"{}\"".format(etag)
+        headers = [
+            ("ETag", etag), ("Cache-Control", DEFAULT_CACHE_CONTROL)]
+        if_none_match = get_header("If-None-Match")
+        if if_none_match is not None and _etag_matches(if_none_match, etag):
+            return Response("304 Not Modified", headers)
+        headers.extend([
+            ("Content-Type", self._get_content_type(fs_path)),
+            ("Content-Length", str(len(contents)))])
+        return Response(
+            "200 OK", headers, body=b"" if method == "HEAD" else contents)
+
+    def _read_cached(self, asset, fs_path, content_encoding):
+        """Return ``(body, mtime, size)``, ``body`` is ``None`` if uncached."""
+        if self._cache is None or not asset.immutable:
+            stat = os.stat(fs_path)
+            return None, stat.st_mtime, stat.st_size
+        key = (asset.fs_path, asset.short_hash, content_encoding)
+        cached = self._cache.get(key)
+        if cached is not None:
+            body, mtime = cached
+            return body, mtime, len(body)
+        with open(fs_path, "rb") as f:
+            stat = os.fstat(f.fileno())
+            if stat.st_size > self._cache.max_item_size:
+                return None, stat.st_mtime, stat.st_size
+            body = f.read()
+        self._cache.put(key, (body, stat.st_mtime), len(body))
+        return body, stat.st_mtime, len(body)
+
+    def _respond(self, asset, method, get_header):
+        accepted = _parse_accept_encoding(
+            get_header("Accept-Encoding") or "")
+        fs_path = asset.fs_path
+        content_encoding = None
+        has_sidecars = False
+        for encoding, ext in self._encodings:
+            sidecar = asset.get_sidecar(encoding, ext)
+            if sidecar:
+                has_sidecars = True
+                if not content_encoding and _is_accepted(accepted, encoding):
+                    fs_path, content_encoding = sidecar, encoding
+        body, mtime, size = self._read_cached(
+            asset, fs_path, content_encoding)
+        if asset.short_hash:
+            etag = asset.short_hash
+        else:
+            etag = "{:x}-{:x}".format(int(mtime), size)
+        if content_encoding:
+            etag = "-".join((etag, content_encoding))
+        etag = "\"{}\"".format(etag)
+        headers = [
+            ("ETag", etag),
+            ("Last-Modified", email.utils.formatdate(mtime, usegmt=True)),
+            ("Cache-Control", (
+                IMMUTABLE_CACHE_CONTROL if asset.immutable else
+                DEFAULT_CACHE_CONTROL))]
+        if has_sidecars:
+            headers.append(("Vary", "Accept-Encoding"))
+        if_none_match = get_header("If-None-Match")
+        if if_none_match is not None:
+            not_modified = _etag_matches(if_none_match, etag)
+        else:
+            since = _parse_http_date(get_header("If-Modified-Since") or "")
+            not_modified = since is not None and int(mtime) <= since
+        if not_modified:
+            return Response("304 Not Modified", headers)
+        headers.append(
+            ("Content-Type", self._get_content_type(asset.fs_path)))
+        if content_encoding:
+            headers.append(("Content-Encoding", content_encoding))
+        headers.append(("Accept-Ranges", "bytes"))
+        byte_range = None
+        range_header = get_header("Range")
+        if_range = get_header("If-Range")
+        if range_header and (if_range is None or if_range.strip() == etag):
+            byte_range = _parse_range(range_header, size)
+        if byte_range is False:
+            return self.error(
+                "416 Range Not Satisfiable",
+                [("Content-Range", "bytes */{}".format(size))])
+        if byte_range:
+            start, end = byte_range
+            length = end - start + 1
+            headers.extend([
+                ("Content-Range", "bytes {}-{}/{}".format(start, end, size)),
+                ("Content-Length", str(length))])
+            status = "206 Partial Content"
+        else:
+            start, length = 0, size
+            headers.append(("Content-Length", str(size)))
+            status = "200 OK"
+        if method == "HEAD":
+            return Response(status, headers)
+        if body is not None:
+            return Response(status, headers, body=body[start:start + length])
+        return Response(
+            status, headers, fs_path=fs_path, offset=start, length=length,
+            partial=bool(byte_range))
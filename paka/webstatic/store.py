@@ -0,0 +1,72 @@
+"""Content-addressed store of output files.
+
+Every distinct contents is written once, to path derived from its full
+hash. Output files are hard links to stored objects (or copies of them
+if hard links are not possible, e.g. across file systems).
+"""
+
+import errno
+import os
+import shutil
+
+
+class ObjectStore(object):
+
+    def __init__(self, root_dir):
+        self.root_dir = root_dir
+
+    def get_path(self, full_hash):
+        return os.path.join(self.root_dir, full_hash[:2], full_hash[2:])
+
+    def put(self, contents, full_hash):
+        """Store ``contents`` unless already stored, return its path."""
+        path = self.get_path(full_hash)
+        if os.path.exists(path):
+            return path
+        _makedirs(os.path.dirname(path))
+        tmp_path = "{}.{}.tmp".format(path, os.getpid())
+        with open(tmp_path, "wb") as f:
+            f.write(contents)
+        os.rename(tmp_path, path)  # atomic, so readers never see part
+        return path
+
+    def link(self, full_hash, path):
+        """Make file at ``path`` have stored contents of ``full_hash``."""
+        obj_path = self.get_path(full_hash)
+        try:
+            if os.path.samefile(obj_path, path):
+                return
+        except OSError:  # no file at path
+            pass
+        tmp_path = "{}.{}.tmp".format(path, os.getpid())
+        try:
+            os.link(obj_path, tmp_path)
+        except (AttributeError, OSError):  # e.g. other file system
+            shutil.copyfile(obj_path, tmp_path)
+        os.rename(tmp_path, path)
+
+    def save(self, contents, full_hash, path):
+        self.put(contents, full_hash)
+        self.link(full_hash, path)
+
+    def prune(self):
+        """Remove objects no output file is hard linked to.
+
+        Objects only copied (not linked) to outputs are removed too.
+        """
+        removed = 0
+        for dir_path, _, file_names in os.walk(self.root_dir):
+            for file_name in file_names:
+                path = os.path.join(dir_path, file_name)
+                if os.stat(path).st_nlink == 1:
+                    os.remove(path)
+                    removed += 1
+        return removed
+
+
+def _makedirs(path):
+    try:
+        os.makedirs(path)
+    except OSError as exc:
+        if exc.errno != errno.EEXIST:
+            raise
@@ -0,0 +1,157 @@
+"""Minification of HTML templates when they are loaded.
+
+Template tags and expressions (Jinja2/Django syntax by default) are
+replaced with placeholders before minification and put back after it,
+so their contents and whitespace between adjacent ones are kept.
+"""
+
+import hashlib
+import io
+import itertools
+import os
+import re
+import threading
+
+import six
+
+from . import htmlmin
+
+
+DEFAULT_ENCODING = "utf-8"
+TEMPLATE_TAG_RE = re.compile(r"{{.*?}}|{%.*?%}|{#.*?#}", re.DOTALL)
+
+
+def _get_placeholder_prefix(source):
+    # Backtick makes attribute values with placeholders stay quoted.
+    for i in itertools.count():
+        prefix = "`tpl{}-".format(i)
+        if prefix not in source:
+            return prefix
+
+
+def minify_template(source, aggressive=False, tag_re=TEMPLATE_TAG_RE):
+    """Minify HTML of template ``source``, keeping tags of template."""
+    prefix = _get_placeholder_prefix(source)
+    tags = []
+
+    def protect(match):
+        tags.append(match.group())
+        return "{}{}`".format(prefix, len(tags) - 1)
+    minified = htmlmin.htmlmin(
+        tag_re.sub(protect, source), aggressive=aggressive)
+    for i, tag in enumerate(tags):
+        minified = minified.replace("{}{}`".format(prefix, i), tag, 1)
+    return minified
+
+
+class TemplateMinifier(object):
+    """Minify template sources, caching results by path and mtime.
+
+    If ``cache_dir`` is given, results are also stored there, to be
+    reused by other processes and after restarts.
+    """
+
+    def __init__(
+        self,
+        aggressive=False,
+        tag_re=TEMPLATE_TAG_RE,
+        cache_dir=None,
+        encoding=DEFAULT_ENCODING
+    ):
+        self._aggressive = aggressive
+        self._tag_re = tag_re
+        self._cache_dir = cache_dir
+        self._encoding = encoding
+        self._cache = {}  # path -> (mtime, minified source)
+        self._lock = threading.Lock()
+
+    def _minify(self, source):
+        return minify_template(
+            source, aggressive=self._aggressive, tag_re=self._tag_re)
+
+    def _get_disk_path(self, path, mtime):
+        key = "\0".join((
+            path, repr(mtime), repr(self._aggressive), self._tag_re.pattern))
+        return os.path.join(
+            self._cache_dir,
+            hashlib.sha1(key.encode("utf-8")).hexdigest() + ".html")
+
+    def _read_disk(self, disk_path):
+        try:
+            with io.open(disk_path, encoding="utf-8") as f:
+                return f.read()
+        except (IOError, OSError):
+            return None
+
+    def _write_disk(self, disk_path, minified):
+        tmp_path = "{}.{}.tmp".format(disk_path, os.getpid())
+        try:
+            if not os.path.isdir(self._cache_dir):
+                os.makedirs(self._cache_dir)
+            with io.open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(minified)
+            os.rename(tmp_path, disk_path)
+        except (IOError, OSError):  # cache is optional
+            pass
+
+    def minify(self, source, path=None):
+        """Return minified ``source`` of template file at ``path``.
+
+        Without ``path`` (or if file does not exist) nothing is cached.
+        """
+        try:
+            mtime = os.path.getmtime(path) if path else None
+        except OSError:
+            mtime = None
+        if mtime is None:
+            return self._minify(source)
+        path = os.path.abspath(path)
+        with self._lock:
+            cached = self._cache.get(path)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+        minified = None
+        if self._cache_dir is not None:
+            disk_path = self._get_disk_path(path, mtime)
+            minified = self._read_disk(disk_path)
+        if minified is None:
+            minified = self._minify(source)
+            if self._cache_dir is not None:
+                self._write_disk(disk_path, minified)
+        with self._lock:
+            self._cache[path] = (mtime, minified)
+        return minified
+
+    def minify_file(self, path):
+        """Read template file at ``path``, return its minified source."""
+        with self._lock:
+            cached = self._cache.get(os.path.abspath(path))
+        if cached is not None and cached[0] == os.path.getmtime(path):
+            return cached[1]  # without reading of file
+        with io.open(path, encoding=self._encoding) as f:
+            return self.minify(f.read(), path)
+
+
+class MinifyingLoader(object):
+    """Jinja2 loader minifying sources of templates of ``loader``."""
+
+    def __init__(self, loader, minifier=None):
+        self._loader = loader
+        self._minifier = minifier or TemplateMinifier()
+
+    @property
+    def has_source_access(self):
+        return getattr(self._loader, "has_source_access", True)
+
+    def get_source(self, environment, template):
+        source, filename, uptodate = self._loader.get_source(
+            environment, template)
+        return self._minifier.minify(source, filename), filename, uptodate
+
+    def list_templates(self):
+        return self._loader.list_templates()
+
+    def load(self, environment, name, globals=None):
+        import jinja2
+        return six.get_unbound_function(jinja2.BaseLoader.load)(
+            self, environment, name, globals)
@@ -0,0 +1,127 @@
+"""Rebuilding of bundles on changes of their inputs.
+
+Files are polled with ``os.stat`` (stdlib has no portable file system
+notifications). Bursts of changes (e.g. saving of many files) are
+debounced: rebuild starts after ``debounce`` seconds without changes.
+"""
+
+import os
+import sys
+import time
+import argparse
+
+from . import build
+
+
+def _stat(path):
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime, stat.st_size
+
+
+class Watcher(object):
+
+    def __init__(
+        self,
+        bundles,
+        jobs=1,
+        interval=0.2,
+        debounce=0.05,
+        sleep=time.sleep,
+    ):
+        self._bundles = list(bundles)
+        self._jobs = jobs
+        self._interval = interval
+        self._debounce = debounce
+        self._sleep = sleep
+        self._bundles_by_path = {}
+        for bundle in self._bundles:
+            for path in bundle.inputs + bundle.deps:
+                self._bundles_by_path.setdefault(
+                    os.path.abspath(path), []).append(bundle)
+        self._stats = dict(
+            (path, _stat(path)) for path in self._bundles_by_path)
+
+    def poll(self):
+        """Return set of paths changed since previous poll."""
+        changed = set()
+        for path, old_stat in self._stats.items():
+            stat = _stat(path)
+            if stat != old_stat:
+                self._stats[path] = stat
+                changed.add(path)
+        return changed
+
+    def wait(self):
+        """Wait for changes, return set of changed paths."""
+        changed = set()
+        while not changed:
+            self._sleep(self._interval)
+            changed = self.poll()
+        while True:
+            self._sleep(self._debounce)
+            more = self.poll()
+            if not more:
+                return changed
+            changed.update(more)
+
+    def get_affected(self, paths):
+        affected = set()
+        for path in paths:
+            affected.update(self._bundles_by_path.get(path, ()))
+        # Keep order of bundles.
+        return [bundle for bundle in self._bundles if bundle in affected]
+
+    def rebuild(self, paths):
+        for bundle in self._bundles:
+            for stage in bundle.stages:
+                invalidate = getattr(stage, "invalidate", None)
+                if invalidate:  # stage caches contents of files
+                    invalidate(paths)
+        bundles = self.get_affected(paths)
+        if bundles:
+            build.run(bundles, jobs=self._jobs)
+        return bundles
+
+    def run(self, build_first=True, log=sys.stderr.write):
+        if build_first:
+            build.run(self._bundles, jobs=self._jobs)
+        while True:
+            paths = self.wait()
+            start = time.time()
+            try:
+                bundles = self.rebuild(paths)
+            except Exception as exc:
+                log("build failed: {!r}\n".format(exc))
+                continue
+            log("rebuilt {} bundle(s) in {:.0f} ms\n".format(
+                len(bundles), (time.time() - start) * 1000))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "-j", "--jobs", type=int, default=1,
+        help="number of worker processes")
+    parser.add_argument(
+        "--interval", type=float, default=0.2,
+        help="seconds between polls of input files")
+    parser.add_argument(
+        "path", help="path to Python file defining list of bundles")
+    parser.add_argument(
+        "--name", default="bundles",
+        help="name of list of bundles in file")
+    args = parser.parse_args()
+    watcher = Watcher(
+        build.load_bundles(args.path, args.name),
+        jobs=args.jobs, interval=args.interval)
+    try:
+        watcher.run()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+from . import serving
+
+
+BLOCK_SIZE = 64 * 1024
+
+
+class _FileIter(object):
+
+    def __init__(self, f, block_size, length=None):
+        self._file = f
+        self._block_size = block_size
+        self._length = length
+
+    def __iter__(self):
+        remaining = self._length
+        while remaining is None or remaining > 0:
+            size = self._block_size
+            if remaining is not None:
+                size = min(size, remaining)
+                block = self._file.read(size)
+                remaining -= len(block)
+            else:
+                block = self._file.read(size)
+            if not block:
+                break
+            yield block
+
+    def close(self):
+        self._file.close()
+
+
+class StaticApp(serving.Responder):
+    """WSGI app serving files of registry types.
+
+    If ``app`` is given, requests to unknown paths are passed to it.
+    """
+
+    def __init__(self, registry, app=None, block_size=BLOCK_SIZE, **kwargs):
+        super(StaticApp, self).__init__(registry, **kwargs)
+        self._app = app
+        self._block_size = block_size
+
+    def __call__(self, environ, start_response):
+        url_path = environ.get("PATH_INFO", "")
+        response = self.respond(
+            url_path,
+            environ.get("REQUEST_METHOD", "GET"),
+            lambda name: environ.get(
+                "_".join(("HTTP", name.upper().replace("-", "_")))))
+        if response is None:
+            if self._app:
+                return self._app(environ, start_response)
+            response = self.error("404 Not Found")
+        if response.fs_path is None:
+            start_response(response.status, response.headers)
+            return [response.body] if response.body else []
+        try:
+            f = open(response.fs_path, "rb")
+        except (IOError, OSError):
+            self._forget_asset(url_path)
+            response = self.error("404 Not Found")
+            start_response(response.status, response.headers)
+            return [response.body]
+        start_response(response.status, response.headers)
+        if response.partial:
+            f.seek(response.offset)
+            return _FileIter(f, self._block_size, response.length)
+        file_wrapper = environ.get("wsgi.file_wrapper")
+        if file_wrapper:  # lets server use sendfile
+            return file_wrapper(f, self._block_size)
+        return _FileIter(f, self._block_size)
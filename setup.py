@@ -6,7 +6,7 @@ setuptools.setup(
     version="3.3.0",
     packages=setuptools.find_packages(),
     install_requires=["six", "markupsafe"],
-    extras_require={"testing": []},
+    extras_require={"testing": ["jinja2"]},
     include_package_data=True,
     namespace_packages=["paka"],
     zip_safe=False,
@@ -0,0 +1 @@
+var a = 1;
@@ -0,0 +1 @@
+var b = 2;
@@ -0,0 +1,17 @@
+import os
+
+from paka.webstatic import build, pipeline
+
+
+_DIR = os.path.dirname(os.path.abspath(__file__))
+_OUT_DIR = os.environ["BUILD_OUT_DIR"]
+
+bundles = [
+    build.Bundle(
+        [os.path.join(_DIR, name) for name in ("vendor.js", "a.js")],
+        (pipeline.JSMin(), pipeline.Concat()),
+        pipeline.Output(os.path.join(_OUT_DIR, "a.js"))),
+    build.Bundle(
+        [os.path.join(_DIR, name) for name in ("vendor.js", "b.js")],
+        (pipeline.JSMin(), pipeline.Concat()),
+        pipeline.Output(os.path.join(_OUT_DIR, "b.js")))]
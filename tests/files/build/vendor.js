@@ -0,0 +1,2 @@
+/* vendor */
+function  vendor ( ) { return 1; }
@@ -0,0 +1,34 @@
+// Code using eval and with must keep names visible to it.
+function evaluate(expression) {
+    var base = 40, extra = 2;
+    return eval(expression);
+}
+
+function withScope(object) {
+    var fallback = "fallback";
+    with (object) {
+        return typeof missing === "undefined" ? fallback : missing;
+    }
+}
+
+function outerOfEval(first) {
+    var kept = first * 2;
+    function helper(second) {
+        var local = second + 1;
+        return eval("kept + local");
+    }
+    function unrelated(third) {
+        var renamed = third * 3;
+        return renamed;
+    }
+    return [helper(1), unrelated(2)];
+}
+
+function indirect(value) {
+    var local = value + 1;
+    return window.eval === undefined ? local : 0;
+}
+
+var window = {};
+console.log(evaluate("base + extra"), withScope({}), withScope({missing: "found"}));
+console.log(JSON.stringify(outerOfEval(5)), indirect(1));
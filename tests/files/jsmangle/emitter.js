@@ -0,0 +1,70 @@
+/* Event emitter in module pattern. */
+var Emitter = (function () {
+    "use strict";
+
+    var slice = Array.prototype.slice;
+
+    function Emitter() {
+        this._listeners = {};
+    }
+
+    function getListeners(emitter, eventName) {
+        var listeners = emitter._listeners[eventName];
+        if (!listeners) {
+            listeners = emitter._listeners[eventName] = [];
+        }
+        return listeners;
+    }
+
+    Emitter.prototype.on = function (eventName, listener, context) {
+        getListeners(this, eventName).push({listener: listener, context: context});
+        return this;
+    };
+
+    Emitter.prototype.once = function (eventName, listener, context) {
+        var self = this;
+        function wrapper() {
+            self.off(eventName, wrapper);
+            return listener.apply(context, arguments);
+        }
+        return this.on(eventName, wrapper);
+    };
+
+    Emitter.prototype.off = function (eventName, listener) {
+        var listeners = getListeners(this, eventName), i;
+        for (i = listeners.length - 1; i >= 0; i--) {
+            if (listeners[i].listener === listener) {
+                listeners.splice(i, 1);
+            }
+        }
+        return this;
+    };
+
+    Emitter.prototype.emit = function (eventName) {
+        var args = slice.call(arguments, 1),
+            listeners = getListeners(this, eventName).slice(),
+            results = [],
+            index,
+            entry;
+        for (index = 0; index < listeners.length; index++) {
+            entry = listeners[index];
+            results.push(entry.listener.apply(entry.context, args));
+        }
+        return results;
+    };
+
+    return Emitter;
+}());
+
+var emitter = new Emitter();
+var counter = {count: 0};
+emitter.on("add", function (amount) {
+    this.count += amount;
+    return this.count;
+}, counter);
+emitter.once("add", function (amount) {
+    return "once " + amount;
+});
+console.log(JSON.stringify(emitter.emit("add", 2)));
+console.log(JSON.stringify(emitter.emit("add", 3)));
+console.log(counter.count);
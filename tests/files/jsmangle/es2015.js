@@ -0,0 +1,76 @@
+// Newer syntax mixed with functions that can be mangled.
+const PREFIX = "item";
+
+class Store {
+    constructor(items = []) {
+        this.items = items;
+    }
+
+    get size() {
+        return this.items.length;
+    }
+
+    add(name, {price = 0, tags = []} = {}) {
+        const item = {name, price, tags, id: PREFIX + this.size};
+        this.items.push(item);
+        return item;
+    }
+
+    static merge(...stores) {
+        return new Store([].concat(...stores.map((store) => store.items)));
+    }
+
+    *[Symbol.iterator]() {
+        yield* this.items;
+    }
+}
+
+function summarize(store, currency) {
+    var total = 0, names = [];
+    for (const {name, price} of store) {
+        total += price;
+        names.push(name);
+    }
+    let label = names.join(", ");
+    var describe = (amount) => amount.toFixed(2) + " " + currency;
+    var totalLabel = describe(total);
+    return {label, total: totalLabel, count: names.length};
+}
+
+function counterFactory(start) {
+    var value = start;
+    var api = {
+        increment(step) {
+            var next = value + (step || 1);
+            value = next;
+            return api;
+        },
+        get value() {
+            return value;
+        }
+    };
+    return api;
+}
+
+function shadowing(value) {
+    var result = [];
+    {
+        let value = "block";
+        result.push(value);
+    }
+    result.push(value);
+    var inner = function value2(n) {
+        return n ? value2(n - 1) + 1 : 0;
+    };
+    result.push(inner(3));
+    return result;
+}
+
+var first = new Store();
+first.add("apple", {price: 1.5, tags: ["fruit"]});
+first.add("bread", {price: 2});
+var second = new Store([{name: "milk", price: 0.99}]);
+var merged = Store.merge(first, second);
+console.log(JSON.stringify(summarize(merged, "EUR")));
+console.log(counterFactory(5).increment().increment(10).value);
+console.log(JSON.stringify(shadowing("param")), merged.size);
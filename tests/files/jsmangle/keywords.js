@@ -0,0 +1,23 @@
+// Keywords used as keys of object literals.
+function declared(value) {
+    var object = {var: value, other: 2, let: value * 3};
+    var counter = object.other + object.var;
+    return counter + object.let;
+}
+
+function nested(value) {
+    var object = {
+        function: value,
+        class: {if: value + 1, return: value + 2},
+        new: function (argument) { return argument * 2; }
+    };
+    return [object.function, object.class.if, object.class.return,
+            object.new(value)];
+}
+
+function wrapped(value) {
+    var object = {function: value};
+    return object.function;
+}
+
+console.log(wrapped(1), declared(1), JSON.stringify(nested(1)));
@@ -0,0 +1,97 @@
+// Assorted utilities, ES5.
+(function (root) {
+    var hasOwn = Object.prototype.hasOwnProperty,
+        templateRe = /\{(\w+)\}/g;
+
+    function format(template, values) {
+        return template.replace(templateRe, function (match, key) {
+            return hasOwn.call(values, key) ? String(values[key]) : match;
+        });
+    }
+
+    function merge(target) {
+        var i, source, key;
+        for (i = 1; i < arguments.length; i++) {
+            source = arguments[i];
+            for (key in source) {
+                if (!hasOwn.call(source, key)) continue;
+                if (typeof source[key] === "object" && source[key] !== null &&
+                        typeof target[key] === "object") {
+                    merge(target[key], source[key]);
+                } else {
+                    target[key] = source[key];
+                }
+            }
+        }
+        return target;
+    }
+
+    function memoize(func) {
+        var cache = {};
+        return function (arg) {
+            if (!(arg in cache)) {
+                cache[arg] = func(arg);
+            }
+            return cache[arg];
+        };
+    }
+
+    function classify(value) {
+        var result;
+        switch (typeof value) {
+        case "number":
+            result = value % 2 ? "odd" : "even";
+            break;
+        case "string":
+            result = value.length > 3 ? "long" : "short";
+            break;
+        default:
+            result = "other";
+        }
+        return result;
+    }
+
+    function findPair(numbers, total) {
+        var found = null;
+        outer:
+        for (var a = 0; a < numbers.length; a++) {
+            for (var b = a + 1; b < numbers.length; b++) {
+                if (numbers[a] + numbers[b] === total) {
+                    found = [numbers[a], numbers[b]];
+                    break outer;
+                }
+            }
+        }
+        return found;
+    }
+
+    function safeParse(text, fallback) {
+        try {
+            return JSON.parse(text);
+        } catch (error) {
+            return fallback === undefined ? error.name : fallback;
+        }
+    }
+
+    var ratio = 10 / 4 / 5, fib = memoize(function (n) {
+        return n < 2 ? n : fib(n - 1) + fib(n - 2);
+    })
+    var after = "asi";
+
+    root.utils = {
+        format: format,
+        merge: merge,
+        fib: fib,
+        classify: classify,
+        findPair: findPair,
+        safeParse: safeParse,
+        ratio: ratio,
+        after: after
+    };
+}(this || global));
+
+var u = (this || global).utils;
+console.log(u.format("{greeting}, {name}! {missing}", {greeting: "Hello", name: "World"}));
+console.log(JSON.stringify(u.merge({a: {b: 1}, c: 2}, {a: {d: 3}}, {e: 4})));
+console.log(u.fib(30), u.classify(3), u.classify("word"), u.classify(null));
+console.log(JSON.stringify(u.findPair([1, 4, 6, 9], 10)), u.safeParse("{"), u.ratio, u.after);
@@ -0,0 +1,79 @@
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+
+from testutils import TEST_FILES_DIR
+
+
+@unittest.skipIf(sys.version_info < (3, 5), "asyncio runner needs 3.5+")
+class RunAsyncTest(unittest.TestCase):
+
+    def setUp(self):
+        import asyncio
+        from concurrent.futures import ThreadPoolExecutor
+        from paka.webstatic import aiopipeline, pipeline
+        from paka.webstatic.manifest import Manifest
+        self.asyncio = asyncio
+        self.a = aiopipeline
+        self.p = pipeline
+        self.out_dir = tempfile.mkdtemp()
+        self.manifest = Manifest(os.path.join(self.out_dir, "manifest"))
+        self.executor = ThreadPoolExecutor(2)
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+
+    def tearDown(self):
+        self.loop.close()
+        self.asyncio.set_event_loop(None)
+        self.executor.shutdown()
+        shutil.rmtree(self.out_dir)
+
+    def pth(self, *args):
+        return os.path.join(TEST_FILES_DIR, "build", *args)
+
+    def mkpl(self, name):
+        return (
+            self.p.Input([self.pth("vendor.js"), self.pth(name)]),
+            self.p.JSMin(),
+            self.p.Concat(),
+            self.p.Replace({"1": "3"}),
+            self.p.Output(
+                os.path.join(self.out_dir, name), manifest=self.manifest))
+
+    def read(self, path):
+        with open(path, "rb") as f:
+            return f.read()
+
+    def test_run_async(self):
+        output = self.loop.run_until_complete(self.a.run_async(
+            self.mkpl("a.js"), executor=self.executor))
+        self.assertEqual(
+            self.read(output.path), b"function vendor(){return 3;}var a=3;")
+        self.assertEqual(
+            output.path, os.path.join(
+                self.out_dir, "a.{}.js".format(self.manifest["a.js"])))
+
+    def test_run_many_async(self):
+        outputs = self.loop.run_until_complete(self.a.run_many_async(
+            [self.mkpl(name) for name in ("a.js", "b.js")],
+            executor=self.executor))
+        self.assertEqual(
+            [self.read(output.path) for output in outputs],
+            [
+                b"function vendor(){return 3;}var a=3;",
+                b"function vendor(){return 3;}var b=2;"])
+        with open(self.manifest.fs_path) as f:
+            self.assertEqual(len(f.read().splitlines()), 2)
+
+    def test_same_as_run(self):
+        item = self.p.InputItem(path=None, data="a { color: #ffffff }")
+        pl = (item, self.p.CSSMin())
+        self.assertEqual(
+            self.loop.run_until_complete(self.a.run_async(pl)).data,
+            "a{color:#fff}")
+        self.assertRaises(
+            IOError,
+            lambda: self.loop.run_until_complete(self.a.run_async(
+                (self.p.Input([self.pth("missing.js")], lazy=True), ))))
@@ -0,0 +1,88 @@
+import os
+import sys
+import unittest
+
+from testutils import TEST_FILES_DIR
+
+
+@unittest.skipIf(sys.version_info < (3, 5), "asyncio server needs 3.5+")
+class StaticServerTest(unittest.TestCase):
+
+    def setUp(self):
+        import asyncio
+        from paka.webstatic import registry as r
+        from paka.webstatic import aioserver
+        self.asyncio = asyncio
+        fs_path = os.path.join(TEST_FILES_DIR, "wsgi")
+        self.registry = r.Registry(
+            url_path="/static/",
+            fs_path=fs_path,
+            types={
+                "css": r.CSSRType(url_path="c", fs_path="css", add_hash=True),
+                "f": r.FileRType(url_path="f", fs_path="f", add_hash=False)})
+        self.registry.load_manifest(data={
+            os.path.join(fs_path, "css/app.css"): "abcdef0123"})
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self.server = self.loop.run_until_complete(
+            aioserver.start_server(
+                self.registry, "127.0.0.1", 0, max_open_files=4))
+        self.port = self.server.sockets[0].getsockname()[1]
+
+    def tearDown(self):
+        self.server.close()
+        self.loop.run_until_complete(self.server.wait_closed())
+        self.loop.close()
+        self.asyncio.set_event_loop(None)
+
+    def connect(self, *requests):
+        reader, writer = self.loop.run_until_complete(
+            self.asyncio.open_connection("127.0.0.1", self.port))
+        writer.write(b"".join(requests))
+        return reader, writer
+
+    def run_fetch(self, *requests):
+        reader, writer = self.connect(*requests)
+        data = self.loop.run_until_complete(reader.read())
+        writer.close()
+        return data
+
+    def test_get(self):
+        data = self.run_fetch(
+            b"GET /static/c/app.abcdef.css HTTP/1.1\r\n"
+            b"Connection: close\r\n\r\n")
+        head, body = data.split(b"\r\n\r\n", 1)
+        lines = head.decode("latin-1").split("\r\n")
+        self.assertEqual(lines[0], "HTTP/1.1 200 OK")
+        self.assertIn(
+            "Cache-Control: public, max-age=31536000, immutable", lines)
+        self.assertIn("Content-Length: 15", lines)
+        self.assertIn("Connection: close", lines)
+        self.assertEqual(body, b"body{color:red}")
+
+    def test_keep_alive_and_range(self):
+        data = self.run_fetch(
+            b"GET /static/f/x.txt?v=1 HTTP/1.1\r\nRange: bytes=2-4\r\n\r\n",
+            b"HEAD /static/f/x.txt HTTP/1.1\r\n\r\n",
+            b"GET /static/f/missing.txt HTTP/1.0\r\n\r\n")
+        self.assertTrue(data.startswith(b"HTTP/1.1 206 Partial Content\r\n"))
+        first, second, third = data.split(b"HTTP/1.1 ")[1:]
+        self.assertTrue(first.endswith(b"\r\n\r\n234"))
+        self.assertTrue(second.startswith(b"200 OK\r\n"))
+        self.assertTrue(second.endswith(b"\r\n\r\n"))
+        self.assertTrue(third.startswith(b"404 Not Found\r\n"))
+
+    def test_bad_request(self):
+        data = self.run_fetch(b"nonsense\r\n\r\n")
+        self.assertTrue(data.startswith(b"HTTP/1.1 400 Bad Request\r\n"))
+
+    def test_many_concurrent_connections(self):
+        request = b"GET /static/f/x.txt HTTP/1.0\r\n\r\n"
+        connections = [self.connect(request) for _i in range(50)]
+        results = self.loop.run_until_complete(self.asyncio.gather(
+            *[reader.read() for reader, _writer in connections]))
+        for _reader, writer in connections:
+            writer.close()
+        for data in results:
+            self.assertTrue(data.startswith(b"HTTP/1.1 200 OK\r\n"))
+            self.assertTrue(data.endswith(b"\r\n\r\n0123456789"))
@@ -0,0 +1,159 @@
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+
+from testutils import TEST_FILES_DIR
+
+
+class BuildTest(unittest.TestCase):
+
+    def setUp(self):
+        from paka.webstatic import build, pipeline
+        self.b = build
+        self.p = pipeline
+        self.out_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.out_dir)
+
+    def pth(self, *args):
+        return os.path.abspath(os.path.join(TEST_FILES_DIR, "build", *args))
+
+    def read(self, name):
+        with open(os.path.join(self.out_dir, name), "rb") as f:
+            return f.read()
+
+    def mkbundles(self):
+        return [
+            self.b.Bundle(
+                [self.pth("vendor.js"), self.pth(name)],
+                (self.p.JSMin(), self.p.Concat()),
+                self.p.Output(os.path.join(self.out_dir, name)))
+            for name in ("a.js", "b.js")]
+
+    def check_outputs(self):
+        self.assertEqual(
+            self.read("a.js"), b"function vendor(){return 1;}var a=1;")
+        self.assertEqual(
+            self.read("b.js"), b"function vendor(){return 1;}var b=2;")
+
+    def test_shared_nodes(self):
+        graph = self.b.Graph(self.mkbundles())
+        # vendor.js is read and minified once.
+        self.assertEqual(len(graph), 8)
+        graph.add(self.b.Bundle(
+            [self.pth("a.js")], (self.p.Replace({"1": "2"}), ),
+            self.p.Output(os.path.join(self.out_dir, "c.js"))))
+        graph.add(self.b.Bundle(
+            [self.pth("a.js")], (self.p.Replace({"1": "2"}), ),
+            self.p.Output(os.path.join(self.out_dir, "d.js"))))
+        self.assertEqual(len(graph), 11)
+
+    def test_run(self):
+        outputs = self.b.run(self.mkbundles())
+        self.assertEqual(
+            [output.path for output in outputs],
+            [os.path.join(self.out_dir, name) for name in ("a.js", "b.js")])
+        self.check_outputs()
+
+    def test_run_in_parallel(self):
+        self.b.run(self.mkbundles(), jobs=2)
+        self.check_outputs()
+
+    def test_single_input(self):
+        self.b.run([self.b.Bundle(
+            [self.pth("a.js")], (),
+            self.p.Output(os.path.join(self.out_dir, "a.js")))])
+        self.assertEqual(self.read("a.js"), b"var a = 1;\n")
+        self.assertRaises(
+            ValueError,
+            lambda: self.b.Bundle(
+                [self.pth("a.js"), self.pth("b.js")], (), None))
+
+    def test_error(self):
+        bundles = [self.b.Bundle(
+            [self.pth("missing.js")], (self.p.JSMin(), ),
+            self.p.Output(os.path.join(self.out_dir, "a.js")))]
+        self.assertRaises(IOError, lambda: self.b.run(bundles))
+        self.assertRaises(IOError, lambda: self.b.run(bundles, jobs=2))
+
+    def test_shard(self):
+        bundles = [
+            self.b.Bundle(
+                [self.pth("a.js")], (),
+                self.p.Output(os.path.join(self.out_dir, "{}.js".format(i))))
+            for i in range(20)]
+        shards = [self.b.shard(bundles, i, 3) for i in range(3)]
+        self.assertEqual(
+            sorted(id(bundle) for bundles in shards for bundle in bundles),
+            sorted(id(bundle) for bundle in bundles))
+        self.assertTrue(all(shards))
+        self.assertEqual(self.b.shard(bundles, 1, 3), shards[1])
+        self.assertEqual(self.b.shard(bundles, 0, 1), bundles)
+        self.assertRaises(ValueError, lambda: self.b.shard(bundles, 3, 3))
+
+    def test_dev_builder(self):
+        src_path = os.path.join(self.out_dir, "src.js")
+        out_path = os.path.join(self.out_dir, "app.js")
+        with open(src_path, "w") as f:
+            f.write("var a = 1;")
+        os.utime(src_path, (0, 0))
+        calls = []
+
+        def count(input_):
+            calls.append(input_.data)
+            return input_
+        builder = self.b.DevBuilder([self.b.Bundle(
+            [self.pth("vendor.js"), src_path],
+            (self.p.JSMin(), self.p.Concat(), count),
+            self.p.Output(out_path))])
+        contents, etag = builder.get(out_path)
+        self.assertEqual(contents, b"function vendor(){return 1;}var a=1;")
+        self.assertEqual(builder.get(out_path), (contents, etag))
+        self.assertEqual(len(calls), 1)
+        self.assertFalse(os.path.exists(out_path))
+        with open(src_path, "w") as f:
+            f.write("var b = 1;")
+        os.utime(src_path, (1, 1))
+        new_contents, new_etag = builder.get(out_path)
+        self.assertEqual(new_contents, b"function vendor(){return 1;}var b=1;")
+        self.assertNotEqual(new_etag, etag)
+        self.assertEqual(len(calls), 2)
+        self.assertIn(out_path, builder)
+        self.assertIsNone(builder.get(src_path))
+        os.remove(src_path)
+        self.assertRaises(OSError, lambda: builder.get(out_path))
+
+    def test_dev_builder_import_changed(self):
+        src_path = os.path.join(self.out_dir, "src.css")
+        dep_path = os.path.join(self.out_dir, "dep.css")
+        out_path = os.path.join(self.out_dir, "app.css")
+        with open(src_path, "w") as f:
+            f.write("@import 'dep.css';b{}")
+        with open(dep_path, "w") as f:
+            f.write("a{color:red}")
+        os.utime(dep_path, (0, 0))
+        builder = self.b.DevBuilder([self.b.Bundle(
+            [src_path], (self.p.CSSImport(), ), self.p.Output(out_path),
+            deps=[dep_path])])
+        contents, etag = builder.get(out_path)
+        self.assertEqual(contents, b"a{color:red}b{}")
+        with open(dep_path, "w") as f:
+            f.write("a{color:blue}")
+        os.utime(dep_path, (1, 1))
+        new_contents, new_etag = builder.get(out_path)
+        self.assertEqual(new_contents, b"a{color:blue}b{}")
+        self.assertNotEqual(new_etag, etag)
+
+    def test_main(self):
+        argv = sys.argv
+        os.environ["BUILD_OUT_DIR"] = self.out_dir
+        sys.argv = ["build", "-j", "2", self.pth("bundles.py")]
+        try:
+            self.b.main()
+        finally:
+            sys.argv = argv
+            del os.environ["BUILD_OUT_DIR"]
+        self.check_outputs()
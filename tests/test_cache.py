@@ -0,0 +1,42 @@
+import unittest
+
+
+class LRUCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        from paka.webstatic.cache import LRUCache
+        self.cache = LRUCache(max_size=10, max_item_size=6)
+
+    def test_get_put(self):
+        self.assertIsNone(self.cache.get("a"))
+        self.assertTrue(self.cache.put("a", b"aaa", 3))
+        self.assertEqual(self.cache.get("a"), b"aaa")
+        self.assertEqual(self.cache.get("b", 42), 42)
+        self.assertEqual(
+            self.cache.stats(),
+            {
+                "items": 1, "size": 3, "max_size": 10, "hits": 1,
+                "misses": 2, "evictions": 0})
+
+    def test_too_big(self):
+        self.assertFalse(self.cache.put("a", b"a" * 7, 7))
+        self.assertEqual(len(self.cache), 0)
+
+    def test_eviction(self):
+        self.cache.put("a", b"aaaa", 4)
+        self.cache.put("b", b"bbbb", 4)
+        self.cache.get("a")  # now "b" is least recently used
+        self.cache.put("c", b"cccc", 4)
+        self.assertIsNone(self.cache.get("b"))
+        self.assertEqual(self.cache.get("a"), b"aaaa")
+        self.assertEqual(self.cache.get("c"), b"cccc")
+        self.assertEqual(self.cache.size, 8)
+        self.assertEqual(self.cache.evictions, 1)
+
+    def test_replace(self):
+        self.cache.put("a", b"aaaa", 4)
+        self.cache.put("a", b"aa", 2)
+        self.assertEqual(self.cache.size, 2)
+        self.assertEqual(len(self.cache), 1)
+        self.cache.clear()
+        self.assertEqual((self.cache.size, len(self.cache)), (0, 0))
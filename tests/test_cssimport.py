@@ -0,0 +1,87 @@
+import os
+import unittest
+
+from testutils import TEST_FILES_DIR
+
+
+class CSSImportTest(unittest.TestCase):
+
+    def setUp(self):
+        from paka.webstatic import cssimport
+        self.m = cssimport
+
+    def pth(self, *args):
+        return os.path.abspath(
+            os.path.join(TEST_FILES_DIR, "cssimport", *args))
+
+    def read(self, path):
+        with open(path, "rb") as f:
+            return f.read().decode("utf-8")
+
+    def test_no_imports(self):
+        css = "a { background: url(x.png); }"
+        self.assertEqual(self.m.inline_imports(css, self.pth("x.css")), css)
+
+    def test_inline(self):
+        path = self.pth("main.css")
+        self.assertEqual(
+            self.m.inline_imports(self.read(path), path),
+            (
+                "@import url(//example.com/remote.css);\n"
+                '@font-face { src: url("fonts/a.woff?#iefix"); }\n\n'
+                "* { margin: 0 0 0 0; }\n\n"
+                "@media print{a { color: red; }\n}\n"
+                '/* @import "missing.css"; */\n\n'
+                "body { background: url(img/bg.png); }\n"))
+
+    def test_remote_imports_are_hoisted(self):
+        path = self.pth("x.css")
+        self.assertEqual(
+            self.m.inline_imports(
+                '@charset "utf-8";\n'
+                '@import "remote/plain.css" print;\n'
+                "@import url(http://example.com/a.css) screen;\n"
+                "a{}\n",
+                path),
+            (
+                '@charset "utf-8";\n'
+                "@import url(//example.com/fonts.css) print;\n"
+                "@import url(http://example.com/a.css) screen;\n"
+                "@media print{\n.r { color: red; }\n}\n\n"
+                "a{}\n"))
+        self.assertEqual(
+            self.m.inline_imports('@import "remote/media.css";', path),
+            '@import "//example.com/wide.css" (min-width: 800px);\n\n')
+        self.assertEqual(
+            self.m.inline_imports(
+                '@import "remote/media.css" print;\n'
+                '@import "remote/nested.css" print;\n'
+                '@import "remote/plain.css";\n',
+                path),
+            (
+                '@import "remote/media.css" print;\n'
+                '@import "remote/nested.css" print;\n'
+                "@import url(//example.com/fonts.css);\n"
+                "\n\n\n.r { color: red; }\n\n"))
+
+    def test_cache_is_shared(self):
+        path = self.pth("main.css")
+        cache = {}
+        self.m.inline_imports(self.read(path), path, cache=cache)
+        self.assertEqual(
+            sorted(cache),
+            [
+                self.pth("base/fonts.css"),
+                self.pth("base/reset.css"),
+                self.pth("print.css")])
+        cache[self.pth("print.css")] = self.m.parse(
+            "b{}", os.path.dirname(path))
+        self.assertIn(
+            "@media print{b{}}",
+            self.m.inline_imports(self.read(path), path, cache=cache))
+
+    def test_cycle(self):
+        path = self.pth("cycle/a.css")
+        self.assertRaises(
+            self.m.ImportCycleError,
+            lambda: self.m.inline_imports(self.read(path), path))
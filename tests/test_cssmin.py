@@ -0,0 +1,157 @@
+import io
+import os
+import gzip
+import unittest
+
+from testutils import TEST_FILES_DIR
+
+
+def _gzip_size(s):
+    buf = io.BytesIO()
+    with gzip.GzipFile(fileobj=buf, mode="wb", mtime=0) as f:
+        f.write(s.encode("utf-8"))
+    return len(buf.getvalue())
+
+
+class StructuralCSSMinTest(unittest.TestCase):
+
+    def setUp(self):
+        from paka.webstatic.cssmin import cssmin
+        self.func = cssmin
+
+    def check(self, input_, expected):
+        self.assertEqual(self.func(input_, structural=True), expected)
+
+    def test_merge_same_selectors(self):
+        self.check("a { x: 1 } a { y: 2; x: 1 }", "a{y:2;x:1}")
+
+    def test_merge_same_declarations(self):
+        self.check("a { x: 1 } b { x: 1 } c { y: 1 }", "a,b{x:1}c{y:1}")
+        self.check(
+            "a::-moz-selection { x: 1 } a::selection { x: 1 }",
+            "a::-moz-selection{x:1}a::selection{x:1}")
+        self.check(
+            "a { x: 1 } a:focus-visible { x: 1 } a:hover { x: 1 }",
+            "a{x:1}a:focus-visible{x:1}a:hover{x:1}")
+        self.check(
+            "ul > li.x:first-child, a[href='#'] { x: 1 } #y:before { x: 1 }",
+            "ul>li.x:first-child,a[href='#'],#y:before{x:1}")
+        self.check(
+            "a:not(.x) { x: 1 } a[href^=http] { x: 1 } a ~ b { x: 1 }",
+            "a:not(.x){x:1}a[href^=http]{x:1}a ~ b{x:1}")
+
+    def test_only_adjacent_rules_are_merged(self):
+        self.check("a { x: 1 } b { y: 1 } a { z: 1 }", "a{x:1}b{y:1}a{z:1}")
+
+    def test_duplicate_declarations(self):
+        self.check(
+            "a { display: -webkit-box; display: flex; display: flex }",
+            "a{display:-webkit-box;display:flex}")
+
+    def test_longhands(self):
+        self.check(
+            "a { margin-top: 1px; color: red; margin-right: 2px; "
+            "margin-bottom: 1px; margin-left: 2px }",
+            "a{margin:1px 2px;color:red}")
+        self.check(
+            "a { padding-top: 1px; padding-right: 1px; padding-bottom: 1px }",
+            "a{padding-top:1px;padding-right:1px;padding-bottom:1px}")
+        self.check(
+            "a { margin-top: 1px; margin-right: 1px; margin-bottom: 1px; "
+            "margin-left: 1px !important }",
+            "a{margin-top:1px;margin-right:1px;margin-bottom:1px;"
+            "margin-left:1px!important}")
+        self.check(
+            "a { margin-top: inherit; margin-right: 1px; "
+            "margin-bottom: 1px; margin-left: 1px }",
+            "a{margin-top:inherit;margin-right:1px;margin-bottom:1px;"
+            "margin-left:1px}")
+        self.check(
+            "a { padding-top: 1px; padding-right: unset; "
+            "padding-bottom: 1px; padding-left: UNSET }",
+            "a{padding-top:1px;padding-right:unset;padding-bottom:1px;"
+            "padding-left:UNSET}")
+
+    def test_four_values(self):
+        self.check("a { padding: 1px 2px 3px 2px }", "a{padding:1px 2px 3px}")
+        self.check("a { border-color: red blue red blue }", "a{border-color:red blue}")
+
+    def test_colors_and_numbers(self):
+        self.check(
+            "#fff { color: #ff0000; background: url(white.png) white; "
+            "border: 1px solid black; width: 10.50px; opacity: 0.50 }",
+            "#fff{color:red;background:url(white.png) #fff;"
+            "border:1px solid #000;width:10.5px;opacity:.5}")
+
+    def test_values_left_alone(self):
+        self.check(
+            ".x { font-family: Arial Black; content: \"white 1.50\"; "
+            "--c: white; color: var(--white) }",
+            ".x{font-family:Arial Black;content:\"white 1.50\";--c:white;"
+            "color:var(--white)}")
+
+    def test_at_rules(self):
+        self.check(
+            "@media screen { a { x: 1 } a { y: 1.0 } } "
+            "@font-face { font-family: A; src: url(a.woff) } "
+            "@font-face { font-family: A; src: url(a.woff) }",
+            "@media screen{a{x:1;y:1}}"
+            "@font-face{font-family:A;src:url(a.woff)}"
+            "@font-face{font-family:A;src:url(a.woff)}")
+
+    def test_is_opt_in(self):
+        self.assertEqual(self.func("a{x:1}b{x:1}"), "a{x:1}b{x:1}")
+
+    def test_corpus_size(self):
+        with open(os.path.join(TEST_FILES_DIR, "cssmin", "corpus.css")) as f:
+            css = f.read()
+        lexical = self.func(css)
+        structural = self.func(css, structural=True)
+        self.assertLess(len(structural), len(lexical))
+        self.assertLess(_gzip_size(structural), _gzip_size(lexical))
+
+
+class ParallelCSSMinTest(unittest.TestCase):
+
+    def setUp(self):
+        from paka.webstatic import cssmin
+        self.mod = cssmin
+        with open(os.path.join(TEST_FILES_DIR, "cssmin", "corpus.css")) as f:
+            self.corpus = f.read()
+
+    def check_chunks(self, css):
+        serial = self.mod._cssmin_lexical(css)
+        for chunk_size in (1, 10, 100, 1000):
+            chunks = self.mod.split_rules(css, chunk_size)
+            self.assertEqual("".join(chunks[:1] + [
+                chunk[1:] for chunk in chunks[1:]]), css)
+            self.assertEqual(
+                self.mod._join_chunks(
+                    [self.mod._cssmin_lexical(chunk) for chunk in chunks]),
+                serial)
+
+    def test_chunks_of_corpus(self):
+        self.check_chunks(self.corpus)
+
+    def test_chunks_of_tricky_css(self):
+        self.check_chunks(
+            "a { content: \"}\" } b { x: url(a}b.png) } "
+            "@media screen { c { x: 1 } d { y: 2 } } "
+            "/* e { } */ f :hover { x: 0 0 0 0 } g { color: rgb(1, 2, 3) }"
+            " @supports (display: grid) { h { display: grid } } i{x:1}")
+
+    def test_no_splitting_inside_blocks(self):
+        css = "a { x: 1 } @media screen { b { y: 2 } c { z: 3 } } d { }"
+        self.assertEqual(
+            self.mod.split_rules(css, 1),
+            ["a { x: 1 }", "} @media screen { b { y: 2 } c { z: 3 } } d { }"])
+
+    def test_same_result(self):
+        css = self.corpus * (
+            2 * self.mod.MIN_CHUNK_SIZE // len(self.corpus) + 1)
+        self.assertEqual(self.mod.cssmin(css, jobs=2), self.mod.cssmin(css))
+
+    def test_charset(self):
+        css = "@charset \"utf-8\";" + self.corpus * (
+            2 * self.mod.MIN_CHUNK_SIZE // len(self.corpus) + 1)
+        self.assertEqual(self.mod.cssmin(css, jobs=2), self.mod.cssmin(css))
@@ -2,9 +2,13 @@
 
 from __future__ import unicode_literals
 
+import io
+import os
 import unittest
 import contextlib
 
+from testutils import TEST_FILES_DIR
+
 
 class HTMLMinTest(unittest.TestCase):
     maxDiff = None
@@ -123,3 +127,68 @@ Hello!
 </code></pre></body>"""
         self.check(input_, expected)
         self.check(input_ * 2, expected * 2)
+
+
+class AggressiveHTMLMinTest(unittest.TestCase):
+
+    def setUp(self):
+        from paka.webstatic.htmlmin import htmlmin
+        self.func = htmlmin
+
+    def check(self, input_, expected):
+        self.assertEqual(self.func(input_, aggressive=True), expected)
+
+    def test_text(self):
+        self.check(
+            """<ol some="thing"> <li>Item 1</li><li>Item 2</li>
+<li class="other"> Item   3
+</li>
+ </ol>
+""",
+            "<ol some=thing><li>Item 1</li><li>Item 2</li>"
+            "<li class=other>Item 3</li></ol>")
+        self.check(
+            "<p> Some  <b>bold</b>\n text <!-- c --> here </p>",
+            "<p>Some <b>bold</b> text here</p>")
+        self.check(
+            "<p><b>b</b> <i>c</i>\n<span>d</span></p>\n<div> <a>x</a> </div>",
+            "<p><b>b</b> <i>c</i> <span>d</span></p><div><a>x</a></div>")
+
+    def test_attributes(self):
+        self.check(
+            """<input type="checkbox" checked="checked" DISABLED="" """
+            """value="" data-x='a"b' title="a b" readonly="false">""",
+            """<input type=checkbox checked DISABLED value="" data-x='a"b' """
+            """title="a b" readonly=false>""")
+        self.check('<img src="a.png" />', '<img src="a.png"/>')
+        self.check('<img src="a.png" alt />', '<img src=a.png alt/>')
+
+    def test_default_types(self):
+        self.check(
+            '<script type="text/javascript" src="a.js"></script>'
+            '<style type="text/css">a  { }</style>'
+            '<script type="module"> x </script>',
+            "<script src=a.js></script><style>a  { }</style>"
+            "<script type=module> x </script>")
+
+    def test_comments(self):
+        self.check(
+            "<p>a</p><!-- comment -->\n<!--[if IE]><p>b</p><![endif]-->",
+            "<p>a</p><!--[if IE]><p>b</p><![endif]-->")
+
+    def test_verbatim_content(self):
+        for input_ in (
+                '<pre class="x">  a  <b class="y">b</b>\n\n c </pre>',
+                "<textarea>  a  </textarea>",
+                "<title> a  <b> </title>",
+                "<script>  if (a <b) { }  </script>"):
+            self.check(input_, input_)
+
+    def test_corpus_size(self):
+        path = os.path.join(TEST_FILES_DIR, "htmlmin", "corpus.html")
+        with io.open(path, encoding="utf-8") as f:
+            html = f.read()
+        default = self.func(html)
+        aggressive = self.func(html, aggressive=True)
+        self.assertLess(len(aggressive), len(default))
+        self.assertIn("  Keep\n    this   text  ", aggressive)
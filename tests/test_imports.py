@@ -0,0 +1,52 @@
+import os
+import subprocess
+import sys
+import unittest
+
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MINIFIERS = frozenset((
+    "paka.webstatic.cssmin", "paka.webstatic.jsmin",
+    "paka.webstatic.jsmangle", "paka.webstatic.htmlmin"))
+
+
+def _import_times(module):
+    """Return mapping of imported module names to self times (in us)."""
+    code = "import sys; sys.path.insert(0, {!r}); import {}".format(
+        ROOT_DIR, module)
+    output = subprocess.check_output(
+        [sys.executable, "-X", "importtime", "-c", code],
+        stderr=subprocess.STDOUT, universal_newlines=True)
+    times = {}
+    for line in output.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        self_time, _, name = line[len("import time:"):].split("|")
+        if self_time.strip().isdigit():
+            times[name.strip()] = int(self_time)
+    return times
+
+
+@unittest.skipIf(
+    sys.version_info < (3, 7), "-X importtime needs Python 3.7+")
+class ImportTimeTest(unittest.TestCase):
+
+    def check(self, module):
+        _import_times(module)  # compile modules first
+        times = _import_times(module)
+        self.assertIn(module, times)
+        self.assertFalse(MINIFIERS.intersection(times))
+        own = sum(
+            time for name, time in times.items()
+            if name.startswith("paka.webstatic"))
+        self.assertLess(own, 100000)
+
+    def test_pipeline(self):
+        self.check("paka.webstatic.pipeline")
+
+    def test_registry(self):
+        self.check("paka.webstatic.registry")
+
+    def test_cssmin(self):
+        self.assertNotIn(
+            "multiprocessing", _import_times("paka.webstatic.cssmin"))
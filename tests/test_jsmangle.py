@@ -0,0 +1,114 @@
+import os
+import subprocess
+import unittest
+
+from testutils import TEST_FILES_DIR
+
+
+SCRIPTS_DIR = os.path.join(TEST_FILES_DIR, "jsmangle")
+
+
+def _run_node(js):
+    try:
+        proc = subprocess.Popen(
+            ["node", "-e", js], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    except OSError:
+        return None
+    out, err = proc.communicate()
+    if proc.returncode:
+        raise AssertionError(err.decode("utf-8"))
+    return out.decode("utf-8")
+
+
+class MangleTest(unittest.TestCase):
+
+    def setUp(self):
+        from paka.webstatic.jsmangle import mangle
+        self.func = mangle
+
+    def check(self, input_, expected):
+        self.assertEqual(self.func(input_), expected)
+
+    def test_params_and_vars(self):
+        self.check(
+            "function f(first, second) { var third = first; "
+            "return third + second + third; }",
+            "function f(b, c) { var a = b; return a + c + a; }")
+
+    def test_globals_and_properties(self):
+        self.check(
+            "var top = 1; function f(x) { return x.top + top + window.x; }",
+            "var top = 1; function f(a) { return a.top + top + window.x; }")
+
+    def test_closures(self):
+        self.check(
+            "function f(x) { return function (y) { return x + y; }; }",
+            "function f(a) { return function (b) { return a + b; }; }")
+
+    def test_no_reuse_of_kept_names(self):
+        self.check(
+            "function f(x) { return a + x; }",
+            "function f(b) { return a + b; }")
+
+    def test_object_literals(self):
+        self.check(
+            "function f(x, y) { return {x: y, get y() {}, z() {}}; }",
+            "function f(b, a) { return {x: a, get y() {}, z() {}}; }")
+        js = "function f(x, y) { return {x, y() {}}; }"
+        self.check(js, js)
+
+    def test_eval_and_with(self):
+        for js in (
+                "function f(x) { var y = 1; return eval('x + y'); }",
+                "function f(x) { with (x) { return y; } }",
+                "function f(x) { function g(y) { eval(''); } }"):
+            self.check(js, js)
+        self.check(
+            "function f(x) { return x.eval('1'); }",
+            "function f(a) { return a.eval('1'); }")
+
+    def test_block_scoped(self):
+        js = (
+            "function f(x) { function g() { { let x = 2; } return x; } "
+            "try {} catch (x) {} const [y] = x; return g; }")
+        self.check(js, js.replace("g", "a"))
+
+    def test_strings_regexes_templates(self):
+        self.check(
+            "function f(x) { return 'x' + /x/.source + `x${x}` + x / 2; }",
+            "function f(a) { return 'x' + /x/.source + `x${a}` + a / 2; }")
+
+
+class DifferentialTest(unittest.TestCase):
+    """Check mangling of real-world scripts against plain minification."""
+
+    def setUp(self):
+        from paka.webstatic import jsmangle, jsmin
+        self.jsmangle = jsmangle
+        self.jsmin = jsmin.jsmin
+
+    def get_scripts(self):
+        for name in sorted(os.listdir(SCRIPTS_DIR)):
+            with open(os.path.join(SCRIPTS_DIR, name), "rb") as f:
+                js = f.read().decode("utf-8")
+            yield name, self.jsmin(js), self.jsmin(self.jsmangle.mangle(js))
+
+    def test_only_local_names_differ(self):
+        tokenize = self.jsmangle.tokenize
+        for name, minified, mangled in self.get_scripts():
+            tokens = [t for t in tokenize(minified) if t[0] != "ws"]
+            mangled_tokens = [t for t in tokenize(mangled) if t[0] != "ws"]
+            self.assertEqual(len(tokens), len(mangled_tokens), name)
+            self.assertLess(len(mangled), len(minified), name)
+            prev = None
+            for token, mangled_token in zip(tokens, mangled_tokens):
+                if token[0] != "name" or prev in (".", "?."):
+                    self.assertEqual(token, mangled_token, name)
+                prev = token[1]
+
+    def test_same_output(self):
+        for name, minified, mangled in self.get_scripts():
+            expected = _run_node(minified)
+            if expected is None:
+                self.skipTest("node is not available")
+            self.assertEqual(_run_node(mangled), expected, name)
@@ -1,4 +1,7 @@
 import io
+import os
+import shutil
+import tempfile
 import unittest
 
 
@@ -57,3 +60,80 @@ class ManifestTest(unittest.TestCase):
         manifest = self.mkmanifest()
         manifest["/root/def"] = "abc"
         self.assertEqual(manifest.dumps(), "abc  def")
+
+
+class ManifestSnapshotTest(unittest.TestCase):
+
+    def setUp(self):
+        from paka.webstatic.manifest import Manifest
+        self.manifest = Manifest("/root/manifest", hash_length=3)
+        self.manifest.loads(
+            "abcdef  def/obj\nghijkl  jkl/mn\n123456  a\n789  \u0436/z.js")
+        self.snapshot = self.manifest.snapshot()
+
+    def test_same_as_manifest(self):
+        names = ("def/obj", "/root/def/obj", "jkl/mn", "a", "\u0436/z.js")
+        for name in names:
+            self.assertEqual(self.snapshot[name], self.manifest[name])
+        self.assertEqual(self.snapshot["/root/jkl/mn"], "ghi")
+        self.assertEqual(len(self.snapshot), 4)
+
+    def test_missing(self):
+        for name in ("/def/obj", "def", "b", "z", ""):
+            self.assertRaises(KeyError, lambda: self.snapshot[name])
+
+    def test_is_immutable_copy(self):
+        self.manifest["def/obj"] = "xyz"
+        self.assertEqual(self.snapshot["def/obj"], "abc")
+
+        def set_item():
+            self.snapshot["a"] = "b"
+        self.assertRaises(TypeError, set_item)
+
+    def test_empty(self):
+        from paka.webstatic.manifest import Manifest
+        snapshot = Manifest("/root/manifest").snapshot()
+        self.assertEqual(len(snapshot), 0)
+        self.assertRaises(KeyError, lambda: snapshot["a"])
+
+
+class ManifestMergeTest(unittest.TestCase):
+
+    def setUp(self):
+        from paka.webstatic import manifest
+        self.m = manifest
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def mkmanifest(self, fs_path, text):
+        manifest = self.m.Manifest(fs_path)
+        manifest.loads(text)
+        return manifest
+
+    def test_update(self):
+        manifest = self.mkmanifest("/root/manifest", "abc  a.js\nghi  b.js")
+        manifest.update(self.mkmanifest(
+            "/root/node/manifest", "abc  ../a.js\ndef  c.js"))
+        self.assertEqual(
+            manifest.dumps(), "abc  a.js\nghi  b.js\ndef  node/c.js")
+
+    def test_conflict(self):
+        manifest = self.mkmanifest("/root/manifest", "abc  a.js\nghi  b.js")
+        with self.assertRaises(self.m.ManifestConflictError) as ctx:
+            manifest.update(self.mkmanifest(
+                "/root/manifest", "xyz  b.js\nxyz  c.js\nxyz  a.js"))
+        self.assertIn("a.js, b.js", str(ctx.exception))
+        self.assertEqual(manifest.dumps(), "abc  a.js\nghi  b.js")
+
+    def test_merge(self):
+        paths = []
+        for i, text in enumerate(("bcd  z.css\nabc  a.js", "def  b.js")):
+            paths.append(os.path.join(self.tmp_dir, "manifest{}".format(i)))
+            with open(paths[-1], "w") as f:
+                f.write(text)
+        out_path = os.path.join(self.tmp_dir, "manifest")
+        self.m.merge(out_path, paths).save()
+        with open(out_path) as f:
+            self.assertEqual(f.read(), "abc  a.js\ndef  b.js\nbcd  z.css")
@@ -0,0 +1,51 @@
+import unittest
+
+
+class MetricsTest(unittest.TestCase):
+
+    def setUp(self):
+        from paka.webstatic.metrics import Metrics
+        self.metrics = Metrics(buckets=(0.5, 0.1))
+
+    def fill(self):
+        self.metrics.inc("lookups", ("css", ))
+        self.metrics.inc("lookups", ("css", ), 2)
+        self.metrics.inc("manifest_misses", ("j\"s", ))
+        for value in (0.05, 0.2, 3):
+            self.metrics.observe("call_seconds", ("css", "html"), value)
+
+    def test_as_dict(self):
+        self.fill()
+        self.assertEqual(
+            self.metrics.as_dict(),
+            {
+                "lookups": {"css": 3},
+                "manifest_misses": {"j\"s": 1},
+                "call_seconds": {
+                    "css.html": {
+                        "count": 3,
+                        "sum": 3.25,
+                        "buckets": {0.1: 1, 0.5: 2}}}})
+        self.metrics.clear()
+        self.assertEqual(self.metrics.as_dict(), {})
+
+    def test_to_prometheus(self):
+        self.fill()
+        self.assertEqual(
+            self.metrics.to_prometheus().splitlines(),
+            [
+                "# TYPE paka_webstatic_lookups_total counter",
+                "paka_webstatic_lookups_total{rtype=\"css\"} 3",
+                "# TYPE paka_webstatic_manifest_misses_total counter",
+                "paka_webstatic_manifest_misses_total{rtype=\"j\\\"s\"} 1",
+                "# TYPE paka_webstatic_call_seconds histogram",
+                "paka_webstatic_call_seconds_bucket"
+                "{rtype=\"css\",method=\"html\",le=\"0.1\"} 1",
+                "paka_webstatic_call_seconds_bucket"
+                "{rtype=\"css\",method=\"html\",le=\"0.5\"} 2",
+                "paka_webstatic_call_seconds_bucket"
+                "{rtype=\"css\",method=\"html\",le=\"+Inf\"} 3",
+                "paka_webstatic_call_seconds_sum"
+                "{rtype=\"css\",method=\"html\"} 3.25",
+                "paka_webstatic_call_seconds_count"
+                "{rtype=\"css\",method=\"html\"} 3"])
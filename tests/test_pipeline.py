@@ -208,6 +208,63 @@ class PipelineTest(unittest.TestCase):
             out_b = f.read()
         self.assertEqual(out_b, in_b)
 
+    def test_lazy_concat(self):
+        in_paths = [self.pth("concat/in-1.css"), self.pth("concat/in-2.css")]
+        out_path = self.pth("concat/out.css")
+        seen = []
+
+        def record(data):
+            seen.append(data)
+            return data
+        input_ = self.p.Input(in_paths + [self.pth("missing.css")], lazy=True)
+        self.p.run((input_, self.p.Replace({"a": "b"})))
+        input_.map_over_data(record)
+        self.assertEqual(seen, [])  # nothing is read yet
+        output = self.p.run((input_, self.p.Concat()))
+        self.assertEqual(seen, [])
+        self.assertRaises(IOError, lambda: output.data)
+        self.assertEqual(len(seen), 2)
+        output = self.p.run((
+            self.p.Input(in_paths, lazy=True),
+            self.p.Replace({"a": "b"}),
+            self.p.Concat(),
+            self.p.Output(out_path),
+        ))
+        with open(out_path) as f:
+            self.assertEqual(output.data, f.read())
+        self.assertEqual(output.data, "".join(seen))
+
+    def test_data_is_released(self):
+        items = [
+            self.p.InputItem(path=None, data=data) for data in ("a", "b")]
+        output = self.p.Concat()(self.p.Input.from_items(items))
+        self.assertEqual(output.data, "ab")
+        self.assertEqual([item.data for item in items], [None, None])
+        self.assertFalse(hasattr(output, "__dict__"))
+        out_path = self.tmp()
+        result = self.p.Output(out_path)(output)
+        self.assertIsNone(output.data)
+        self.assertEqual(result.path, out_path)
+        self.assertEqual(result.data, "ab")
+
+    def test_chunked_output(self):
+        from paka.webstatic.manifest import Manifest
+        out_path = self.pth("concat", "out-chunked.css")
+        manifest = Manifest(self.tmp())
+        output = self.p.run((
+            self.p.Input.from_items(
+                (self.p.InputItem(path=None, data=data) for data in "ab"),
+                lazy=True),
+            self.p.Concat(),
+            self.p.Output(out_path, manifest=manifest),
+        ))
+        self.assertEqual(
+            output.path, self.pth("concat", "out-chunked.da2361.css"))
+        self.assertEqual(output.data, "ab")
+        self.assertEqual(
+            sorted(os.listdir(self.pth("concat"))),
+            ["in-1.css", "in-2.css", "out-chunked.da2361.css"])
+
     def test_cssmin(self):
         output = self.p.run((
             self.p.InputItem(
@@ -237,6 +294,16 @@ class PipelineTest(unittest.TestCase):
             "function(){return 1;}",
         )
 
+    def test_jsmin_mangle(self):
+        output = self.p.run((
+            self.p.InputItem(
+                path=None,
+                data="function f(first, second) { return first + second; }",
+            ),
+            self.p.JSMin(mangle=True),
+        ))
+        self.assertEqual(output.data, "function f(a,b){return a+b;}")
+
     def test_replace(self):
         output = self.p.run((
             self.p.InputItem(
@@ -257,3 +324,115 @@ class PipelineTest(unittest.TestCase):
                 "Really, do something with this thing!"
             ),
         )
+
+    def test_cssimport(self):
+        in_path = os.path.join(TEST_FILES_DIR, "cssimport", "main.css")
+        output = self.p.run((
+            self.p.Input([in_path]),
+            self.p.CSSImport(),
+            self.p.Concat(),
+            self.p.CSSMin(),
+        ))
+        self.assertEqual(
+            output.data,
+            (
+                "@import url(//example.com/remote.css);"
+                '@font-face{src:url("fonts/a.woff?#iefix")}'
+                "*{margin:0 0 0 0}@media print{a{color:red}}"
+                "body{background:url(img/bg.png)}"))
+
+    def test_css_hash_urls(self):
+        from paka.webstatic.manifest import Manifest
+        manifest = Manifest(self.tmp(), hash_length=4)
+        manifest[self.pth("css_hash_urls/img/a.png")] = "abcdef"
+        in_path = self.pth("css_hash_urls/in.css")
+        output = self.p.run((
+            self.p.Input([in_path]),
+            self.p.CSSHashURLs(manifest, hash_missing=True),
+            self.p.Concat(),
+        ))
+        self.assertEqual(
+            output.data,
+            (
+                '.a { background: url("img/a.abcd.png"); }\n'
+                ".b { background: url(img/b.e9d7.png?v=1); }\n"
+                ".c { background: url(img/missing.png); }\n"
+                ".d { background: url(data:image/png;base64,AAAA); }\n"))
+        self.assertEqual(manifest[self.pth("css_hash_urls/img/b.png")], "e9d7")
+
+    def test_css_hash_url(self):
+        from paka.webstatic.manifest import Manifest
+        manifest = Manifest(self.tmp(), hash_length=4)
+        stage = self.p.CSSHashURLs(manifest, hash_missing=True)
+        base_dir = self.pth("css_hash_urls")
+        self.assertEqual(
+            stage.hash_url(base_dir, "img/b.png#x"), "img/b.e9d7.png#x")
+        self.assertIsNone(stage.hash_url(base_dir, "img/missing.png"))
+
+    def test_css_hash_urls_without_hashing_missing(self):
+        from paka.webstatic.manifest import Manifest
+        manifest = Manifest(self.tmp())
+        output = self.p.run((
+            self.p.InputItem(
+                path=self.pth("css_hash_urls/in.css"),
+                data="a{background:url(img/b.png)}"),
+            self.p.CSSHashURLs(manifest),
+        ))
+        self.assertEqual(output.data, "a{background:url(img/b.png)}")
+        self.assertRaises(
+            KeyError,
+            lambda: manifest[self.pth("css_hash_urls/img/b.png")])
+
+    def test_css_data_uris(self):
+        from paka.webstatic.manifest import Manifest
+        manifest = Manifest(self.tmp(), hash_length=4)
+        cache = {}
+        output = self.p.run((
+            self.p.InputItem(self.pth("css_data_uris/in.css")),
+            self.p.CSSDataURIs(
+                max_size=10,
+                hash_urls=self.p.CSSHashURLs(manifest, hash_missing=True),
+                cache=cache),
+        ))
+        self.assertEqual(
+            output.data,
+            (
+                ".a{background:url(data:image/png;base64,YQ==)}\n"
+                '.b{src:url("big.32d1.woff2")}\n'
+                ".c{background:url(small.86f7.png#x)}\n"
+                ".d{background:url(small.da39.unknownext)}\n"))
+        self.assertEqual(
+            cache,
+            {
+                self.pth("css_data_uris/small.png"): (
+                    "data:image/png;base64,YQ=="),
+                self.pth("css_data_uris/big.woff2"): None,
+                self.pth("css_data_uris/small.unknownext"): None})
+
+    def test_css_data_uris_without_hashing(self):
+        output = self.p.run((
+            self.p.InputItem(self.pth("css_data_uris/in.css")),
+            self.p.CSSDataURIs(max_size=100),
+        ))
+        self.assertEqual(
+            output.data,
+            (
+                ".a{background:url(data:image/png;base64,YQ==)}\n"
+                '.b{src:url("data:font/woff2;base64,'
+                'YWJjZGVmZ2hpamtsbW5vcHFyc3R1dnd4eXo=")}\n'
+                ".c{background:url(small.png#x)}\n"
+                ".d{background:url(small.unknownext)}\n"))
+
+    def test_replace_overlapping_keys(self):
+        output = self.p.run((
+            self.p.InputItem(path=None, data="A AB ABC B BA"),
+            self.p.Replace({"A": "B", "AB": "x", "B": "A", "": "-"}),
+        ))
+        self.assertEqual(output.data, "B x xC A AB")
+
+    def test_replace_nothing(self):
+        output = self.p.run((
+            self.p.InputItem(path=None, data="data"),
+            self.p.Replace({}),
+        ))
+        self.assertEqual(output.data, "data")
@@ -1,4 +1,6 @@
 import os
+import shutil
+import tempfile
 import unittest
 
 from testutils import TEST_FILES_DIR
@@ -236,9 +238,15 @@ class RegistryTest(unittest.TestCase):
             """<script src="/static/j/script&gt;s.js" defer></script>"""
         )
         self.assertEqual(
-            reg.js("script>s.js", async=True).html,
+            reg.js("script>s.js", async_=True).html,
             """<script src="/static/j/script&gt;s.js" async></script>"""
         )
+        self.assertEqual(
+            reg.js("script>s.js", **{"async": True}).html,
+            """<script src="/static/j/script&gt;s.js" async></script>"""
+        )
+        self.assertRaises(
+            TypeError, lambda: reg.js("script>s.js", sync=True).html)
 
     def test_js_rtype_with_manifest(self):
         from paka.webstatic.registry import JSRType
@@ -277,7 +285,7 @@ class RegistryTest(unittest.TestCase):
             """<script src="/static/j/script&gt;s.deadbe.js" defer></script>"""
         )
         self.assertEqual(
-            reg.js("script>s.js", async=True).html,
+            reg.js("script>s.js", async_=True).html,
             """<script src="/static/j/script&gt;s.deadbe.js" async></script>"""
         )
         self.assertEqual(
@@ -314,3 +322,215 @@ class RegistryTest(unittest.TestCase):
         )
         self.assertEqual(reg.v("").url_path, "/static/uv/")
         self.assertEqual(reg.v("").fs_path, "/var/static/fv")
+
+    def test_preload(self):
+        from paka.webstatic.registry import CSSRType, JSRType, FileRType
+        reg = self.mkreg(
+            css=CSSRType(url_path="c", fs_path="c", add_hash=True),
+            js=JSRType(url_path="j", fs_path="j", add_hash=True),
+            fonts=FileRType(
+                url_path="f", fs_path="f", add_hash=True, preload_as="font"),
+            i=FileRType(url_path="i", fs_path="i", add_hash=True),
+            domain="example.com")
+        reg.load_manifest(data={
+            "/var/static/c/s<1.css": "deadbeefbadf00d",
+            "/var/static/j/app.js": "abcdefabcdef",
+        })
+        preload = reg.preload(
+            ("css", "s<1.css"),
+            ("js", "app.js"),
+            ("js", "mod.js", {"module": True}),
+            ("fonts", "a.woff2", {"absolute_url": True}))
+        self.assertEqual(
+            preload.header,
+            (
+                "</static/c/s%3C1.deadbe.css>; rel=preload; as=style, "
+                "</static/j/app.abcdef.js>; rel=preload; as=script, "
+                "</static/j/mod.js>; rel=modulepreload, "
+                "<//example.com/static/f/a.woff2>; rel=preload; as=font; "
+                "crossorigin"))
+        self.assertEqual(
+            preload.html,
+            (
+                """<link rel="preload" href="/static/c/s&lt;1.deadbe.css" """
+                """as="style">"""
+                """<link rel="preload" href="/static/j/app.abcdef.js" """
+                """as="script">"""
+                """<link rel="modulepreload" href="/static/j/mod.js">"""
+                """<link rel="preload" href="//example.com/static/f/a.woff2" """
+                """as="font" crossorigin>"""))
+        self.assertIs(
+            reg.preload(
+                ("css", "s<1.css"),
+                ("js", "app.js"),
+                ("js", "mod.js", {"module": True}),
+                ("fonts", "a.woff2", {"absolute_url": True})),
+            preload)
+        self.assertEqual(
+            reg.css("s<1.css").preload_link.header,
+            "</static/c/s%3C1.deadbe.css>; rel=preload; as=style")
+        self.assertRaises(
+            NotImplementedError, lambda: reg.i("x.png").preload_link)
+        reg.load_manifest(data={"/var/static/j/app.js": "012345678"})
+        self.assertEqual(
+            reg.preload(("js", "app.js")).header,
+            "</static/j/app.012345.js>; rel=preload; as=script")
+
+    def test_paths_with_manifest(self):
+        from paka.webstatic.registry import FileRType
+        reg = self.mkreg(
+            f=FileRType(url_path="f", fs_path="z", add_hash=True),
+            domain="example.com")
+        reg.load_manifest(data={"/var/static/z/one.file": "abcdefgh"})
+        self.assertEqual(
+            reg.f("one.file", "two.file").url_paths,
+            ["/static/f/one.abcdef.file", "/static/f/two.file"])
+        self.assertEqual(
+            reg.f("one.file", "two.file").urls,
+            [
+                "//example.com/static/f/one.abcdef.file",
+                "//example.com/static/f/two.file"])
+        self.assertEqual(
+            reg.f("one.file", "two.file").fs_paths,
+            ["/var/static/z/one.abcdef.file", "/var/static/z/two.file"])
+        self.assertEqual(
+            reg.f("one.file", add_hash=False).url_paths,
+            ["/static/f/one.file"])
+
+    def test_manifest_snapshot(self):
+        from paka.webstatic.manifest import ManifestSnapshot
+        from paka.webstatic.registry import FileRType
+        reg = self.mkreg(
+            f=FileRType(url_path="f", fs_path="z", add_hash=True))
+        reg.load_manifest(
+            data={"/var/static/z/one.file": "abcdefgh"}, snapshot=True)
+        self.assertIsInstance(reg.manifest, ManifestSnapshot)
+        self.assertEqual(
+            reg.f("one.file", "two.file").url_paths,
+            ["/static/f/one.abcdef.file", "/static/f/two.file"])
+
+    def test_metrics(self):
+        from paka.webstatic.metrics import Metrics
+        from paka.webstatic.registry import FileRType, JSRType
+        metrics = Metrics()
+        reg = self.registry_factory(
+            url_path=self.url_path,
+            fs_path=self.fs_path,
+            types={
+                "f": FileRType(url_path="f", fs_path="z", add_hash=False),
+                "js": JSRType(url_path="j", fs_path="j", add_hash=True)},
+            metrics=metrics)
+        reg.load_manifest(data={"/var/static/j/a.js": "abcdefgh"})
+        reg.f("one.file").url_path
+        reg.js("a.js").url_path
+        reg.js("b.js").html
+        reg.js.url_paths("a.js", "b.js", "c.js")
+        reg.js.html_many(["a.js"])
+        reg.js.html_many(["a.js"])
+        result = metrics.as_dict()
+        self.assertEqual(result["lookups"], {"f": 1, "js": 6})
+        self.assertEqual(result["manifest_hits"], {"js": 3})
+        self.assertEqual(result["manifest_misses"], {"js": 3})
+        self.assertEqual(result["cache_hits"], {"html_many": 1})
+        self.assertEqual(result["cache_misses"], {"html_many": 1})
+        self.assertEqual(
+            sorted(result["call_seconds"]),
+            ["f.url_path", "js.html", "js.url_path"])
+        self.assertEqual(result["call_seconds"]["js.url_path"]["count"], 1)
+
+    def test_html_many(self):
+        from paka.webstatic.registry import CSSRType, JSRType
+        reg = self.mkreg(
+            css=CSSRType(url_path="c", fs_path="c", add_hash=True),
+            js=JSRType(url_path="j", fs_path="j", add_hash=True))
+        reg.load_manifest(data={"/var/static/j/a.js": "abcdefgh"})
+        html = reg.js.html_many(["a.js", "b<.js"], defer=True)
+        self.assertEqual(
+            html,
+            (
+                """<script src="/static/j/a.abcdef.js" defer></script>"""
+                """<script src="/static/j/b&lt;.js" defer></script>"""))
+        self.assertIs(reg.js.html_many(("a.js", "b<.js"), defer=True), html)
+        self.assertEqual(
+            reg.css.html_many(["x.css"], media="print"),
+            """<link rel="stylesheet" href="/static/c/x.css" media="print">""")
+        self.assertEqual(reg.css.html_many([]), "")
+        reg.load_manifest(data={"/var/static/j/a.js": "0123456789"})
+        self.assertEqual(
+            reg.js.html_many(["a.js"]),
+            """<script src="/static/j/a.012345.js"></script>""")
+
+    def test_css_rtype_inline(self):
+        from paka.webstatic.registry import CSSRType
+        reg = self.registry_factory(
+            url_path=self.url_path,
+            fs_path=os.path.join(TEST_FILES_DIR, "registry"),
+            types={
+                "css": CSSRType(
+                    url_path="css", fs_path="css", add_hash=True,
+                    inline_threshold=1024)})
+        reg.load_manifest(data={
+            os.path.join(TEST_FILES_DIR, "registry/css/small.css"): (
+                "abcdef0123")})
+        expected = (
+            """<style media="print">a>b{color:#fff}"""
+            """.x{content:"<\\/STYLE>"}</style>""")
+        self.assertEqual(reg.css.inline("small.css", media="print"), expected)
+        self.assertEqual(
+            reg.css("small.css", media="print", inline="auto").html,
+            expected)
+        self.assertEqual(
+            reg.css("small.css", media="print", inline=True).html, expected)
+        self.assertEqual(
+            reg.css("big.css", inline="auto").html,
+            """<link rel="stylesheet" href="/static/css/big.css">""")
+        self.assertTrue(
+            reg.css.inline("big.css").startswith("<style>.big{margin:0}"))
+        self.assertEqual(
+            sorted(
+                os.path.basename(p)
+                for p in reg.get_cache((reg.css, "inline_css"))),
+            ["big.css", "small.abcdef.css"])
+
+    def test_css_rtype_inline_unhashed(self):
+        from paka.webstatic.registry import CSSRType
+        fs_path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, fs_path)
+        os.mkdir(os.path.join(fs_path, "css"))
+        css_path = os.path.join(fs_path, "css/crit.css")
+        reg = self.registry_factory(
+            url_path=self.url_path,
+            fs_path=fs_path,
+            types={
+                "css": CSSRType(
+                    url_path="css", fs_path="css", add_hash=True,
+                    inline_threshold=20)})
+
+        def write(css, mtime):
+            with open(css_path, "w") as f:
+                f.write(css)
+            os.utime(css_path, (mtime, mtime))
+        manifest_data = {
+            os.path.join(fs_path, "css/other.css"): "0123456789"}
+        write("a { color: red }", 0)
+        reg.load_manifest(data=manifest_data)
+        self.assertEqual(
+            reg.css.inline("crit.css"), "<style>a{color:red}</style>")
+        self.assertEqual(
+            reg.css.html_many(["crit.css"], inline=True),
+            "<style>a{color:red}</style>")
+        write("a { color: blue }", 1)
+        self.assertEqual(
+            reg.css.inline("crit.css"), "<style>a{color:blue}</style>")
+        self.assertEqual(
+            reg.css.html_many(["crit.css"], inline=True),
+            "<style>a{color:blue}</style>")
+        write("a { color: green; margin: 0 }", 2)
+        reg.load_manifest(data=manifest_data)
+        self.assertEqual(
+            reg.css("crit.css", inline="auto").html,
+            """<link rel="stylesheet" href="/static/css/crit.css">""")
+        write("a { color: green }", 3)
+        self.assertEqual(
+            reg.css("crit.css", inline="auto").html,
+            "<style>a{color:green}</style>")
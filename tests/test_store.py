@@ -0,0 +1,65 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+
+class ObjectStoreTest(unittest.TestCase):
+
+    def setUp(self):
+        from paka.webstatic.store import ObjectStore
+        self.tmp_dir = tempfile.mkdtemp()
+        self.store = ObjectStore(os.path.join(self.tmp_dir, "objects"))
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def pth(self, name):
+        return os.path.join(self.tmp_dir, name)
+
+    def read(self, path):
+        with open(path, "rb") as f:
+            return f.read()
+
+    def test_put_once(self):
+        obj_path = self.store.put(b"abc", "a9993e36")
+        self.assertEqual(obj_path, self.pth("objects/a9/993e36"))
+        self.assertEqual(self.read(obj_path), b"abc")
+        mtime = int(os.stat(obj_path).st_mtime) - 100  # exact on Python 2
+        os.utime(obj_path, (mtime, mtime))
+        self.store.put(b"abc", "a9993e36")
+        self.assertEqual(os.stat(obj_path).st_mtime, mtime)
+
+    def test_save_links(self):
+        self.store.save(b"abc", "a9993e36", self.pth("a.js"))
+        self.store.save(b"abc", "a9993e36", self.pth("b.js"))
+        self.store.save(b"xyz", "66b27417", self.pth("b.js"))
+        obj_path = self.store.get_path("a9993e36")
+        self.assertTrue(os.path.samefile(obj_path, self.pth("a.js")))
+        self.assertEqual(self.read(self.pth("b.js")), b"xyz")
+        self.assertEqual(os.stat(obj_path).st_nlink, 2)
+        self.assertEqual(sorted(os.listdir(self.tmp_dir)), [
+            "a.js", "b.js", "objects"])
+
+    def test_prune(self):
+        self.store.save(b"abc", "a9993e36", self.pth("a.js"))
+        self.store.put(b"xyz", "66b27417")
+        self.assertEqual(self.store.prune(), 1)
+        self.assertFalse(os.path.exists(self.store.get_path("66b27417")))
+        self.assertTrue(os.path.exists(self.store.get_path("a9993e36")))
+
+    def test_output(self):
+        from paka.webstatic import pipeline
+        from paka.webstatic.manifest import Manifest
+        manifest = Manifest(self.pth("manifest"))
+        paths = []
+        for name in ("en.js", "uk.js"):
+            output = pipeline.run((
+                pipeline.InputItem(path=None, data="var a = 1;"),
+                pipeline.Output(
+                    self.pth(name), manifest=manifest, store=self.store)))
+            paths.append(output.path)
+        self.assertEqual(paths, [self.pth("en.3836ec.js"),
+                                 self.pth("uk.3836ec.js")])
+        self.assertTrue(os.path.samefile(*paths))
+        self.assertEqual(self.read(paths[0]), b"var a = 1;")
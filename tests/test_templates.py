@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import unicode_literals
+
+import io
+import os
+import shutil
+import tempfile
+import unittest
+
+try:
+    import jinja2
+except ImportError:
+    jinja2 = None
+
+
+TEMPLATE = """<ul class="items">
+  {% for item in items %}
+    <li class="{{ item.cls }}" {% if item.on %}checked="checked"{% endif %}>
+      {{ item.name }}   {{ item.price }}
+    </li>
+  {% endfor %}
+</ul>
+{# comment   here #}
+"""
+
+
+class MinifyTemplateTest(unittest.TestCase):
+
+    def setUp(self):
+        from paka.webstatic.templates import minify_template
+        self.func = minify_template
+
+    def test_default(self):
+        self.assertEqual(
+            self.func("<p>\n  {{ a  }}\n</p>\n  <p>{%  b %}</p>"),
+            "<p>\n  {{ a  }}\n</p><p>{%  b %}</p>")
+
+    def test_aggressive(self):
+        self.assertEqual(
+            self.func(TEMPLATE, aggressive=True),
+            '<ul class=items>{% for item in items %}<li class="{{ item.cls }}"'
+            " {% if item.on %}checked=checked {% endif %}>"
+            "{{ item.name }} {{ item.price }}</li>{% endfor %}</ul>"
+            "{# comment   here #}")
+
+    def test_placeholder_in_source(self):
+        self.assertEqual(
+            self.func("<p> `tpl0-0` {{ x }} </p>", aggressive=True),
+            "<p>`tpl0-0` {{ x }}</p>")
+
+
+class TemplateMinifierTest(unittest.TestCase):
+
+    def setUp(self):
+        from paka.webstatic.templates import TemplateMinifier
+        self.cls = TemplateMinifier
+        self.tmp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp_dir, "page.html")
+        self.write("<p>  {{ a }}  </p>\n", mtime=1000)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def write(self, source, mtime):
+        with io.open(self.path, "w", encoding="utf-8") as f:
+            f.write(source)
+        os.utime(self.path, (mtime, mtime))
+
+    def test_cache_by_mtime(self):
+        minifier = self.cls(aggressive=True)
+        calls = []
+        minify = minifier._minify
+        minifier._minify = lambda source: calls.append(source) or (
+            minify(source))
+        self.assertEqual(minifier.minify_file(self.path), "<p>{{ a }}</p>")
+        self.assertEqual(minifier.minify_file(self.path), "<p>{{ a }}</p>")
+        self.assertEqual(len(calls), 1)
+        self.write("<p> {{ b }} </p>", mtime=2000)
+        self.assertEqual(minifier.minify_file(self.path), "<p>{{ b }}</p>")
+        self.assertEqual(len(calls), 2)
+
+    def test_without_path(self):
+        minifier = self.cls()
+        self.assertEqual(minifier.minify("<p>\n</p>"), "<p></p>")
+        self.assertEqual(minifier._cache, {})
+
+    def test_disk_cache(self):
+        cache_dir = os.path.join(self.tmp_dir, "cache")
+        first = self.cls(cache_dir=cache_dir)
+        self.assertEqual(first.minify_file(self.path), "<p>  {{ a }}  </p>")
+        self.assertEqual(len(os.listdir(cache_dir)), 1)
+        second = self.cls(cache_dir=cache_dir)
+        second._minify = None  # must not be called
+        self.assertEqual(second.minify_file(self.path), "<p>  {{ a }}  </p>")
+
+
+class _DictLoader(object):
+
+    def __init__(self, templates):
+        self.templates = templates
+
+    def get_source(self, environment, template):
+        return self.templates[template], None, lambda: True
+
+    def list_templates(self):
+        return sorted(self.templates)
+
+
+class MinifyingLoaderTest(unittest.TestCase):
+
+    def setUp(self):
+        from paka.webstatic.templates import MinifyingLoader, TemplateMinifier
+        self.loader = MinifyingLoader(
+            _DictLoader({"a.html": TEMPLATE}),
+            TemplateMinifier(aggressive=True))
+
+    def test_get_source(self):
+        source, filename, uptodate = self.loader.get_source(None, "a.html")
+        self.assertTrue(source.startswith(
+            "<ul class=items>{% for item in items %}<li"))
+        self.assertIsNone(filename)
+        self.assertEqual(self.loader.list_templates(), ["a.html"])
+
+    @unittest.skipIf(jinja2 is None, "needs Jinja2")
+    def test_render(self):
+        env = jinja2.Environment(loader=self.loader)
+        self.assertEqual(
+            env.get_template("a.html").render(items=[
+                {"cls": "a b", "on": True, "name": "x", "price": 1}]),
+            '<ul class=items><li class="a b" checked=checked >x 1</li>'
+            "</ul>")
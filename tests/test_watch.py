@@ -0,0 +1,97 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+
+class WatcherTest(unittest.TestCase):
+
+    def setUp(self):
+        from paka.webstatic import build, pipeline, watch
+        self.b = build
+        self.p = pipeline
+        self.w = watch
+        self.dir = tempfile.mkdtemp()
+        for name, text in (
+                ("a.css", "a { color: red; }"),
+                ("b.css", "b { color: red; }"),
+                ("base.css", "* { margin: 0; }")):
+            self.write(name, text, mtime=1)
+        self.bundles = [
+            self.b.Bundle(
+                [self.pth(name)],
+                (self.p.CSSImport(), self.p.CSSMin()),
+                self.p.Output(self.pth("out-" + name)),
+                deps=[self.pth("base.css")])
+            for name in ("a.css", "b.css")]
+        self.sleeps = []
+        self.watcher = self.w.Watcher(self.bundles, sleep=self.sleep)
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        if len(self.sleeps) == 2:  # burst of changes
+            self.write("b.css", "b{}", mtime=3)
+
+    def pth(self, name):
+        return os.path.join(self.dir, name)
+
+    def write(self, name, text, mtime):
+        with open(self.pth(name), "w") as f:
+            f.write(text)
+        os.utime(self.pth(name), (mtime, mtime))
+
+    def read(self, name):
+        with open(self.pth(name)) as f:
+            return f.read()
+
+    def test_poll(self):
+        self.assertEqual(self.watcher.poll(), set())
+        self.write("a.css", "a{}", mtime=2)
+        self.assertEqual(self.watcher.poll(), set([self.pth("a.css")]))
+        self.assertEqual(self.watcher.poll(), set())
+        os.remove(self.pth("a.css"))
+        self.assertEqual(self.watcher.poll(), set([self.pth("a.css")]))
+
+    def test_wait_debounces(self):
+        self.write("a.css", "a{}", mtime=2)
+        self.assertEqual(
+            self.watcher.wait(), set([self.pth("a.css"), self.pth("b.css")]))
+        self.assertEqual(self.sleeps, [0.2, 0.05, 0.05])
+
+    def test_rebuild_affected(self):
+        self.b.run(self.bundles)
+        self.write("a.css", '@import "base.css";', mtime=2)
+        self.assertEqual(
+            self.watcher.rebuild(self.watcher.poll()), self.bundles[:1])
+        self.assertEqual(self.read("out-a.css"), "*{margin:0}")
+        self.assertEqual(self.read("out-b.css"), "b{color:red}")
+        self.write("base.css", "* { padding: 0; }", mtime=2)
+        self.assertEqual(
+            self.watcher.rebuild(self.watcher.poll()), self.bundles)
+        self.assertEqual(self.read("out-a.css"), "*{padding:0}")
+
+    def test_rebuild_rehashes_referenced_files(self):
+        from paka.webstatic.manifest import Manifest
+        manifest = Manifest(self.pth("manifest"), hash_length=4)
+        with open(self.pth("a.png"), "wb") as f:
+            f.write(b"a")
+        self.write("c.css", "c { background: url(a.png); }", mtime=1)
+        bundle = self.b.Bundle(
+            [self.pth("c.css")],
+            (self.p.CSSHashURLs(manifest, hash_missing=True), ),
+            self.p.Output(self.pth("out-c.css")),
+            deps=[self.pth("a.png")])
+        watcher = self.w.Watcher([bundle], sleep=self.sleep)
+        self.b.run([bundle])
+        self.assertEqual(
+            self.read("out-c.css"), "c { background: url(a.86f7.png); }")
+        with open(self.pth("a.png"), "wb") as f:
+            f.write(b"b")
+        os.utime(self.pth("a.png"), (2, 2))
+        self.assertEqual(watcher.rebuild(watcher.poll()), [bundle])
+        self.assertEqual(
+            self.read("out-c.css"), "c { background: url(a.e9d7.png); }")
+        self.assertEqual(manifest[self.pth("a.png")], "e9d7")
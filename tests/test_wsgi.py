@@ -0,0 +1,217 @@
+import os
+import unittest
+from wsgiref.util import setup_testing_defaults, FileWrapper
+
+from testutils import TEST_FILES_DIR
+
+
+class StaticAppTest(unittest.TestCase):
+
+    def setUp(self):
+        from paka.webstatic import registry as r
+        from paka.webstatic.wsgi import StaticApp
+        self.fs_path = os.path.join(TEST_FILES_DIR, "wsgi")
+        self.registry = r.Registry(
+            url_path="/static/",
+            fs_path=self.fs_path,
+            types={
+                "css": r.CSSRType(url_path="c", fs_path="css", add_hash=True),
+                "f": r.FileRType(url_path="f", fs_path="f", add_hash=False),
+                "favicon": r.FaviconRType(fs_path="i")})
+        self.registry.load_manifest(data={
+            os.path.join(self.fs_path, "css/app.css"): "abcdef0123",
+            os.path.join(self.fs_path, "css/plain.css"): "fedcba9876",
+            os.path.join(self.fs_path, "css/other.css"): "abcdef4567"})
+        self.app = StaticApp(self.registry)
+
+    def request(self, path, method="GET", app=None, **headers):
+        environ = {"PATH_INFO": path, "REQUEST_METHOD": method}
+        setup_testing_defaults(environ)
+        environ["wsgi.file_wrapper"] = FileWrapper
+        for name, value in headers.items():
+            environ["HTTP_" + name.upper()] = value
+        result = {}
+
+        def start_response(status, headers):
+            result["status"] = status
+            result["headers"] = dict(headers)
+
+        body_iter = (app or self.app)(environ, start_response)
+        try:
+            body = b"".join(body_iter)
+        finally:
+            if hasattr(body_iter, "close"):
+                body_iter.close()
+        return result["status"], result["headers"], body
+
+    def test_hashed(self):
+        status, headers, body = self.request("/static/c/app.abcdef.css")
+        self.assertEqual(status, "200 OK")
+        self.assertEqual(body, b"body{color:red}")
+        self.assertEqual(headers["ETag"], '"abcdef"')
+        self.assertEqual(
+            headers["Cache-Control"], "public, max-age=31536000, immutable")
+        self.assertEqual(headers["Content-Type"], "text/css; charset=utf-8")
+        self.assertEqual(headers["Content-Length"], "15")
+        self.assertEqual(headers["Vary"], "Accept-Encoding")
+
+    def test_hashed_without_hashed_file(self):
+        status, headers, body = self.request("/static/c/plain.fedcba.css")
+        self.assertEqual(status, "200 OK")
+        self.assertEqual(body, b"a{}")
+        self.assertEqual(
+            headers["Cache-Control"], "public, max-age=31536000, immutable")
+        self.assertEqual(headers["ETag"], '"fedcba"')
+
+    def test_unhashed(self):
+        status, headers, body = self.request("/static/c/plain.css")
+        self.assertEqual(status, "200 OK")
+        self.assertEqual(headers["Cache-Control"], "no-cache")
+        self.assertEqual(headers["ETag"], '"fedcba"')
+        self.assertNotIn("Vary", headers)
+        status, headers, body = self.request("/static/f/x.txt")
+        self.assertEqual(status, "200 OK")
+        self.assertEqual(body, b"0123456789")
+        self.assertEqual(headers["Cache-Control"], "no-cache")
+        self.assertEqual(headers["Content-Type"], "text/plain; charset=utf-8")
+
+    def test_wrong_hash(self):
+        status, _headers, _body = self.request("/static/c/plain.000000.css")
+        self.assertEqual(status, "404 Not Found")
+
+    def test_not_found(self):
+        for path in (
+                "/static/c/missing.css", "/static/c/../f/x.txt",
+                "/static/c//etc/passwd", "/static/c/", "/other",
+                "/static/manifest"):
+            status, _headers, _body = self.request(path)
+            self.assertEqual(status, "404 Not Found", path)
+
+    def test_fallback_app(self):
+        from paka.webstatic.wsgi import StaticApp
+
+        def fallback(environ, start_response):
+            start_response("200 OK", [])
+            return [b"fallback"]
+
+        app = StaticApp(self.registry, app=fallback)
+        self.assertEqual(
+            self.request("/other", app=app), ("200 OK", {}, b"fallback"))
+        self.assertEqual(self.request("/static/f/x.txt", app=app)[2], b"0123456789")
+
+    def test_dev_builder(self):
+        from paka.webstatic import build, pipeline
+        from paka.webstatic.wsgi import StaticApp
+        builder = build.DevBuilder([build.Bundle(
+            [os.path.join(self.fs_path, "css/plain.css")] * 2,
+            (pipeline.Concat(), pipeline.CSSMin()),
+            pipeline.Output(os.path.join(self.fs_path, "css/bundle.css")))])
+        app = StaticApp(self.registry, builder=builder)
+        url_path = self.registry.css("bundle.css").url_path
+        self.assertEqual(url_path, "/static/c/bundle.css")
+        status, headers, body = self.request(url_path, app=app)
+        self.assertEqual(status, "200 OK")
+        self.assertEqual(body, b"a{}a{}")
+        self.assertEqual(headers["Cache-Control"], "no-cache")
+        self.assertEqual(headers["Content-Type"], "text/css; charset=utf-8")
+        status, _headers, body = self.request(
+            url_path, app=app, if_none_match=headers["ETag"])
+        self.assertEqual(status, "304 Not Modified")
+        self.assertEqual(body, b"")
+        status, _headers, body = self.request(
+            "/static/c/app.abcdef.css", app=app)
+        self.assertEqual(body, b"body{color:red}")
+
+    def test_favicon(self):
+        status, _headers, body = self.request("/favicon.ico")
+        self.assertEqual(status, "200 OK")
+        self.assertEqual(body, b"ico")
+
+    def test_head_and_method(self):
+        status, headers, body = self.request("/static/f/x.txt", method="HEAD")
+        self.assertEqual((status, body), ("200 OK", b""))
+        self.assertEqual(headers["Content-Length"], "10")
+        status, headers, _body = self.request("/static/f/x.txt", method="POST")
+        self.assertEqual(status, "405 Method Not Allowed")
+        self.assertEqual(headers["Allow"], "GET, HEAD")
+
+    def test_not_modified(self):
+        status, headers, body = self.request(
+            "/static/c/app.abcdef.css", if_none_match='W/"x", "abcdef"')
+        self.assertEqual((status, body), ("304 Not Modified", b""))
+        self.assertEqual(headers["ETag"], '"abcdef"')
+        _status, headers, _body = self.request("/static/f/x.txt")
+        status, _headers, _body = self.request(
+            "/static/f/x.txt", if_modified_since=headers["Last-Modified"])
+        self.assertEqual(status, "304 Not Modified")
+        status, _headers, _body = self.request(
+            "/static/c/app.abcdef.css", if_none_match='"other"')
+        self.assertEqual(status, "200 OK")
+
+    def test_precompressed(self):
+        status, headers, body = self.request(
+            "/static/c/app.abcdef.css", accept_encoding="br;q=0, gzip")
+        self.assertEqual(status, "200 OK")
+        self.assertEqual(body, b"gzipped")
+        self.assertEqual(headers["Content-Encoding"], "gzip")
+        self.assertEqual(headers["ETag"], '"abcdef-gzip"')
+        self.assertEqual(headers["Content-Type"], "text/css; charset=utf-8")
+        status, headers, body = self.request(
+            "/static/c/app.abcdef.css", accept_encoding="br")
+        self.assertEqual(body, b"body{color:red}")
+        self.assertNotIn("Content-Encoding", headers)
+
+    def test_range(self):
+        path = "/static/f/x.txt"
+        for range_, expected, content_range in (
+                ("bytes=2-4", b"234", "bytes 2-4/10"),
+                ("bytes=7-", b"789", "bytes 7-9/10"),
+                ("bytes=-2", b"89", "bytes 8-9/10"),
+                ("bytes=8-100", b"89", "bytes 8-9/10")):
+            status, headers, body = self.request(path, range=range_)
+            self.assertEqual(status, "206 Partial Content")
+            self.assertEqual(body, expected)
+            self.assertEqual(headers["Content-Range"], content_range)
+            self.assertEqual(headers["Content-Length"], str(len(expected)))
+        status, headers, _body = self.request(path, range="bytes=10-")
+        self.assertEqual(status, "416 Range Not Satisfiable")
+        self.assertEqual(headers["Content-Range"], "bytes */10")
+        status, _headers, body = self.request(path, range="bytes=0-1,3-4")
+        self.assertEqual((status, body), ("200 OK", b"0123456789"))
+        status, _headers, body = self.request(
+            path, range="bytes=0-1", if_range='"other"')
+        self.assertEqual((status, body), ("200 OK", b"0123456789"))
+
+    def test_cache(self):
+        from paka.webstatic.cache import LRUCache
+        from paka.webstatic.wsgi import StaticApp
+        cache = LRUCache(max_size=1024)
+        app = StaticApp(self.registry, cache=cache)
+        for _i in range(2):
+            status, headers, body = self.request(
+                "/static/c/app.abcdef.css", app=app)
+            self.assertEqual((status, body), ("200 OK", b"body{color:red}"))
+            self.assertEqual(headers["Content-Length"], "15")
+        status, headers, body = self.request(
+            "/static/c/app.abcdef.css", app=app, accept_encoding="gzip",
+            range="bytes=1-2")
+        self.assertEqual((status, body), ("206 Partial Content", b"zi"))
+        self.assertEqual(headers["Content-Encoding"], "gzip")
+        self.request("/static/c/plain.css", app=app)  # not cached
+        self.assertEqual(
+            cache.stats(),
+            {
+                "items": 2, "size": 22, "max_size": 1024, "hits": 1,
+                "misses": 2, "evictions": 0})
+
+    def test_cache_same_short_hash(self):
+        from paka.webstatic.cache import LRUCache
+        from paka.webstatic.wsgi import StaticApp
+        app = StaticApp(self.registry, cache=LRUCache(max_size=1024))
+        for _i in range(2):
+            _status, _headers, body = self.request(
+                "/static/c/app.abcdef.css", app=app)
+            self.assertEqual(body, b"body{color:red}")
+            _status, _headers, body = self.request(
+                "/static/c/other.abcdef.css", app=app)
+            self.assertEqual(body, b"p{color:blue}")